@@ -20,7 +20,7 @@ def main():
         LOGGER.set_file(os.path.join(args.out, "run.log.jsonl"))
     except Exception:
         pass
-    summary = run_pipeline(cfg, args.seeds, args.out)
+    summary = run_pipeline(cfg, args.seeds, args.out, config_path=args.config)
     print(summary)
 
 if __name__ == "__main__":
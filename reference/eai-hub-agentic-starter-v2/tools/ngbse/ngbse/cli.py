@@ -1,6 +1,7 @@
-import argparse
+import argparse, datetime, os, sys
 from .config import load_config
-from .pipeline import run_pipeline
+from .logger import LOGGER
+from .pipeline import run_pipeline, rescore_run, collect_llm_batch
 
 def build_parser():
     ap = argparse.ArgumentParser(prog="ngbse", description="NGBSE 17.1 Genesis")
@@ -9,8 +10,102 @@ def build_parser():
     ap.add_argument("--out", default="out", help="Output directory (default: out)")
     return ap
 
+def build_rescore_parser():
+    ap = argparse.ArgumentParser(prog="ngbse rescore", description="Recompute scores and outputs from stored findings (no network)")
+    ap.add_argument("--from", dest="findings", required=True, help="Stored findings, e.g. out/findings.jsonl")
+    ap.add_argument("--config", default="ngbse.config.yml", help="Path to config (default: ngbse.config.yml)")
+    ap.add_argument("--seeds", default=None, help="Seeds of the original run (only hashed into the manifest)")
+    ap.add_argument("--out", default=None, help="New run directory (default: <from dir>/rescore_<ts>)")
+    ap.add_argument("--history-dir", default=None, help="Extra history directory for the forecast (e.g. out/history)")
+    ap.add_argument("--now", default=None, help="Reference time for recency (default: original collection time)")
+    return ap
+
+def rescore_main(argv):
+    args = build_rescore_parser().parse_args(argv)
+    cfg = load_config(args.config)
+    out_dir = args.out or os.path.join(os.path.dirname(os.path.abspath(args.findings)),
+                                       "rescore_" + datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+    LOGGER.set_file(os.path.join(out_dir, "run.log.jsonl"))
+    summary = rescore_run(cfg, args.findings, out_dir, seeds_path=args.seeds, config_path=args.config,
+                          history_dir=args.history_dir, now_iso=args.now)
+    print(summary)
+
+def build_gateway_parser():
+    ap = argparse.ArgumentParser(prog="ngbse gateway", description="Shared local LLM gateway (docs/LLM_GATEWAY_SPEC.md)")
+    ap.add_argument("--config", default="ngbse.config.yml", help="Path to config (default: ngbse.config.yml)")
+    ap.add_argument("--host", default=None, help="Bind address (default: gateway.host)")
+    ap.add_argument("--port", type=int, default=None, help="Port (default: gateway.port)")
+    ap.add_argument("--unix", default=None, help="Serve on this Unix socket instead of TCP")
+    return ap
+
+def gateway_main(argv):
+    from .gateway import GatewayService, make_server
+    from .llm_client import client_from_config
+    args = build_gateway_parser().parse_args(argv)
+    cfg = load_config(args.config)
+    gw = cfg.gateway
+    client = client_from_config(cfg.llm)
+    client.providers = [p for p in client.providers if p != "gateway"]
+    service = GatewayService(client, max_concurrency=gw.max_concurrency, rate_per_sec=gw.rate_per_sec)
+    unix_socket = args.unix or gw.unix_socket
+    server = make_server(service, host=args.host or gw.host, port=args.port or gw.port, unix_socket=unix_socket)
+    LOGGER.info("gateway.start", address=unix_socket or f"{args.host or gw.host}:{args.port or gw.port}", providers=client.providers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        client.log_metrics()
+        if client.cache is not None:
+            client.cache.log_stats()
+
+def build_llm_collect_parser():
+    ap = argparse.ArgumentParser(prog="ngbse llm-collect", description="Fetch batch LLM results and complete the run's report")
+    ap.add_argument("--run", default="out", help="Run directory with llm_batch.job.json (default: out)")
+    ap.add_argument("--wait", type=float, default=0.0, help="Seconds to wait for the batch to finish (default: 0)")
+    ap.add_argument("--poll", type=float, default=10.0, help="Polling interval in seconds (default: 10)")
+    return ap
+
+def llm_collect_main(argv):
+    args = build_llm_collect_parser().parse_args(argv)
+    LOGGER.set_file(os.path.join(args.run, "run.log.jsonl"))
+    result = collect_llm_batch(args.run, wait_seconds=args.wait, poll_seconds=args.poll)
+    print(result)
+    return 0 if result.get("status") == "completed" else 1
+
+def build_history_compact_parser():
+    ap = argparse.ArgumentParser(prog="ngbse history-compact", description="Downsample old history runs into compressed rollups")
+    ap.add_argument("--history-dir", default="out/history", help="History directory (default: out/history)")
+    ap.add_argument("--config", default="ngbse.config.yml", help="Path to config for the retention policy (default: ngbse.config.yml)")
+    ap.add_argument("--raw-days", type=int, default=None, help="Keep every run this many days (default: history.raw_days)")
+    ap.add_argument("--daily-days", type=int, default=None, help="Daily rollups up to this age, weekly after (default: history.daily_days)")
+    ap.add_argument("--now", default=None, help="Reference time, ISO 8601 UTC (default: now)")
+    return ap
+
+def history_compact_main(argv):
+    from .forecast.retention import compact_history
+    args = build_history_compact_parser().parse_args(argv)
+    hist = load_config(args.config).history
+    now = datetime.datetime.fromisoformat(args.now.replace("Z", "")) if args.now else None
+    stats = compact_history(args.history_dir, now=now,
+                            raw_days=hist.raw_days if args.raw_days is None else args.raw_days,
+                            daily_days=hist.daily_days if args.daily_days is None else args.daily_days)
+    print(stats)
+
+COMMANDS = {
+    "rescore": rescore_main,
+    "gateway": gateway_main,
+    "llm-collect": llm_collect_main,
+    "history-compact": history_compact_main,
+}
+
 def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
     args = build_parser().parse_args(argv)
     cfg = load_config(args.config)
-    summary = run_pipeline(cfg, args.seeds, args.out)
+    summary = run_pipeline(cfg, args.seeds, args.out, config_path=args.config)
     print(summary)
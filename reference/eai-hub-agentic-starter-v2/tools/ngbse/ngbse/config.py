@@ -1,12 +1,32 @@
+import os
 import yaml
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class LLMConfig(BaseModel):
     provider_priority: List[str] = Field(default_factory=lambda: ["openai", "azure_openai", "anthropic"])
     max_input_tokens: int = 12000
     max_output_tokens: int = 1500
     temperature: float = 0.2
+    max_in_flight: int = 4
+    cache_dir: Optional[str] = None
+    cache_ttl_hours: float = 168.0
+    cache_max_mb: float = 64.0
+    timeout_seconds: float = 60.0
+    max_retries: int = 2
+    hedge_after_seconds: Optional[float] = None
+    breaker_failures: int = 3
+    breaker_cooldown_seconds: float = 30.0
+    stream: bool = False
+    batch_adapter: str = "local"
+    batch_dir: Optional[str] = ".ngbse_cache/batch"
+
+class GatewayConfig(BaseModel):
+    host: str = "127.0.0.1"
+    port: int = 8787
+    unix_socket: Optional[str] = None
+    max_concurrency: int = 8
+    rate_per_sec: Optional[float] = None
 
 class AllowList(BaseModel):
     domains: List[str] = Field(default_factory=list)
@@ -14,9 +34,34 @@ class AllowList(BaseModel):
 
 class OutputConfig(BaseModel):
     stix: bool = True
+    stix_mode: str = "full"   # full | delta (new indicators + Sightings of re-observed ones)
     docx_report: bool = True
+    report_top_n: int = 25                   # rows per report table (risks, rising assets, scenarios)
+    report_md_template: Optional[str] = None  # string.Template file for the Markdown fallback
+    report_process: bool = True              # render the report in a child process
+    report_template_cache: Optional[str] = ".ngbse_cache/report_template.v1.docx"  # pre-built base document
     save_history: bool = True
     csv: bool = False
+    csv_gzip: bool = False    # findings.csv.gz instead of findings.csv
+    columnar: Optional[str] = None   # parquet | arrow: findings + asset_scores as typed columnar files (pyarrow)
+    sqlite_db: Optional[str] = None  # e.g. out/ngbse.db: every run appended to one indexed analyst database
+
+class EnrichConfig(BaseModel):
+    ip_asn_db: Optional[str] = None
+
+class ScoringConfig(BaseModel):
+    model_path: Optional[str] = None
+
+class ThemesConfig(BaseModel):
+    path: Optional[str] = None
+    multi_label: bool = False
+    count_hits: bool = False
+
+class HistoryConfig(BaseModel):
+    raw_days: int = 7          # every run kept as-is
+    daily_days: int = 90       # daily rollups up to this age, weekly rollups after
+    auto_compact: bool = True  # compact out/history after each run
+
 class CollectorsConfig(BaseModel):
     enabled: List[str] = Field(default_factory=lambda: [
         "http_web", "urlscan", "github", "shodan", "censys", "leakix", "wayback"
@@ -30,8 +75,27 @@ class AppConfig(BaseModel):
     output: OutputConfig = OutputConfig()
     validation_enabled: bool = False
     collectors: CollectorsConfig = CollectorsConfig()
+    enrich: EnrichConfig = EnrichConfig()
+    scoring: ScoringConfig = ScoringConfig()
+    themes: ThemesConfig = ThemesConfig()
+    gateway: GatewayConfig = GatewayConfig()
+    history: HistoryConfig = HistoryConfig()
+
+def _relative_to(base_dir: str, path: Optional[str]) -> Optional[str]:
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(base_dir, path)
 
 def load_config(path: str) -> AppConfig:
+    """
+    Data files named in the config (scoring.model_path, themes.path, enrich.ip_asn_db) are
+    resolved against the config's directory.
+    """
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f)
-    return AppConfig(**data)
+    cfg = AppConfig(**data)
+    base_dir = os.path.dirname(path)
+    cfg.scoring.model_path = _relative_to(base_dir, cfg.scoring.model_path)
+    cfg.themes.path = _relative_to(base_dir, cfg.themes.path)
+    cfg.enrich.ip_asn_db = _relative_to(base_dir, cfg.enrich.ip_asn_db)
+    return cfg
@@ -0,0 +1,269 @@
+import csv, mmap, socket, struct, sys, ipaddress
+from itertools import chain
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Iterable
+from ..logger import LOGGER
+
+try:
+    import numpy as np
+    _NUMPY = True
+except Exception:
+    np = None
+    _NUMPY = False
+
+# Bestandsformaat (little-endian, alles 4-byte uitgelijnd):
+#   header   : magic[8] | n_ranges u32 | n_strings u32 | reserved u32 | reserved u32
+#   starts   : u32[n_ranges]   (gesorteerd, IPv4 als integer)
+#   ends     : u32[n_ranges]   (inclusief)
+#   asn      : u32[n_ranges]
+#   org_idx  : u32[n_ranges]   (index in stringtabel)
+#   country  : u16[n_ranges]   (twee ASCII-bytes, 0 = onbekend)
+#   padding  : tot 4-byte grens
+#   str_offs : u32[n_strings + 1]
+#   str_blob : utf-8
+MAGIC = b"NGIPDB01"
+_HEADER = struct.Struct("<8sIIII")
+
+_START_COLS = ("start_ip", "range_start", "start", "ip_start")
+_END_COLS = ("end_ip", "range_end", "end", "ip_end")
+_NET_COLS = ("network", "cidr", "prefix")
+_ASN_COLS = ("asn", "as_number", "autonomous_system_number")
+_ORG_COLS = ("org", "as_org", "as_description", "organization", "autonomous_system_organization")
+_CC_COLS = ("country", "country_code", "cc")
+_RANGE_COLS = set(_START_COLS + _END_COLS + _NET_COLS)
+# Kolommen van iptoasn.com-dumps (ip2asn-v4.tsv), die geen kopregel hebben.
+IPTOASN_COLUMNS = ("range_start", "range_end", "as_number", "country_code", "as_description")
+_NO_COUNTRY = {"NONE", "-", "ZZ"}
+
+
+def _pick(row: Dict[str, str], names) -> str:
+    for n in names:
+        v = row.get(n)
+        if v not in (None, ""):
+            return v.strip()
+    return ""
+
+
+def _ipv4_int(value: str) -> Optional[int]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        n = int(value)
+        return n if n <= 0xFFFFFFFF else None
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, value), "big")
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_asn(value: str) -> int:
+    value = (value or "").strip().upper()
+    if value.startswith("AS"):
+        value = value[2:]
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def _iter_csv_ranges(path: str, delimiter: Optional[str] = None):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        if delimiter is None:
+            delimiter = "\t" if sample.count("\t") > sample.count(",") else ","
+        reader = csv.reader(f, delimiter=delimiter)
+        first = next(reader, None)
+        if first is None:
+            return
+        header = [(c or "").strip().lower() for c in first]
+        if _RANGE_COLS.intersection(header):
+            fields, rows = header, reader
+        else:
+            # geen bekende kopregel: positionele iptoasn-kolommen, eerste regel is data
+            fields, rows = list(IPTOASN_COLUMNS), chain([first], reader)
+        for values in rows:
+            row = dict(zip(fields, values))
+            net = _pick(row, _NET_COLS)
+            if net:
+                try:
+                    n = ipaddress.ip_network(net, strict=False)
+                except ValueError:
+                    yield None
+                    continue
+                if n.version != 4:
+                    yield None
+                    continue
+                start, end = int(n.network_address), int(n.broadcast_address)
+            else:
+                start, end = _ipv4_int(_pick(row, _START_COLS)), _ipv4_int(_pick(row, _END_COLS))
+                if start is None or end is None or end < start:
+                    yield None
+                    continue
+            cc = _pick(row, _CC_COLS).upper()
+            cc = "" if cc in _NO_COUNTRY else cc[:2]
+            yield (start, end, _parse_asn(_pick(row, _ASN_COLS)), _pick(row, _ORG_COLS), cc)
+
+
+def build_ip_asn_db(csv_paths: Iterable[str], out_path: str, delimiter: Optional[str] = None) -> Dict[str, int]:
+    """
+    Bouwt een IP-range database uit één of meer CSV/TSV-dumps.
+    Herkent kolommen als start_ip/end_ip (of network/cidr), asn, org en country; zonder
+    herkenbare kopregel gelden de positionele iptoasn-kolommen (IPTOASN_COLUMNS).
+    Landcode None/-/ZZ (niet-gerouteerd) wordt leeg.
+    IPv6-regels en ongeldige regels worden overgeslagen; overlappende ranges worden
+    ingekort zodat lookups eenduidig blijven.
+    """
+    rows = []
+    skipped = 0
+    for p in csv_paths:
+        for r in _iter_csv_ranges(p, delimiter):
+            if r is None:
+                skipped += 1
+            else:
+                rows.append(r)
+    rows.sort(key=lambda r: (r[0], r[1]))
+
+    starts, ends, asns, orgs, ccs = [], [], [], [], []
+    strings: Dict[str, int] = {"": 0}
+    overlaps = 0
+    for start, end, asn, org, cc in rows:
+        if ends and start <= ends[-1]:
+            if end <= ends[-1]:
+                overlaps += 1
+                continue
+            start = ends[-1] + 1
+            overlaps += 1
+        idx = strings.get(org)
+        if idx is None:
+            idx = strings[org] = len(strings)
+        starts.append(start)
+        ends.append(end)
+        asns.append(asn)
+        orgs.append(idx)
+        cc_bytes = (cc.encode("ascii", "ignore") + b"\0\0")[:2]
+        ccs.append(struct.unpack("<H", cc_bytes)[0])
+
+    n = len(starts)
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for b in blobs:
+        offsets.append(offsets[-1] + len(b))
+    with open(out_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, n, len(blobs), 0, 0))
+        for col in (starts, ends, asns, orgs):
+            f.write(struct.pack(f"<{n}I", *col))
+        f.write(struct.pack(f"<{n}H", *ccs))
+        if n % 2:
+            f.write(b"\0\0")
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(blobs))
+    stats = {"ranges": n, "orgs": len(blobs) - 1, "skipped": skipped, "overlaps": overlaps}
+    LOGGER.info("ipdb.built", path=out_path, **stats)
+    return stats
+
+
+class IpAsnDatabase:
+    """
+    Memory-mapped IPv4 → ASN/org/country lookup. Bestand wordt niet in het geheugen
+    geladen; lookups zijn een binary search over de gemapte start-kolom.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, n_strings, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not an NGBSE IP database: {path}")
+        self.n = n
+        off = _HEADER.size
+        self._starts = self._column(off, n, "I"); off += 4 * n
+        self._ends = self._column(off, n, "I"); off += 4 * n
+        self._asn = self._column(off, n, "I"); off += 4 * n
+        self._org = self._column(off, n, "I"); off += 4 * n
+        self._cc = self._column(off, n, "H"); off += 2 * n + (2 if n % 2 else 0)
+        self._str_offs = self._column(off, n_strings + 1, "I"); off += 4 * (n_strings + 1)
+        self._str_base = off
+        self._org_cache: Dict[int, str] = {}
+        if _NUMPY and n:
+            base = _HEADER.size
+            self._np_starts = np.frombuffer(self._mm, dtype="<u4", count=n, offset=base)
+            self._np_ends = np.frombuffer(self._mm, dtype="<u4", count=n, offset=base + 4 * n)
+        else:
+            self._np_starts = self._np_ends = None
+
+    def _column(self, offset: int, count: int, fmt: str):
+        view = memoryview(self._mm)[offset:offset + count * struct.calcsize(fmt)]
+        if sys.byteorder == "little":
+            return view.cast(fmt)
+        return list(struct.unpack_from(f"<{count}{fmt}", self._mm, offset))
+
+    def _org_name(self, idx: int) -> str:
+        name = self._org_cache.get(idx)
+        if name is None:
+            a, b = self._str_offs[idx], self._str_offs[idx + 1]
+            name = self._org_cache[idx] = bytes(self._mm[self._str_base + a:self._str_base + b]).decode("utf-8")
+        return name
+
+    def _record(self, i: int) -> Dict[str, Any]:
+        cc = struct.pack("<H", self._cc[i]).rstrip(b"\0").decode("ascii", "ignore")
+        return {"asn": self._asn[i], "as_org": self._org_name(self._org[i]), "country": cc}
+
+    def lookup_int(self, n: int) -> Optional[Dict[str, Any]]:
+        i = bisect_right(self._starts, n) - 1
+        if i >= 0 and n <= self._ends[i]:
+            return self._record(i)
+        return None
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        n = _ipv4_int(ip)
+        return self.lookup_int(n) if n is not None else None
+
+    def lookup_many(self, ips: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Batch-lookup; gebruikt NumPy searchsorted indien beschikbaar."""
+        if self._np_starts is None:
+            return [self.lookup(ip) for ip in ips]
+        ints = [_ipv4_int(ip) for ip in ips]
+        valid = np.array([-1 if v is None else v for v in ints], dtype=np.int64)
+        idx = np.searchsorted(self._np_starts, valid, side="right") - 1
+        hit = (valid >= 0) & (idx >= 0)
+        hit[hit] &= valid[hit] <= self._np_ends[idx[hit]]
+        return [self._record(int(i)) if h else None for i, h in zip(idx.tolist(), hit.tolist())]
+
+    def close(self):
+        for attr in ("_np_starts", "_np_ends", "_starts", "_ends", "_asn", "_org", "_cc", "_str_offs"):
+            v = getattr(self, attr, None)
+            if isinstance(v, memoryview):
+                v.release()
+            setattr(self, attr, None)
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def enrich_ip_asn(findings: List[Dict[str, Any]], db: IpAsnDatabase) -> List[Dict[str, Any]]:
+    """
+    Voegt ASN, netwerkeigenaar en land toe aan findings met een raw.ip (Shodan/Censys).
+    """
+    targets = [f for f in findings if (f.get("raw") or {}).get("ip")]
+    if not targets:
+        return findings
+    results = db.lookup_many([f["raw"]["ip"] for f in targets])
+    hits = 0
+    for f, rec in zip(targets, results):
+        if rec is None:
+            continue
+        hits += 1
+        f.setdefault("enrich", {}).update(rec)
+    LOGGER.info("enrich.ip_asn.done", n=len(targets), hits=hits)
+    return findings
@@ -0,0 +1,168 @@
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from ..logger import LOGGER
+from .csv_export import flatten
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _ARROW = True
+except Exception:
+    pa = None
+    pq = None
+    _ARROW = False
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+BATCH_ROWS = 65536
+
+# (column, kind): "dict" = dictionary-encoded string, "str", "int", "float", "bool", "ts" (UTC timestamp).
+# Column names follow the CSV export (nested keys joined with "_").
+FINDING_FIELDS: List[Tuple[str, str]] = [
+    ("seed_id", "dict"), ("asset", "dict"),
+    ("source_type", "dict"), ("source_url", "str"), ("source_domain", "dict"),
+    ("raw_title", "str"), ("raw_url", "str"), ("raw_status", "int"), ("raw_ip", "str"),
+    ("timestamps_observed", "ts"), ("timestamps_collected", "ts"),
+    ("quality_q", "float"), ("quality_notes", "dict"),
+    ("enrich_has_title", "bool"), ("enrich_asset_len", "int"), ("enrich_asn", "int"),
+    ("enrich_as_org", "dict"), ("enrich_country", "dict"),
+    ("score_M", "float"), ("score_C", "float"), ("score_Q", "float"), ("score_V", "float"), ("score_e_ai_star", "float"),
+]
+ASSET_FIELDS: List[Tuple[str, str]] = [
+    ("asset", "dict"), ("n", "int"),
+    ("avg_e_ai_star", "float"), ("max_e_ai_star", "float"), ("min_e_ai_star", "float"),
+    ("var_e_ai_star", "float"), ("std_e_ai_star", "float"),
+    ("p50_e_ai_star", "float"), ("p90_e_ai_star", "float"), ("p99_e_ai_star", "float"),
+]
+
+
+def _arrow_type(kind: str):
+    return {
+        "dict": pa.dictionary(pa.int32(), pa.string()),
+        "str": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "ts": pa.timestamp("us", tz="UTC"),
+    }[kind]
+
+
+def _convert(kind: str, v: Any) -> Any:
+    if v is None or v == "":
+        return None
+    try:
+        if kind == "int":
+            return int(v)
+        if kind == "float":
+            return float(v)
+        if kind == "bool":
+            return bool(v)
+        if kind == "ts":
+            return datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+        return str(v)
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnarWriter:
+    """
+    Streams rows into Parquet (zstd) or Arrow IPC record batches of BATCH_ROWS; the writer holds
+    at most one batch of rows. Dictionary columns are encoded per batch for Parquet (each row
+    group carries its own dictionary). The Arrow IPC file format only allows dictionary deltas,
+    so there each dictionary column keeps every distinct value seen and a batch appends only its
+    new ones: memory grows with the column's cardinality, not with the row count.
+    """
+    def __init__(self, path: str, fields: List[Tuple[str, str]], fmt: str = "parquet", batch_rows: Optional[int] = None):
+        if not _ARROW:
+            raise RuntimeError("pyarrow is required for columnar export (pip install pyarrow)")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        self.path, self.fields, self.fmt, self.batch_rows = path, fields, fmt, batch_rows or BATCH_ROWS
+        self.schema = pa.schema([pa.field(name, _arrow_type(kind)) for name, kind in fields])
+        self._cols: List[List[Any]] = [[] for _ in fields]
+        self._dicts: Dict[int, Dict[str, int]] = {}  # arrow only: column -> value -> index
+        self._dict_values: Dict[int, Any] = {}      # arrow only: column -> pa.Array of the values so far
+        self._writer = None
+        self._sink = None
+        self.count = 0
+
+    def __enter__(self):
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(self.path, "wb")
+            opts = pa.ipc.IpcWriteOptions(compression="zstd", emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=opts)
+        return self
+
+    def write(self, flat: Dict[str, Any]):
+        for col, (name, kind) in zip(self._cols, self.fields):
+            col.append(_convert(kind, flat.get(name)))
+        self.count += 1
+        if len(self._cols[0]) >= self.batch_rows:
+            self._flush()
+
+    def _array(self, i: int, values: List[Any]):
+        kind = self.fields[i][1]
+        if kind != "dict":
+            return pa.array(values, type=_arrow_type(kind))
+        if self.fmt == "parquet":
+            return pa.array(values, type=pa.string()).dictionary_encode()
+        lookup = self._dicts.setdefault(i, {})
+        indices: List[Optional[int]] = []
+        new: List[str] = []
+        for v in values:
+            idx = None
+            if v is not None:
+                idx = lookup.get(v)
+                if idx is None:
+                    idx = lookup[v] = len(lookup)
+                    new.append(v)
+            indices.append(idx)
+        known = self._dict_values.get(i)
+        if known is None or new:
+            added = pa.array(new, type=pa.string())
+            known = self._dict_values[i] = added if known is None else pa.concat_arrays([known, added])
+        return pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()), known)
+
+    def _flush(self):
+        if not self._cols[0]:
+            return
+        batch = pa.record_batch([self._array(i, col) for i, col in enumerate(self._cols)], schema=self.schema)
+        self._writer.write_batch(batch)
+        self._cols = [[] for _ in self.fields]
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._flush()
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+def write_findings_columnar(findings: Iterable[Dict[str, Any]], path: str, fmt: str = "parquet") -> int:
+    with ColumnarWriter(path, FINDING_FIELDS, fmt) as w:
+        for f in findings:
+            w.write(flatten(f))
+    return w.count
+
+
+def write_asset_scores_columnar(asset_scores: Dict[str, Dict[str, Any]], path: str, fmt: str = "parquet") -> int:
+    with ColumnarWriter(path, ASSET_FIELDS, fmt) as w:
+        for asset, stats in asset_scores.items():
+            w.write({**stats, "asset": asset})
+    return w.count
+
+
+def export_columnar(findings: Iterable[Dict[str, Any]], asset_scores: Dict[str, Dict[str, Any]], out_dir: str,
+                    fmt: str = "parquet") -> Optional[Dict[str, str]]:
+    """findings.<ext> and asset_scores.<ext> in out_dir; None (with a warning) when pyarrow is missing."""
+    if not _ARROW:
+        LOGGER.warn("export.columnar_unavailable", reason="pyarrow not installed")
+        return None
+    ext = FORMATS[fmt]
+    paths = {"findings": os.path.join(out_dir, "findings" + ext), "asset_scores": os.path.join(out_dir, "asset_scores" + ext)}
+    n = write_findings_columnar(findings, paths["findings"], fmt)
+    m = write_asset_scores_columnar(asset_scores, paths["asset_scores"], fmt)
+    LOGGER.info("export.columnar", format=fmt, findings=n, assets=m)
+    return paths
@@ -1,32 +1,77 @@
-import csv
-from typing import List, Dict, Any
-
-
-def write_csv(findings: List[Dict[str, Any]], path: str) -> None:
-    if not findings:
-        return
-    flattened: List[Dict[str, Any]] = []
-    for f in findings:
-        row = dict(f)
-        # Flatten nested structures we commonly use
-        source = row.pop("source", {}) or {}
-        raw = row.pop("raw", {}) or {}
-        score = row.get("score", {}) or {}
-        enrich = row.get("enrich", {}) or {}
-        row.update({
-            "source_type": source.get("type"),
-            "source_url": source.get("url"),
-            "source_domain": source.get("domain"),
-            "raw_title": raw.get("title"),
-            "score_e_ai_star": score.get("e_ai_star"),
-            "enrich_has_title": enrich.get("has_title"),
-            "enrich_asset_len": enrich.get("asset_len"),
-        })
-        flattened.append(row)
-    keys = sorted({k for item in flattened for k in item.keys()})
-    with open(path, "w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=keys, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(flattened)
+import os, io, csv, gzip, json
+from typing import List, Dict, Any, Iterable, Optional
+from ..utils import HashingFile
 
+# Declared column schema: nested dicts are flattened to <key>_<subkey>, so the header is known
+# up front and the export is single-pass. Keys outside the schema are not exported.
+FINDING_COLUMNS: List[str] = [
+    "seed_id", "asset",
+    "source_type", "source_url", "source_domain",
+    "raw_title", "raw_url", "raw_status", "raw_ip",
+    "timestamps_observed", "timestamps_collected",
+    "quality_q", "quality_notes",
+    "enrich_has_title", "enrich_asset_len", "enrich_source_type", "enrich_asn", "enrich_as_org", "enrich_country",
+    "score_M", "score_C", "score_Q", "score_V", "score_e_ai_star",
+]
 
+
+def flatten(obj: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """{"score": {"M": 1}} -> {"score_M": 1}; lists are kept as JSON text."""
+    out: Dict[str, Any] = {}
+    for k, v in obj.items():
+        key = prefix + str(k)
+        if isinstance(v, dict):
+            out.update(flatten(v, key + "_"))
+        elif isinstance(v, (list, tuple)):
+            out[key] = json.dumps(v, ensure_ascii=False)
+        else:
+            out[key] = v
+    return out
+
+
+class CsvWriter:
+    """
+    Streaming CSV writer with a fixed header; gzip-compressed when the path ends in .gz (or
+    compress=True). sha256 holds the digest of the written file once it is closed.
+    """
+    def __init__(self, path: str, columns: Optional[List[str]] = None, compress: Optional[bool] = None):
+        self.path = path
+        self.columns = list(columns or FINDING_COLUMNS)
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.count = 0
+        self.sha256: Optional[str] = None
+        self._file = None
+        self._handle = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = HashingFile(self.path)
+        raw = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=6) if self.compress else self._file
+        self._handle = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(self.columns)
+        return self
+
+    def write(self, record: Dict[str, Any]):
+        flat = flatten(record)
+        self._writer.writerow([flat.get(c) for c in self.columns])
+        self.count += 1
+
+    def __exit__(self, *exc):
+        self._handle.close()
+        self._file.close()
+        self.sha256 = self._file.hexdigest()
+
+
+def write_csv(findings: Iterable[Dict[str, Any]], path: str, columns: Optional[List[str]] = None,
+              compress: Optional[bool] = None, hashes: Optional[Dict[str, str]] = None) -> int:
+    """
+    Writes findings (any iterable) in one pass with constant memory; returns the number of rows.
+    The file's SHA-256 is recorded in hashes (keyed by file name) when given.
+    """
+    with CsvWriter(path, columns, compress) as w:
+        for f in findings:
+            w.write(f)
+    if hashes is not None:
+        hashes[os.path.basename(path)] = w.sha256
+    return w.count
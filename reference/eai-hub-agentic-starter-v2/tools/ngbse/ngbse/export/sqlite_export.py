@@ -0,0 +1,143 @@
+import os, json, sqlite3
+from itertools import islice
+from typing import Iterable, Dict, Any, Optional, List
+from ..dedupe import soft_hash
+from ..logger import LOGGER
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, ts TEXT NOT NULL, out_dir TEXT NOT NULL, n_findings INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (ts, out_dir)
+);
+CREATE TABLE IF NOT EXISTS seeds (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id), seed_id TEXT NOT NULL, query TEXT, type TEXT,
+    priority REAL, time_window_days INTEGER, PRIMARY KEY (run_id, seed_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS assets (asset_id INTEGER PRIMARY KEY, asset TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS findings (
+    finding_id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs(run_id), seed_id TEXT,
+    asset_id INTEGER REFERENCES assets(asset_id), soft_hash TEXT NOT NULL,
+    source_type TEXT, source_url TEXT, source_domain TEXT, title TEXT,
+    observed TEXT, collected TEXT, quality_q REAL,
+    score_m REAL, score_c REAL, score_q REAL, score_v REAL, e_ai_star REAL, raw_json TEXT
+);
+CREATE TABLE IF NOT EXISTS scores (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id), asset_id INTEGER NOT NULL REFERENCES assets(asset_id),
+    n INTEGER, avg_e_ai_star REAL, max_e_ai_star REAL, p90_e_ai_star REAL, std_e_ai_star REAL,
+    PRIMARY KEY (run_id, asset_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_asset_observed ON findings(asset_id, observed);
+CREATE INDEX IF NOT EXISTS findings_seed ON findings(seed_id);
+CREATE INDEX IF NOT EXISTS findings_type_observed ON findings(source_type, observed);
+CREATE INDEX IF NOT EXISTS findings_observed ON findings(observed);
+CREATE INDEX IF NOT EXISTS findings_run ON findings(run_id);
+"""
+_FTS = ("CREATE VIRTUAL TABLE IF NOT EXISTS findings_fts USING fts5("
+        "title, source_url, content='findings', content_rowid='finding_id')")
+
+_CHUNK = 5000
+_INSERT_FINDING = (
+    "INSERT INTO findings(run_id, seed_id, asset_id, soft_hash, source_type, source_url, source_domain, title, "
+    "observed, collected, quality_q, score_m, score_c, score_q, score_v, e_ai_star, raw_json) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class SqliteExporter:
+    """
+    Appends runs to one analyst database (normalised runs/seeds/assets/findings/scores, indexes
+    on asset, seed, source type and observed time, FTS5 over titles and URLs). Each run is one
+    transaction of prepared bulk inserts; exporting the same run again replaces it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        try:
+            self.conn.execute(_FTS)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            LOGGER.warn("export.sqlite.fts_unavailable", error=str(e))
+            self.fts = False
+        self._asset_ids: Dict[str, int] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _asset_id(self, asset: Optional[str]) -> Optional[int]:
+        if not asset:
+            return None
+        aid = self._asset_ids.get(asset)
+        if aid is None:
+            self.conn.execute("INSERT OR IGNORE INTO assets(asset) VALUES (?)", (asset,))
+            aid = self._asset_ids[asset] = self.conn.execute("SELECT asset_id FROM assets WHERE asset = ?", (asset,)).fetchone()[0]
+        return aid
+
+    def _delete_run(self, run_id: int):
+        if self.fts:
+            self.conn.execute("INSERT INTO findings_fts(findings_fts, rowid, title, source_url) "
+                              "SELECT 'delete', finding_id, title, source_url FROM findings WHERE run_id = ?", (run_id,))
+        for table in ("findings", "scores", "seeds"):
+            self.conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+    def _finding_rows(self, run_id: int, findings: List[Dict[str, Any]]):
+        for f in findings:
+            source, score, ts = f.get("source") or {}, f.get("score") or {}, f.get("timestamps") or {}
+            raw = f.get("raw") or {}
+            yield (run_id, f.get("seed_id"), self._asset_id(f.get("asset")), soft_hash(f),
+                   source.get("type"), source.get("url"), source.get("domain"), raw.get("title") or None,
+                   ts.get("observed"), ts.get("collected"), (f.get("quality") or {}).get("q"),
+                   score.get("M"), score.get("C"), score.get("Q"), score.get("V"), score.get("e_ai_star"),
+                   json.dumps(raw, ensure_ascii=False))
+
+    def export_run(self, ts: str, out_dir: str, findings: Iterable[Dict[str, Any]],
+                   asset_scores: Optional[Dict[str, Dict[str, Any]]] = None,
+                   seeds: Optional[Iterable[Dict[str, Any]]] = None) -> Dict[str, int]:
+        with self.conn:
+            row = self.conn.execute("SELECT run_id FROM runs WHERE ts = ? AND out_dir = ?", (ts, out_dir)).fetchone()
+            if row:
+                run_id = row[0]
+                self._delete_run(run_id)
+            else:
+                run_id = self.conn.execute("INSERT INTO runs(ts, out_dir) VALUES (?, ?)", (ts, out_dir)).lastrowid
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seeds(run_id, seed_id, query, type, priority, time_window_days) VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, s.get("id"), s.get("query"), s.get("type"), s.get("priority"), s.get("time_window_days"))
+                 for s in (seeds or []) if s.get("id")))
+            first = self.conn.execute("SELECT COALESCE(MAX(finding_id), 0) FROM findings").fetchone()[0]
+            n = 0
+            it = iter(findings)
+            while True:
+                chunk = list(islice(it, _CHUNK))
+                if not chunk:
+                    break
+                self.conn.executemany(_INSERT_FINDING, list(self._finding_rows(run_id, chunk)))
+                n += len(chunk)
+            if self.fts:
+                self.conn.execute("INSERT INTO findings_fts(rowid, title, source_url) "
+                                  "SELECT finding_id, title, source_url FROM findings WHERE finding_id > ? AND run_id = ?",
+                                  (first, run_id))
+            self.conn.executemany(
+                "INSERT INTO scores(run_id, asset_id, n, avg_e_ai_star, max_e_ai_star, p90_e_ai_star, std_e_ai_star) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, self._asset_id(a), v.get("n"), v.get("avg_e_ai_star"), v.get("max_e_ai_star"),
+                  v.get("p90_e_ai_star"), v.get("std_e_ai_star")) for a, v in (asset_scores or {}).items() if a])
+            self.conn.execute("UPDATE runs SET n_findings = ? WHERE run_id = ?", (n, run_id))
+        LOGGER.info("export.sqlite", path=self.path, run_id=run_id, findings=n, assets=len(asset_scores or {}))
+        return {"run_id": run_id, "findings": n}
+
+
+def export_sqlite(path: str, ts: str, out_dir: str, findings: Iterable[Dict[str, Any]],
+                  asset_scores: Optional[Dict[str, Dict[str, Any]]] = None,
+                  seeds: Optional[Iterable[Dict[str, Any]]] = None) -> Dict[str, int]:
+    with SqliteExporter(path) as exporter:
+        return exporter.export_run(ts, os.path.abspath(out_dir), findings, asset_scores, seeds)
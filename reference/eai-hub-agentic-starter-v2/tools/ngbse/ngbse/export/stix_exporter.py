@@ -1,19 +1,202 @@
-from stix2 import Bundle, Sighting, Indicator, Malware, Relationship
-from typing import List, Dict, Any
+import os, io, json, uuid, sqlite3
+from itertools import islice
+from typing import Iterable, Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from ..dedupe import soft_hash
+from ..logger import LOGGER
+from ..utils import HashingFile
 
-def to_indicator(f) -> Indicator:
-    name = f.get("raw",{}).get("title") or f.get("source",{}).get("url","")
-    pattern = "[url:value = '{}']".format(f.get("source",{}).get("url","").replace("'","\\'"))
-    return Indicator(
-        name=name or "Finding",
-        pattern=pattern,
-        pattern_type="stix",
-        created=datetime.utcnow(),
-    )
-
-def export_stix(findings: List[Dict[str,Any]], path: str):
-    indicators = [to_indicator(f) for f in findings]
-    b = Bundle(objects=indicators)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(str(b))
+try:
+    import stix2
+    _STIX2 = True
+except Exception:
+    stix2 = None
+    _STIX2 = False
+
+# Namespace for deterministic SDO ids: uuid5(NGBSE_NAMESPACE, soft_hash(finding)).
+NGBSE_NAMESPACE = uuid.UUID("6b1f3c1e-5a0e-5d3c-9f8e-2b7c4e1a9d10")
+VALIDATE_SAMPLE_EVERY = 1000
+STATE_DB = "stix_state.db"
+STIX_MODES = ("full", "delta")
+_CHUNK = 500  # stays under SQLite's host-parameter limit
+
+
+def stix_timestamp(dt: datetime) -> str:
+    """Millisecond precision, as stix2 serialises it."""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def indicator_id(f: Dict[str, Any]) -> str:
+    return "indicator--" + str(uuid.uuid5(NGBSE_NAMESPACE, soft_hash(f)))
+
+
+def url_pattern(url: str) -> str:
+    return "[url:value = '{}']".format(url.replace("\\", "\\\\").replace("'", "\\'"))
+
+
+def to_indicator(f: Dict[str, Any], created: str, ind_id: Optional[str] = None) -> Dict[str, Any]:
+    """Indicator as a plain dict in stix2's property order (no object construction or validation)."""
+    name = f.get("raw", {}).get("title") or f.get("source", {}).get("url", "")
+    return {
+        "type": "indicator",
+        "spec_version": "2.1",
+        "id": ind_id or indicator_id(f),
+        "created": created,
+        "modified": created,
+        "name": name or "Finding",
+        "pattern": url_pattern(f.get("source", {}).get("url", "")),
+        "pattern_type": "stix",
+        "pattern_version": "2.1",
+        "valid_from": created,
+    }
+
+
+def to_sighting(ind_id: str, first_seen: str, last_seen: str, count: int) -> Dict[str, Any]:
+    """Sighting of a re-observed indicator; the id is stable per (indicator, run)."""
+    return {
+        "type": "sighting",
+        "spec_version": "2.1",
+        "id": "sighting--" + str(uuid.uuid5(NGBSE_NAMESPACE, f"{ind_id}|{last_seen}")),
+        "created": last_seen,
+        "modified": last_seen,
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+        "count": count,
+        "sighting_of_ref": ind_id,
+    }
+
+
+class StixState:
+    """
+    Per indicator id: first_seen, last_seen and the number of runs it was observed in
+    (<out>/history/stix_state.db). Changes are committed once, after the bundle is written.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS indicators (id TEXT PRIMARY KEY, first_seen TEXT NOT NULL, "
+                          "last_seen TEXT NOT NULL, count INTEGER NOT NULL) WITHOUT ROWID")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def lookup(self, ids: List[str]) -> Dict[str, Tuple[str, str, int]]:
+        q = "SELECT id, first_seen, last_seen, count FROM indicators WHERE id IN (%s)" % ",".join("?" * len(ids))
+        return {r[0]: r[1:] for r in self.conn.execute(q, ids)}
+
+    def observe(self, ids: List[str], now: str):
+        self.conn.executemany("INSERT INTO indicators(id, first_seen, last_seen, count) VALUES (?1, ?2, ?2, 1) "
+                              "ON CONFLICT(id) DO UPDATE SET last_seen = ?2, count = count + 1 WHERE last_seen < ?2",
+                              [(i, now) for i in ids])
+
+    def commit(self):
+        self.conn.commit()
+
+
+def open_stix_state(out_dir: str, history_dirs: Optional[List[str]] = None) -> StixState:
+    """<out_dir>/history/stix_state.db; a new one starts from the state in an extra history dir (rescore)."""
+    from ..forecast.history_store import copy_sqlite
+    path = os.path.join(out_dir, "history", STATE_DB)
+    if not os.path.exists(path):
+        for d in history_dirs or []:
+            if os.path.exists(os.path.join(d, STATE_DB)):
+                copy_sqlite(os.path.join(d, STATE_DB), path)
+                break
+    return StixState(path)
+
+
+class StixBundleWriter:
+    """
+    Writes a STIX 2.1 bundle incrementally: header, one object at a time, footer. Output is
+    what str(stix2.Bundle(...)) produces for the same objects, so stix2.parse() reads it.
+    validate: "sample" (first object and every VALIDATE_SAMPLE_EVERY-th through stix2),
+    "all" (debug) or "none"; without stix2 installed validation is skipped. sha256 holds the
+    digest of the bundle file once it is closed.
+    """
+    def __init__(self, path: str, validate: Optional[str] = None, bundle_id: Optional[str] = None):
+        self.path = path
+        self.validate = (validate or os.getenv("NGBSE_STIX_VALIDATE", "sample")).lower()
+        self.bundle_id = bundle_id or "bundle--" + str(uuid.uuid4())
+        self.count = 0
+        self.validated = 0
+        self.sha256: Optional[str] = None
+        self._file = None
+        self._f = None
+
+    def __enter__(self):
+        self._file = HashingFile(self.path)
+        self._f = io.TextIOWrapper(self._file, encoding="utf-8")
+        self._f.write(json.dumps({"type": "bundle", "id": self.bundle_id})[:-1] + ', "objects": [')
+        return self
+
+    def _check(self, obj: Dict[str, Any]):
+        if not _STIX2 or self.validate == "none":
+            return
+        if self.validate == "all" or self.count % VALIDATE_SAMPLE_EVERY == 0:
+            stix2.parse(obj, allow_custom=False)
+            self.validated += 1
+
+    def write(self, obj: Dict[str, Any]):
+        self._check(obj)
+        if self.count:
+            self._f.write(", ")
+        self._f.write(json.dumps(obj))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._f.write("]}")
+        self._f.close()
+        self.sha256 = self._file.hexdigest()
+
+
+def export_stix(findings: Iterable[Dict[str, Any]], path: str, validate: Optional[str] = None,
+                state: Optional[StixState] = None, mode: str = "full", hashes: Optional[Dict[str, str]] = None) -> int:
+    """
+    Streams the run's indicators into a bundle at path; returns the number of objects. With a
+    StixState, indicators keep their first_seen as created/valid_from; mode "delta" emits only
+    new indicators plus a Sighting (first_seen, last_seen, count) for each re-observed one.
+    The bundle's SHA-256 is recorded in hashes (keyed by file name) when given.
+    """
+    if mode not in STIX_MODES:
+        raise ValueError(f"Unknown STIX mode: {mode}")
+    now = stix_timestamp(datetime.utcnow())
+    counts = {"new": 0, "sighted": 0}
+    it = iter(findings)
+    with StixBundleWriter(path, validate=validate) as w:
+        while True:
+            chunk = list(islice(it, _CHUNK))
+            if not chunk:
+                break
+            ids = [indicator_id(f) for f in chunk]
+            known = state.lookup(sorted(set(ids))) if state is not None else {}
+            emitted = set()
+            for f, ind_id in zip(chunk, ids):
+                prev = known.get(ind_id)
+                if ind_id in emitted or (prev is not None and prev[1] == now):
+                    continue  # duplicate within this run
+                emitted.add(ind_id)
+                if prev is None:
+                    counts["new"] += 1
+                    w.write(to_indicator(f, now, ind_id))
+                elif mode == "delta":
+                    counts["sighted"] += 1
+                    w.write(to_sighting(ind_id, prev[0], now, prev[2] + 1))
+                else:
+                    counts["sighted"] += 1
+                    w.write(to_indicator(f, prev[0], ind_id))
+            if state is not None:
+                state.observe(ids, now)
+    if state is not None:
+        state.commit()
+    if hashes is not None:
+        hashes[os.path.basename(path)] = w.sha256
+    LOGGER.info("export.stix", objects=w.count, validated=w.validated, mode=mode, **counts)
+    return w.count
@@ -1,6 +1,8 @@
 import os, json, math, glob
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..logger import LOGGER
+from .history_store import HistoryStore, EWMA_ALPHA, snapshot_paths, load_snapshot
+from .vector_forecast import forecast_matrix, matrix_to_forecast, holt_step, summarize, rising_assets, np, _NUMPY
 
 def ewma(values: List[float], alpha: float=0.4) -> float:
     if not values: return 0.0
@@ -9,26 +11,41 @@ def ewma(values: List[float], alpha: float=0.4) -> float:
         s = alpha*v + (1-alpha)*s
     return s
 
-def build_forecast(out_dir: str) -> Dict:
+def build_forecast(out_dir: str, history_dirs: Optional[List[str]] = None, store: Optional[HistoryStore] = None) -> Dict:
     """
-    Leest eerdere runs (out/history/*.asset_scores.json) en projecteert een korte-termijn trend per asset.
+    Projecteert een korte-termijn trend per asset (Holt: level + trend, met voorspelinterval en
+    change-point-vlag). Met een HistoryStore komt alles direct uit de opgeslagen toestand (O(assets));
+    anders worden eerdere runs (out/history/*.asset_scores.json) als assets x runs-matrix
+    gevectoriseerd doorgerekend (NumPy) of, zonder NumPy, per asset herhaald.
+    Extra history-mappen (bijv. van de bron-run bij rescore) worden op tijdstempel meegesorteerd.
     """
-    history_glob = os.path.join(out_dir, "history", "*.asset_scores.json")
-    series = {}
-    for path in sorted(glob.glob(history_glob)):
+    if store is not None:
+        forecast = store.forecast()
+        LOGGER.info("forecast.done", n_assets=len(forecast), source="store")
+        return forecast
+    dirs = list(history_dirs or []) + [os.path.join(out_dir, "history")]
+    runs: List[Dict[str, float]] = []
+    for path in snapshot_paths(dirs):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for asset, vals in data.items():
-                series.setdefault(asset, []).append(vals.get("avg_e_ai_star",0.0))
+            runs.append(load_snapshot(path)[0])
         except Exception:
             continue
-    forecast = {}
-    for asset, seq in series.items():
-        forecast[asset] = {
-            "last": seq[-1] if seq else 0.0,
-            "ewma": ewma(seq, alpha=0.5),
-            "projected_next": ewma(seq, alpha=0.5)  # simple persistence
-        }
-    LOGGER.info("forecast.done", n_assets=len(forecast))
+    assets = sorted({a for run in runs for a in run})
+    if _NUMPY:
+        idx = {a: i for i, a in enumerate(assets)}
+        Y = np.full((len(assets), len(runs)), np.nan)
+        for t, run in enumerate(runs):
+            for asset, v in run.items():
+                Y[idx[asset], t] = v
+        forecast = matrix_to_forecast(assets, forecast_matrix(Y, EWMA_ALPHA))
+    else:
+        state: Dict[str, List] = {}
+        for t, run in enumerate(runs):
+            for asset, v in run.items():
+                state[asset] = holt_step(state.get(asset), v, EWMA_ALPHA) + [t]
+        forecast = {}
+        for asset in assets:
+            n, last, e, level, trend, var, jump, t = state[asset]
+            forecast[asset] = summarize(last, e, level, trend, var, jump, n, len(runs) - 1 - t)
+    LOGGER.info("forecast.done", n_assets=len(forecast), vectorized=_NUMPY)
     return forecast
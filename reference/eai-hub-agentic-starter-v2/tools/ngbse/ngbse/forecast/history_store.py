@@ -0,0 +1,272 @@
+import os, glob, sqlite3, threading
+from typing import Dict, List, Optional, Iterable, Tuple
+from ..logger import LOGGER
+from ..jsonl_io import load_json
+from .vector_forecast import ALPHA, BETA, GAMMA, JUMP_K, MIN_JUMP, MIN_RUNS_FOR_JUMP, holt_step, summarize, forecast_matrix, np, _NUMPY
+
+EWMA_ALPHA = ALPHA
+DB_NAME = "history.db"
+SNAPSHOT_SUFFIX = ".asset_scores.json"
+ROLLUP_SUFFIX = SNAPSHOT_SUFFIX + ".gz"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, ts TEXT NOT NULL UNIQUE, n_assets INTEGER NOT NULL, period TEXT NOT NULL DEFAULT 'run'
+);
+CREATE TABLE IF NOT EXISTS assets (asset_id INTEGER PRIMARY KEY, asset TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS scores (
+    run_id INTEGER NOT NULL, asset_id INTEGER NOT NULL, avg REAL NOT NULL, n INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (asset_id, run_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    asset_id INTEGER PRIMARY KEY, n INTEGER NOT NULL, last REAL NOT NULL, ewma REAL NOT NULL, last_run INTEGER NOT NULL,
+    level REAL NOT NULL DEFAULT 0, trend REAL NOT NULL DEFAULT 0, var REAL NOT NULL DEFAULT 0, jump INTEGER NOT NULL DEFAULT 0
+);
+"""
+# columns added after the first release of the store: (table, column, declaration)
+_ADDED_COLUMNS = [("runs", "period", "TEXT NOT NULL DEFAULT 'run'"), ("scores", "n", "INTEGER NOT NULL DEFAULT 1")] + \
+    [("state", c, ("INTEGER" if c == "jump" else "REAL") + " NOT NULL DEFAULT 0") for c in ("level", "trend", "var", "jump")]
+
+# One Holt/EWMA step in SQL (same recursion as vector_forecast.holt_step); SET sees the old row.
+_ERR = "(?2 - (level + trend))"
+_UPSERT_STATE = (
+    "INSERT INTO state(asset_id, n, last, ewma, last_run, level, trend, var, jump) VALUES (?1, 1, ?2, ?2, ?3, ?2, 0, 0, 0) "
+    "ON CONFLICT(asset_id) DO UPDATE SET n = n + 1, last = ?2, ewma = ?4 * ?2 + (1 - ?4) * ewma, last_run = ?3, "
+    "level = ?4 * ?2 + (1 - ?4) * (level + trend), "
+    f"trend = {BETA!r} * (?4 * ?2 + (1 - ?4) * (level + trend) - level) + {1 - BETA!r} * trend, "
+    f"var = {1 - GAMMA!r} * var + {GAMMA!r} * {_ERR} * {_ERR}, "
+    f"jump = CASE WHEN n >= {MIN_RUNS_FOR_JUMP} AND abs({_ERR}) > {MIN_JUMP!r} "
+    f"AND {_ERR} * {_ERR} > {JUMP_K * JUMP_K!r} * var THEN 1 ELSE 0 END"
+)
+
+
+class HistoryStore:
+    """
+    Append-only run history in één SQLite-bestand (memory-mapped gelezen): per run een
+    kolom scores (asset_id, avg_e_ai_star) plus per asset de lopende Holt/EWMA-toestand
+    (level, trend, foutvariantie, sprongvlag). Een nieuwe run kost één O(assets)-update;
+    forecast() leest alleen de toestand.
+    """
+    def __init__(self, path: str, alpha: float = EWMA_ALPHA):
+        self.path = path
+        self.alpha = alpha
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.executescript(_SCHEMA)
+        added = []
+        for table, col, decl in _ADDED_COLUMNS:
+            if col not in {r[1] for r in self.conn.execute(f"PRAGMA table_info({table})")}:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+                added.append(table)
+        if "state" in added:
+            # store from before trend forecasting: replay the history once
+            with self.conn:
+                self._rebuild_state()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run_timestamps(self) -> List[str]:
+        return [r[0] for r in self.conn.execute("SELECT ts FROM runs ORDER BY ts")]
+
+    def runs(self) -> List[Tuple[str, str]]:
+        """[(ts, period)] oldest first; period is 'run' or the rollup granularity ('day', 'week')."""
+        return self.conn.execute("SELECT ts, period FROM runs ORDER BY ts").fetchall()
+
+    def _asset_ids(self, assets: Iterable[str]) -> Dict[str, int]:
+        assets = list(assets)
+        self.conn.executemany("INSERT OR IGNORE INTO assets(asset) VALUES (?)", ((a,) for a in assets))
+        ids: Dict[str, int] = {}
+        for i in range(0, len(assets), 500):
+            chunk = assets[i:i + 500]
+            q = "SELECT asset, asset_id FROM assets WHERE asset IN (%s)" % ",".join("?" * len(chunk))
+            ids.update(self.conn.execute(q, chunk).fetchall())
+        return ids
+
+    def append_run(self, ts: str, asset_scores: Dict[str, float], period: str = "run",
+                   weights: Optional[Dict[str, int]] = None) -> bool:
+        """
+        Adds one run ({asset: avg_e_ai_star}); idempotent per ts. Returns False when ts was already stored.
+        Rollups pass their period and the number of runs behind each asset's average as weights.
+        """
+        with self._lock, self.conn:
+            if self.conn.execute("SELECT 1 FROM runs WHERE ts = ?", (ts,)).fetchone():
+                return False
+            latest = self.conn.execute("SELECT MAX(ts) FROM runs").fetchone()[0]
+            run_id = self.conn.execute("INSERT INTO runs(ts, n_assets, period) VALUES (?, ?, ?)",
+                                       (ts, len(asset_scores), period)).lastrowid
+            ids = self._asset_ids(asset_scores)
+            weights = weights or {}
+            rows = [(run_id, ids[a], float(v), int(weights.get(a, 1))) for a, v in asset_scores.items()]
+            self.conn.executemany("INSERT INTO scores(run_id, asset_id, avg, n) VALUES (?, ?, ?, ?)", rows)
+            if latest is not None and ts < latest:
+                # out-of-order run (e.g. migrating several directories): replay the affected assets
+                self._rebuild_state([r[1] for r in rows])
+            else:
+                self.conn.executemany(_UPSERT_STATE, [(aid, v, run_id, self.alpha) for _, aid, v, _ in rows])
+        return True
+
+    def compact(self, groups: List[Tuple[str, List[str]]]) -> int:
+        """
+        Replaces each group of runs (period, [ts, ...]) by one rollup run at the group's latest ts, with
+        per asset the run-weighted mean score. Affected assets are replayed; returns the runs removed.
+        """
+        removed = 0
+        with self._lock, self.conn:
+            touched = set()
+            for period, members in groups:
+                ids = [r[0] for r in self.conn.execute(
+                    "SELECT run_id FROM runs WHERE ts IN (%s)" % ",".join("?" * len(members)), members)]
+                if not ids:
+                    continue
+                marks = ",".join("?" * len(ids))
+                rows = self.conn.execute(f"SELECT asset_id, SUM(avg * n) / SUM(n), SUM(n) FROM scores WHERE run_id IN ({marks}) "
+                                         f"GROUP BY asset_id", ids).fetchall()
+                self.conn.execute(f"DELETE FROM scores WHERE run_id IN ({marks})", ids)
+                self.conn.execute(f"DELETE FROM runs WHERE run_id IN ({marks})", ids)
+                run_id = self.conn.execute("INSERT INTO runs(ts, n_assets, period) VALUES (?, ?, ?)",
+                                           (max(members), len(rows), period)).lastrowid
+                self.conn.executemany("INSERT INTO scores(run_id, asset_id, avg, n) VALUES (?, ?, ?, ?)",
+                                      [(run_id, aid, v, n) for aid, v, n in rows])
+                touched.update(aid for aid, _, _ in rows)
+                removed += len(ids) - 1
+            if touched:
+                self._rebuild_state(sorted(touched))
+        return removed
+
+    def _rebuild_state(self, asset_ids: Optional[List[int]] = None):
+        where, args = "", []
+        if asset_ids is not None:
+            where = "WHERE s.asset_id IN (%s)" % ",".join("?" * len(asset_ids))
+            args = list(asset_ids)
+        runs = [rid for rid, in self.conn.execute("SELECT run_id FROM runs ORDER BY ts")]
+        cur = self.conn.execute(f"SELECT s.asset_id, s.avg, s.run_id FROM scores s JOIN runs r ON r.run_id = s.run_id {where} "
+                                f"ORDER BY s.asset_id, r.ts", args)
+        rows = []
+        if _NUMPY:
+            cells = cur.fetchall()
+            aids = sorted({c[0] for c in cells})
+            a_idx = {aid: i for i, aid in enumerate(aids)}
+            r_idx = {rid: i for i, rid in enumerate(runs)}
+            Y = np.full((len(aids), len(runs)), np.nan)
+            for aid, v, rid in cells:
+                Y[a_idx[aid], r_idx[rid]] = v
+            st = forecast_matrix(Y, self.alpha)
+            last_run = [runs[len(runs) - 1 - s] for s in st["stale"].tolist()]
+            cols = [st[k].tolist() for k in ("n", "last", "ewma", "level", "trend", "var", "jump")]
+            rows = [(aid, cols[0][i], cols[1][i], cols[2][i], last_run[i], cols[3][i], cols[4][i], cols[5][i], int(cols[6][i]))
+                    for i, aid in enumerate(aids)]
+        else:
+            state: Dict[int, List] = {}
+            for aid, v, run_id in cur:
+                state[aid] = holt_step(state.get(aid), v, self.alpha) + [run_id]
+            rows = [(aid, n, last, e, run_id, level, trend, var, jump)
+                    for aid, (n, last, e, level, trend, var, jump, run_id) in state.items()]
+        self.conn.executemany("INSERT OR REPLACE INTO state(asset_id, n, last, ewma, last_run, level, trend, var, jump) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def forecast(self) -> Dict[str, Dict]:
+        """{asset: {last, ewma, projected_next, trend, lower, upper, change_point, n_runs, stale_runs}} from the persisted state."""
+        runs = [rid for rid, in self.conn.execute("SELECT run_id FROM runs ORDER BY ts")]
+        later = {rid: len(runs) - 1 - i for i, rid in enumerate(runs)}
+        out = {}
+        for asset, n, last, e, run_id, level, trend, var, jump in self.conn.execute(
+                "SELECT a.asset, s.n, s.last, s.ewma, s.last_run, s.level, s.trend, s.var, s.jump FROM state s JOIN assets a USING(asset_id)"):
+            out[asset] = summarize(last, e, level, trend, var, jump, n, later.get(run_id, 0))
+        return out
+
+    def series(self) -> Tuple[List[str], List[str], List[Tuple[int, int, float]]]:
+        """(run timestamps, asset names, [(asset_idx, run_idx, avg)]) for matrix-based forecasting."""
+        runs = self.conn.execute("SELECT run_id, ts FROM runs ORDER BY ts").fetchall()
+        run_idx = {rid: i for i, (rid, _) in enumerate(runs)}
+        assets = self.conn.execute("SELECT asset_id, asset FROM assets ORDER BY asset_id").fetchall()
+        asset_idx = {aid: i for i, (aid, _) in enumerate(assets)}
+        cells = [(asset_idx[aid], run_idx[rid], v) for aid, rid, v in self.conn.execute("SELECT asset_id, run_id, avg FROM scores")]
+        return [ts for _, ts in runs], [a for _, a in assets], cells
+
+
+def snapshot_ts(path: str) -> str:
+    return os.path.basename(path).split(".", 1)[0]
+
+
+def snapshot_period(path: str) -> str:
+    """'run' for <ts>.asset_scores.json, else the rollup period of <ts>.<period>.asset_scores.json.gz."""
+    parts = os.path.basename(path).split(".")
+    return parts[1] if path.endswith(ROLLUP_SUFFIX) and len(parts) > 4 else "run"
+
+
+def snapshot_paths(dirs: Iterable[str]) -> List[str]:
+    """Raw snapshots and compressed rollups of all dirs, oldest first."""
+    paths = [p for d in dirs for suffix in (SNAPSHOT_SUFFIX, ROLLUP_SUFFIX) for p in glob.glob(os.path.join(d, "*" + suffix))]
+    return sorted(paths, key=os.path.basename)
+
+
+def load_snapshot(path: str) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """({asset: avg_e_ai_star}, {asset: runs behind that average}) from a snapshot or rollup."""
+    data = load_json(path)
+    return ({a: v.get("avg_e_ai_star", 0.0) for a, v in data.items()},
+            {a: int(v.get("n_runs", 1)) for a, v in data.items()})
+
+
+def migrate_json_history(store: HistoryStore, dirs: Iterable[str]) -> int:
+    """
+    Imports <dir>/*.asset_scores.json snapshots and compacted rollups (oldest first). Already stored
+    runs, and raw runs that fall inside an already stored rollup, are skipped.
+    """
+    from .retention import bucket_key
+    stored = store.runs()
+    known = {ts for ts, _ in stored}
+    rolled = {(period, bucket_key(ts, period)) for ts, period in stored if period != "run"}
+    added = 0
+    for path in snapshot_paths(dirs):
+        ts, period = snapshot_ts(path), snapshot_period(path)
+        if ts in known or (period == "run" and any((p, bucket_key(ts, p)) in rolled for p in ("day", "week"))):
+            continue
+        try:
+            scores, weights = load_snapshot(path)
+        except Exception as e:
+            LOGGER.warn("history.migrate_skipped", path=path, error=str(e))
+            continue
+        if store.append_run(ts, scores, period=period, weights=weights):
+            added += 1
+    if added:
+        LOGGER.info("history.migrated", runs=added, path=store.path)
+    return added
+
+
+def copy_sqlite(src: str, dst: str):
+    """Consistent copy of a (possibly WAL-mode) SQLite database via the backup API."""
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    source, target = sqlite3.connect(src), sqlite3.connect(dst)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def open_history_store(out_dir: str, history_dirs: Optional[List[str]] = None) -> HistoryStore:
+    """
+    Opens <out_dir>/history/history.db. A new store is seeded from an extra history dir's
+    history.db (e.g. the source run of a rescore) or else from the JSON snapshots found.
+    """
+    path = os.path.join(out_dir, "history", DB_NAME)
+    if not os.path.exists(path):
+        for d in history_dirs or []:
+            src = os.path.join(d, DB_NAME)
+            if os.path.exists(src):
+                copy_sqlite(src, path)
+                break
+    store = HistoryStore(path)
+    migrate_json_history(store, list(history_dirs or []) + [os.path.join(out_dir, "history")])
+    return store
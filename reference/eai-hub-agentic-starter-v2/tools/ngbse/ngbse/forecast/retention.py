@@ -0,0 +1,109 @@
+import os, datetime
+from typing import Dict, List, Optional, Tuple, Any
+from ..logger import LOGGER
+from ..jsonl_io import write_json
+from ..scoring.aggregate import AssetAggregator
+from .history_store import HistoryStore, DB_NAME, snapshot_paths, snapshot_ts, snapshot_period, load_snapshot
+
+RAW_DAYS = 7
+DAILY_DAYS = 90
+PERIODS = ("run", "day", "week")
+TS_FORMAT = "%Y%m%d%H%M%S"
+AGG_SUFFIX = ".asset_agg.json"
+
+
+def bucket_key(ts: str, period: str) -> str:
+    """Bucket of a run timestamp: the ts itself, its day (YYYYMMDD) or its ISO week (YYYY-Www)."""
+    if period == "day":
+        return ts[:8]
+    if period == "week":
+        year, week, _ = datetime.datetime.strptime(ts[:8], "%Y%m%d").isocalendar()
+        return f"{year}-W{week:02d}"
+    return ts
+
+
+def target_period(ts: str, now: datetime.datetime, raw_days: int = RAW_DAYS, daily_days: int = DAILY_DAYS) -> str:
+    age = now - datetime.datetime.strptime(ts[:14], TS_FORMAT)
+    if age <= datetime.timedelta(days=raw_days):
+        return "run"
+    return "day" if age <= datetime.timedelta(days=daily_days) else "week"
+
+
+def plan_compaction(entries: List[Tuple[str, str]], now: datetime.datetime, raw_days: int = RAW_DAYS,
+                    daily_days: int = DAILY_DAYS) -> List[Tuple[str, List[str]]]:
+    """
+    [(period, [ts, ...])] groups to merge, given [(ts, current period)]. Entries only get coarser;
+    an existing rollup of the same period and bucket joins its group, so repeated runs stay idempotent.
+    """
+    buckets: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    for ts, period in entries:
+        target = max(period, target_period(ts, now, raw_days, daily_days), key=PERIODS.index)
+        buckets.setdefault((target, bucket_key(ts, target)), []).append((ts, period))
+    groups = []
+    for (target, _), members in sorted(buckets.items(), key=lambda kv: max(ts for ts, _ in kv[1])):
+        if target == "run" or (len(members) == 1 and members[0][1] == target):
+            continue
+        groups.append((target, sorted(ts for ts, _ in members)))
+    return groups
+
+
+def _write_gz_json(path: str, obj: Any):
+    tmp = path + ".tmp"
+    write_json(tmp, obj, compression="gzip")
+    os.replace(tmp, path)
+
+
+def _rollup_scores(paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    sums: Dict[str, List[float]] = {}
+    for path in paths:
+        scores, weights = load_snapshot(path)
+        for asset, v in scores.items():
+            acc = sums.setdefault(asset, [0.0, 0])
+            acc[0] += v * weights[asset]
+            acc[1] += weights[asset]
+    return {a: {"avg_e_ai_star": s / n, "n_runs": n} for a, (s, n) in sums.items()}
+
+
+def _agg_path(history_dir: str, ts: str, period: str) -> str:
+    if period == "run":
+        return os.path.join(history_dir, ts + AGG_SUFFIX)
+    return os.path.join(history_dir, f"{ts}.{period}{AGG_SUFFIX}.gz")
+
+
+def compact_history(history_dir: str, now: Optional[datetime.datetime] = None, raw_days: int = RAW_DAYS,
+                    daily_days: int = DAILY_DAYS, store: Optional[HistoryStore] = None) -> Dict[str, int]:
+    """
+    Retention for <out>/history: runs younger than raw_days stay as they are, older runs become daily
+    rollups and after daily_days weekly ones. Snapshots (and the matching asset_agg aggregators) of a
+    bucket are rewritten to <latest ts>.<period>.asset_scores.json.gz / .asset_agg.json.gz; the
+    history store is compacted with the same plan. Forecasting reads the rollups like normal runs.
+    """
+    now = now or datetime.datetime.utcnow()
+    by_ts = {snapshot_ts(p): p for p in snapshot_paths([history_dir])}
+    groups = plan_compaction([(ts, snapshot_period(p)) for ts, p in by_ts.items()], now, raw_days, daily_days)
+    stats = {"groups": len(groups), "snapshots_removed": 0, "store_runs_removed": 0}
+    for period, members in groups:
+        ts = members[-1]
+        members_paths = [by_ts[m] for m in members]
+        target = os.path.join(history_dir, f"{ts}.{period}.asset_scores.json.gz")
+        _write_gz_json(target, _rollup_scores(members_paths))
+        agg_paths = [_agg_path(history_dir, m, snapshot_period(p)) for m, p in zip(members, members_paths)]
+        agg_paths = [p for p in agg_paths if os.path.exists(p)]
+        if agg_paths:
+            agg = AssetAggregator()
+            for p in agg_paths:
+                agg.merge(AssetAggregator.load(p))
+            _write_gz_json(_agg_path(history_dir, ts, period), agg.to_dict())
+        for p in members_paths + agg_paths:
+            if p != target and p != _agg_path(history_dir, ts, period):
+                os.remove(p)
+        stats["snapshots_removed"] += len(members) - 1
+    db_path = os.path.join(history_dir, DB_NAME)
+    if store is None and os.path.exists(db_path):
+        with HistoryStore(db_path) as own:
+            stats["store_runs_removed"] = own.compact(plan_compaction(own.runs(), now, raw_days, daily_days))
+    elif store is not None:
+        stats["store_runs_removed"] = store.compact(plan_compaction(store.runs(), now, raw_days, daily_days))
+    if groups or stats["store_runs_removed"]:
+        LOGGER.info("history.compacted", dir=history_dir, **stats)
+    return stats
@@ -0,0 +1,120 @@
+import math
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+    _NUMPY = True
+except Exception:
+    np = None
+    _NUMPY = False
+
+# Holt lineaire trend + EWMA-variantie; gedeeld door de history store (SQL), de scalaire
+# replay en de gevectoriseerde matrix-engine zodat alle drie exact dezelfde recursie volgen.
+ALPHA = 0.5       # level (en klassieke EWMA)
+BETA = 0.3        # trend
+GAMMA = 0.3       # EWMA van de kwadratische voorspelfout
+JUMP_K = 3.0      # change-point als |fout| > JUMP_K * sigma ...
+MIN_JUMP = 0.15   # ... en minstens deze absolute sprong
+MIN_RUNS_FOR_JUMP = 3
+Z = 1.96          # ~95% voorspelinterval
+
+
+def holt_step(st: Optional[List[float]], y: float, alpha: float = ALPHA) -> List[float]:
+    """One observation for one asset. State: [n, last, ewma, level, trend, var, jump] (trailing fields are ignored)."""
+    if st is None:
+        return [1, y, y, y, 0.0, 0.0, 0]
+    n, _, e, level, trend, var, _ = st[:7]
+    err = y - (level + trend)
+    new_level = alpha * y + (1 - alpha) * (level + trend)
+    jump = 1 if (n >= MIN_RUNS_FOR_JUMP and abs(err) > MIN_JUMP and err * err > JUMP_K * JUMP_K * var) else 0
+    return [n + 1, y, alpha * y + (1 - alpha) * e, new_level,
+            BETA * (new_level - level) + (1 - BETA) * trend, (1 - GAMMA) * var + GAMMA * err * err, jump]
+
+
+def summarize(last: float, e: float, level: float, trend: float, var: float, jump: int, n: int, stale: int = 0) -> Dict[str, Any]:
+    proj = min(1.0, max(0.0, level + trend))
+    half = Z * math.sqrt(max(0.0, var))
+    return {
+        "last": last,
+        "ewma": e,
+        "projected_next": proj,
+        "trend": trend,
+        "lower": max(0.0, proj - half),
+        "upper": min(1.0, proj + half),
+        "change_point": bool(jump),
+        "n_runs": int(n),
+        "stale_runs": int(stale),
+    }
+
+
+def forecast_matrix(Y, alpha: float = ALPHA) -> Dict[str, Any]:
+    """
+    Vectorised Holt/EWMA over an assets x runs matrix (NaN = asset absent in that run).
+    Loops over runs only; every step updates all assets at once. Ragged series are handled
+    per cell: assets start at their first observation and keep their state through gaps.
+    Returns state arrays: n, last, ewma, level, trend, var, jump, stale.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    A, T = Y.shape
+    n = np.zeros(A, dtype=np.int64)
+    last = np.zeros(A)
+    e = np.zeros(A)
+    level = np.zeros(A)
+    trend = np.zeros(A)
+    var = np.zeros(A)
+    jump = np.zeros(A, dtype=bool)
+    last_seen = np.full(A, -1, dtype=np.int64)
+    for t in range(T):
+        y = Y[:, t]
+        obs = ~np.isnan(y)
+        if not obs.any():
+            continue
+        first = obs & (n == 0)
+        upd = obs & (n > 0)
+        if upd.any():
+            yu = y[upd]
+            lv, tr = level[upd], trend[upd]
+            err = yu - (lv + tr)
+            new_level = alpha * yu + (1 - alpha) * (lv + tr)
+            jump[upd] = (n[upd] >= MIN_RUNS_FOR_JUMP) & (np.abs(err) > MIN_JUMP) & (err * err > JUMP_K * JUMP_K * var[upd])
+            trend[upd] = BETA * (new_level - lv) + (1 - BETA) * tr
+            level[upd] = new_level
+            var[upd] = (1 - GAMMA) * var[upd] + GAMMA * err * err
+            e[upd] = alpha * yu + (1 - alpha) * e[upd]
+        if first.any():
+            yf = y[first]
+            level[first] = yf
+            e[first] = yf
+            trend[first] = 0.0
+            var[first] = 0.0
+            jump[first] = False
+        last[obs] = y[obs]
+        n[obs] += 1
+        last_seen[obs] = t
+    stale = np.where(last_seen >= 0, T - 1 - last_seen, 0)
+    return {"n": n, "last": last, "ewma": e, "level": level, "trend": trend, "var": var, "jump": jump, "stale": stale}
+
+
+def matrix_to_forecast(assets: List[str], st: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Per-asset dicts (same keys as summarize) from forecast_matrix output; assets never observed are skipped."""
+    proj = np.clip(st["level"] + st["trend"], 0.0, 1.0)
+    half = Z * np.sqrt(np.maximum(st["var"], 0.0))
+    lower = np.maximum(proj - half, 0.0)
+    upper = np.minimum(proj + half, 1.0)
+    cols = [st["last"].tolist(), st["ewma"].tolist(), proj.tolist(), st["trend"].tolist(), lower.tolist(), upper.tolist(),
+            st["jump"].tolist(), st["n"].tolist(), st["stale"].tolist()]
+    out = {}
+    for i, asset in enumerate(assets):
+        if cols[7][i] == 0:
+            continue
+        out[asset] = {"last": cols[0][i], "ewma": cols[1][i], "projected_next": cols[2][i], "trend": cols[3][i],
+                      "lower": cols[4][i], "upper": cols[5][i], "change_point": bool(cols[6][i]),
+                      "n_runs": int(cols[7][i]), "stale_runs": int(cols[8][i])}
+    return out
+
+
+def rising_assets(forecast: Dict[str, Dict[str, Any]], n: int = 10) -> List[Dict[str, Any]]:
+    """Assets with the strongest positive trend (current ones first), for the report."""
+    rows = [{"asset": a, **v} for a, v in forecast.items() if v.get("trend", 0.0) > 0 and not v.get("stale_runs")]
+    rows.sort(key=lambda r: (r["trend"], r["projected_next"]), reverse=True)
+    return rows[:n]
@@ -0,0 +1,228 @@
+import os, json, time, threading, socketserver
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from .llm_client import LLMClient
+from .llm_cache import cache_key
+from .logger import LOGGER
+from .synth.prompt_builder import estimate_tokens
+
+# model_hint prefix -> provider that should be tried first
+_HINT_PROVIDERS = (("gpt", "openai"), ("o1", "openai"), ("o3", "openai"), ("azure", "azure_openai"),
+                   ("claude", "anthropic"), ("gemini", "google"))
+# accepted ranges for the sampling fields of a request
+MAX_TOKENS_RANGE = (1, 32768)
+TEMPERATURE_RANGE = (0.0, 2.0)
+
+
+class GatewayError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RateLimiter:
+    """Token bucket: rate requests per second with a burst of `burst`; acquire() blocks until a token is free."""
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class GatewayService:
+    """
+    BYOL LLM gateway (docs/LLM_GATEWAY_SPEC.md) on top of one shared LLMClient, so all
+    connected pipeline workers share its connection pools, response cache, circuit breakers
+    and metrics. Identical concurrent requests are coalesced into one upstream call
+    (singleflight); a global semaphore and optional token bucket bound upstream load.
+    """
+    def __init__(self, client: LLMClient, max_concurrency: int = 8, rate_per_sec: Optional[float] = None):
+        self.client = client
+        self._sem = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._rate = RateLimiter(rate_per_sec) if rate_per_sec else None
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "coalesced": 0, "dispatched": 0, "errors": 0}
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    @staticmethod
+    def _split_messages(messages: Any) -> Tuple[str, str]:
+        if not isinstance(messages, list) or not messages:
+            raise GatewayError(400, "messages must be a non-empty list")
+        system, convo = [], []
+        for m in messages:
+            if not isinstance(m, dict) or m.get("role") not in ("system", "user", "assistant") or not isinstance(m.get("content"), str):
+                raise GatewayError(400, "each message needs role system|user|assistant and string content")
+            (system if m["role"] == "system" else convo).append(m)
+        user = convo[-1]["content"] if len(convo) == 1 and convo[0]["role"] == "user" else \
+            "\n\n".join(f"{m['role']}: {m['content']}" for m in convo)
+        return "\n\n".join(m["content"] for m in system), user
+
+    @staticmethod
+    def _number(request: Dict[str, Any], field: str, default, bounds: Tuple[float, float], integer: bool = False):
+        """request[field] (default when absent or null), checked to be a number within bounds."""
+        value = request.get(field)
+        if value is None:
+            return default
+        lo, hi = bounds
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not lo <= value <= hi \
+                or (integer and value != int(value)):
+            kind = "an integer" if integer else "a number"
+            raise GatewayError(400, f"{field} must be {kind} between {lo} and {hi}")
+        return int(value) if integer else float(value)
+
+    def _providers(self, model_hint: Optional[str]) -> List[str]:
+        providers = list(self.client.providers)
+        hint = (model_hint or "").lower()
+        for prefix, provider in _HINT_PROVIDERS:
+            if hint.startswith(prefix) and provider in providers:
+                providers.remove(provider)
+                return [provider] + providers
+        return providers
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """One spec request -> spec response ({message, usage, provider_meta})."""
+        self._count("requests")
+        t0 = time.perf_counter()
+        system, user = self._split_messages(request.get("messages"))
+        max_tokens = self._number(request, "max_tokens", 800, MAX_TOKENS_RANGE, integer=True)
+        temperature = self._number(request, "temperature", 0.2, TEMPERATURE_RANGE)
+        providers = self._providers(request.get("model_hint"))
+        key = cache_key(",".join(providers), "", system, user, temperature, max_tokens)
+
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if leader:
+            try:
+                if self._rate:
+                    self._rate.acquire()
+                with self._sem:
+                    self._count("dispatched")
+                    meta = self.client.call_meta(system, user, max_tokens, temperature, providers=providers)
+                fut.set_result(meta)
+            except Exception as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        else:
+            self._count("coalesced")
+        meta = fut.result()
+        latency = time.perf_counter() - t0
+        if not meta.get("text"):
+            self._count("errors")
+            raise GatewayError(502, "no provider returned a response")
+        LOGGER.info("gateway.request", card_id=request.get("card_id"), ssot_version=request.get("ssot_version"),
+                    adapter=meta.get("provider"), model_hint=request.get("model_hint"), latency=round(latency, 4),
+                    cached=meta.get("cached"), coalesced=not leader)
+        return {
+            "message": {"role": "assistant", "content": meta["text"]},
+            "usage": {"prompt_tokens_est": estimate_tokens(system) + estimate_tokens(user),
+                      "completion_tokens_est": estimate_tokens(meta["text"])},
+            "provider_meta": {"provider": meta.get("provider"), "model": meta.get("model"), "latency": round(latency, 4),
+                              "cached": bool(meta.get("cached")), "coalesced": not leader},
+        }
+
+    def handle_openai(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """OpenAI chat/completions shape, so OPENAI_BASE_URL can point at the gateway as well."""
+        out = self.handle({**request, "model_hint": request.get("model")})
+        usage = out["usage"]
+        return {
+            "object": "chat.completion",
+            "model": out["provider_meta"].get("model"),
+            "choices": [{"index": 0, "message": out["message"], "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": usage["prompt_tokens_est"], "completion_tokens": usage["completion_tokens_est"],
+                      "total_tokens": usage["prompt_tokens_est"] + usage["completion_tokens_est"]},
+        }
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        cache = self.client.cache.stats() if self.client.cache is not None else None
+        breakers = {p: b.state for p, b in self.client.breakers.items()}
+        return {"status": "ok", **stats, "cache": cache, "breakers": breakers}
+
+
+def _make_handler(service: GatewayService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/health":
+                self._send(200, service.health())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            routes = {"/v1/gateway": service.handle, "/v1/chat/completions": service.handle_openai}
+            fn = routes.get(self.path.split("?")[0].rstrip("/"))
+            if fn is None:
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            except ValueError:
+                self._send(400, {"error": "invalid JSON"})
+                return
+            try:
+                if not isinstance(request, dict):
+                    raise GatewayError(400, "request body must be a JSON object")
+                self._send(200, fn(request))
+            except GatewayError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception as e:
+                LOGGER.error("gateway.failed", error=str(e))
+                self._send(500, {"error": "internal error"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _UnixGatewayServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conn, _ = super().get_request()
+        return conn, ("unix", 0)
+
+
+def make_server(service: GatewayService, host: str = "127.0.0.1", port: int = 8787, unix_socket: Optional[str] = None):
+    """HTTP server (or HTTP over a Unix socket) for the service; call serve_forever() on it."""
+    handler = _make_handler(service)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return _UnixGatewayServer(unix_socket, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,257 @@
+import io, os, gzip, json, math, mmap
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from .utils import HashingFile, IO_BUFFER
+
+try:
+    import orjson
+    _ORJSON = True
+except Exception:
+    orjson = None
+    _ORJSON = False
+
+try:
+    import msgspec
+    _MSGSPEC = True
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+except Exception:
+    msgspec = None
+    _MSGSPEC = False
+
+try:
+    import zstandard
+    _ZSTD = True
+except Exception:
+    zstandard = None
+    _ZSTD = False
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+LINES_PER_WRITE = 4096
+PARALLEL_MIN_BYTES = 64 << 20   # smaller files are parsed in-process
+PARALLEL_CHUNK_BYTES = 16 << 20
+
+
+def compression_of(path: str) -> Optional[str]:
+    """'gzip' for .gz, 'zstd' for .zst/.zstd, None otherwise."""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith((".zst", ".zstd")):
+        return "zstd"
+    return None
+
+
+def _need_zstd():
+    if not _ZSTD:
+        raise RuntimeError("zstandard is required for .zst files (pip install zstandard)")
+
+
+def loads(data) -> Any:
+    """orjson or msgspec when installed; falls back to json for input they reject (e.g. NaN)."""
+    if _ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    elif _MSGSPEC:
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError:
+            pass
+    return json.loads(data)
+
+
+def _non_finite(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_non_finite(v) for v in obj)
+    return False
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """
+    UTF-8 JSON without a trailing newline; json.dumps for what the fast encoders cannot serialise.
+    The fast encoders write NaN/Infinity as null, so output containing null is checked and such
+    objects go through json.dumps too (NaN/Infinity tokens, which loads reads back).
+    """
+    data = None
+    if _ORJSON and indent in (None, 2):
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0))
+        except TypeError:
+            pass
+    elif _MSGSPEC and indent is None:
+        try:
+            data = _msgspec_encoder.encode(obj)
+        except (TypeError, ValueError):
+            pass
+    if data is not None and not (b"null" in data and _non_finite(obj)):
+        return data
+    return json.dumps(obj, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def open_read(path: str):
+    """Binary reader with a large buffer, decompressing by extension."""
+    comp = compression_of(path)
+    if comp == "zstd":
+        _need_zstd()
+        raw = open(path, "rb")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), IO_BUFFER)
+    raw = open(path, "rb", buffering=IO_BUFFER)
+    return gzip.GzipFile(fileobj=raw, mode="rb") if comp == "gzip" else raw
+
+
+class CompressedWriter:
+    """
+    Binary writer that compresses by extension (.gz, .zst) and hashes the bytes that reach the
+    file; sha256 holds the digest once closed.
+    """
+    def __init__(self, path: str, compression: Optional[str] = None):
+        self.path = path
+        self.compression = compression if compression is not None else compression_of(path)
+        self.sha256: Optional[str] = None
+        self._file = HashingFile(path)
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._file, mode="wb", compresslevel=GZIP_LEVEL)
+        elif self.compression == "zstd":
+            _need_zstd()
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._file, closefd=False)
+        else:
+            self._stream = self._file
+
+    def write(self, data: bytes) -> int:
+        return self._stream.write(data)
+
+    def close(self):
+        if self.sha256 is not None:
+            return
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+        self.sha256 = self._file.hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlWriter:
+    """Writes rows as JSON lines in blocks of LINES_PER_WRITE; count and sha256 are set when closed."""
+    def __init__(self, path: str, compression: Optional[str] = None):
+        self.path = path
+        self.count = 0
+        self.sha256: Optional[str] = None
+        self._out = CompressedWriter(path, compression)
+        self._block: List[bytes] = []
+
+    def write(self, row: Any):
+        self._block.append(dumps(row))
+        self.count += 1
+        if len(self._block) >= LINES_PER_WRITE:
+            self._flush()
+
+    def write_many(self, rows: Iterable[Any]):
+        for row in rows:
+            self.write(row)
+
+    def _flush(self):
+        if self._block:
+            self._block.append(b"")
+            self._out.write(b"\n".join(self._block))
+            self._block = []
+
+    def close(self):
+        if self.sha256 is None:
+            self._flush()
+            self._out.close()
+            self.sha256 = self._out.sha256
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_jsonl(path: str, rows: Iterable[Any], compression: Optional[str] = None) -> str:
+    """Writes rows (any iterable) to path; returns the file's SHA-256, computed while writing."""
+    with JsonlWriter(path, compression) as w:
+        w.write_many(rows)
+    return w.sha256
+
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """Rows of a (compressed) JSONL file, one at a time; blank lines are skipped."""
+    with open_read(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield loads(line)
+
+
+def _parse_range(args: Tuple[str, int, int]) -> List[Any]:
+    path, start, end = args
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [loads(line) for line in mm[start:end].split(b"\n") if line.strip()]
+
+
+def chunk_ranges(path: str, chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Byte ranges of about chunk_bytes that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    ranges, start = [], 0
+    if not size:
+        return ranges
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < size:
+            nl = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if nl < 0 else nl + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def iter_jsonl_parallel(path: str, workers: Optional[int] = None,
+                        chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Iterator[Any]:
+    """
+    Rows of an uncompressed JSONL file parsed by worker processes, one mmap'ed chunk each, in file
+    order. At most 2 * workers chunks are in flight, so memory stays bounded.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = deque(chunk_ranges(path, chunk_bytes))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while ranges or pending:
+            while ranges and len(pending) < 2 * workers:
+                start, end = ranges.popleft()
+                pending.append(pool.submit(_parse_range, (path, start, end)))
+            yield from pending.popleft().result()
+
+
+def load_jsonl(path: str, workers: Optional[int] = None) -> List[Any]:
+    """
+    All rows of a JSONL file (.gz/.zst transparently). Uncompressed files of at least
+    PARALLEL_MIN_BYTES are parsed by worker processes (workers, default cpu_count; 1 = in-process).
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers > 1 and compression_of(path) is None and os.path.getsize(path) >= PARALLEL_MIN_BYTES:
+        return list(iter_jsonl_parallel(path, workers))
+    return list(iter_jsonl(path))
+
+
+def load_json(path: str) -> Any:
+    with open_read(path) as f:
+        return loads(f.read())
+
+
+def write_json(path: str, obj: Any, indent: Optional[int] = None, compression: Optional[str] = None) -> str:
+    """One JSON document, compressed by extension (or compression); returns the file's SHA-256."""
+    with CompressedWriter(path, compression) as f:
+        f.write(dumps(obj, indent))
+    return f.sha256
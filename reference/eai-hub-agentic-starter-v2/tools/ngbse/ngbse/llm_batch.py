@@ -0,0 +1,181 @@
+import os, json, time, uuid, shutil
+from typing import List, Dict, Any, Optional, Callable
+import requests
+from .logger import LOGGER
+from .jsonl_io import write_jsonl, iter_jsonl
+
+BATCH_FILE = "llm_batch.jsonl"
+JOB_FILE = "llm_batch.job.json"
+
+
+def batch_request(custom_id: str, system_prompt: str, user_prompt: str, max_tokens: int, temperature: float,
+                  model: Optional[str] = None) -> Dict[str, Any]:
+    """One line of an OpenAI batch input file (/v1/chat/completions)."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model or os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        },
+    }
+
+
+def write_batch(path: str, batch_requests: List[Dict[str, Any]]) -> str:
+    write_jsonl(path, batch_requests)
+    return path
+
+
+def parse_results(path: str) -> Dict[str, Optional[str]]:
+    """custom_id -> assistant text (None for failed lines) from an OpenAI batch output file."""
+    out: Dict[str, Optional[str]] = {}
+    for row in iter_jsonl(path):
+        resp = row.get("response") or {}
+        text = None
+        if resp.get("status_code") == 200 and not row.get("error"):
+            try:
+                text = resp["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                text = None
+        out[row.get("custom_id")] = text
+    return out
+
+
+class LocalFileBatchAdapter:
+    """
+    File-based stand-in for a batch API: submit() drops the input in <dir>/inbox/<job>.jsonl,
+    a worker (process_pending) writes <dir>/outbox/<job>.jsonl in the OpenAI output format,
+    fetch() returns that file once it exists.
+    """
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "inbox"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "outbox"), exist_ok=True)
+
+    def submit(self, batch_path: str) -> Dict[str, Any]:
+        job_id = "batch_" + uuid.uuid4().hex[:16]
+        shutil.copyfile(batch_path, os.path.join(self.directory, "inbox", job_id + ".jsonl"))
+        return {"adapter": self.name, "id": job_id, "directory": self.directory}
+
+    def fetch(self, job: Dict[str, Any], out_path: str) -> Optional[str]:
+        src = os.path.join(self.directory, "outbox", job["id"] + ".jsonl")
+        if not os.path.exists(src):
+            return None
+        shutil.copyfile(src, out_path)
+        return out_path
+
+    def process_pending(self, responder: Callable[[str, str, int, float], Optional[str]]) -> int:
+        """Answers every inbox job with responder(system, user, max_tokens, temperature); returns jobs done."""
+        done = 0
+        inbox = os.path.join(self.directory, "inbox")
+        for name in sorted(os.listdir(inbox)):
+            if not name.endswith(".jsonl"):
+                continue
+            rows = []
+            for req in iter_jsonl(os.path.join(inbox, name)):
+                msgs = req["body"]["messages"]
+                system = "\n\n".join(m["content"] for m in msgs if m["role"] == "system")
+                user = "\n\n".join(m["content"] for m in msgs if m["role"] != "system")
+                text = responder(system, user, req["body"].get("max_tokens", 800), req["body"].get("temperature", 0.2))
+                if text:
+                    resp = {"status_code": 200, "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}}]}}
+                    rows.append({"id": "req_" + uuid.uuid4().hex[:12], "custom_id": req["custom_id"], "response": resp, "error": None})
+                else:
+                    rows.append({"id": "req_" + uuid.uuid4().hex[:12], "custom_id": req["custom_id"], "response": None,
+                                 "error": {"message": "no response"}})
+            tmp = os.path.join(self.directory, "outbox", name + ".tmp")
+            write_batch(tmp, rows)
+            os.replace(tmp, os.path.join(self.directory, "outbox", name))
+            os.remove(os.path.join(inbox, name))
+            done += 1
+        return done
+
+
+class OpenAIBatchAdapter:
+    """OpenAI Batch API: upload the input file, create a 24h batch, download the output file when completed."""
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, timeout: float = 60.0):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")).rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _headers(self) -> Dict[str, str]:
+        if not self.api_key:
+            raise RuntimeError("OPENAI_API_KEY is required for batch submission")
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def submit(self, batch_path: str) -> Dict[str, Any]:
+        with open(batch_path, "rb") as f:
+            r = self.session.post(f"{self.base_url}/files", headers=self._headers(), data={"purpose": "batch"},
+                                  files={"file": (os.path.basename(batch_path), f)}, timeout=self.timeout)
+        r.raise_for_status()
+        file_id = r.json()["id"]
+        r = self.session.post(f"{self.base_url}/batches", headers={**self._headers(), "Content-Type": "application/json"},
+                              data=json.dumps({"input_file_id": file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"}),
+                              timeout=self.timeout)
+        r.raise_for_status()
+        return {"adapter": self.name, "id": r.json()["id"], "input_file_id": file_id}
+
+    def fetch(self, job: Dict[str, Any], out_path: str) -> Optional[str]:
+        r = self.session.get(f"{self.base_url}/batches/{job['id']}", headers=self._headers(), timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()
+        if data.get("status") in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"batch {job['id']} {data.get('status')}")
+        if data.get("status") != "completed" or not data.get("output_file_id"):
+            return None
+        r = self.session.get(f"{self.base_url}/files/{data['output_file_id']}/content", headers=self._headers(), timeout=self.timeout)
+        r.raise_for_status()
+        with open(out_path, "wb") as f:
+            f.write(r.content)
+        return out_path
+
+
+def make_adapter(name: str, directory: Optional[str] = None):
+    if name == "openai":
+        return OpenAIBatchAdapter()
+    if name == "local":
+        return LocalFileBatchAdapter(directory or ".ngbse_cache/batch")
+    raise ValueError(f"Unknown batch adapter: {name}")
+
+
+def submit_batch(out_dir: str, batch_requests: List[Dict[str, Any]], adapter_name: str = "local",
+                 directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Writes <out_dir>/llm_batch.jsonl, submits it and records the job in <out_dir>/llm_batch.job.json."""
+    if not batch_requests:
+        return None
+    path = write_batch(os.path.join(out_dir, BATCH_FILE), batch_requests)
+    try:
+        job = make_adapter(adapter_name, directory).submit(path)
+    except Exception as e:
+        LOGGER.warn("llm.batch.submit_failed", adapter=adapter_name, error=str(e))
+        job = {"adapter": adapter_name, "id": None, "error": str(e)}
+    job.update({"submitted": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "n_requests": len(batch_requests)})
+    with open(os.path.join(out_dir, JOB_FILE), "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    LOGGER.info("llm.batch.submitted", adapter=adapter_name, id=job.get("id"), n=len(batch_requests))
+    return job
+
+
+def collect_batch(out_dir: str, wait_seconds: float = 0.0, poll_seconds: float = 10.0) -> Optional[Dict[str, Optional[str]]]:
+    """Fetches the results of the run's batch job; None while not finished (after waiting up to wait_seconds)."""
+    with open(os.path.join(out_dir, JOB_FILE), "r", encoding="utf-8") as f:
+        job = json.load(f)
+    if not job.get("id"):
+        raise RuntimeError(f"batch was not submitted: {job.get('error')}")
+    adapter = make_adapter(job["adapter"], job.get("directory"))
+    out_path = os.path.join(out_dir, "llm_batch.results.jsonl")
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        if adapter.fetch(job, out_path):
+            return parse_results(out_path)
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll_seconds)
@@ -0,0 +1,97 @@
+import os, json, time, hashlib, threading
+from typing import Optional, Dict, Any, Tuple
+from .logger import LOGGER
+
+
+def cache_key(provider: str, model: str, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int) -> str:
+    """Content address of one request: sha256 over everything that can change the answer."""
+    blob = json.dumps([provider, model, system_prompt, user_prompt, float(temperature), int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Disk cache for LLM responses, one JSON file per key (<dir>/<key[:2]>/<key>.json).
+    Entries older than ttl_seconds count as misses and are removed; when the total size
+    exceeds max_bytes the least recently used entries are evicted. Safe to share
+    between threads; hit/miss/store/eviction counters are available via stats().
+    """
+    def __init__(self, directory: str, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[float, int]] = {}  # key -> (last used, size)
+        self._bytes = 0
+        self.hits = self.misses = self.stores = self.evictions = self.expired = 0
+        os.makedirs(directory, exist_ok=True)
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".json"):
+                    st = os.stat(os.path.join(root, name))
+                    self._index[name[:-5]] = (st.st_mtime, st.st_size)
+                    self._bytes += st.st_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _drop(self, key: str):
+        _, size = self._index.pop(key, (0.0, 0))
+        self._bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except Exception:
+                self._drop(key)
+                self.misses += 1
+                return None
+            if self.ttl_seconds and time.time() - entry.get("created", 0) > self.ttl_seconds:
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._index[key] = (time.time(), self._index[key][1])
+            self.hits += 1
+            return entry.get("text")
+
+    def put(self, key: str, text: str, **meta: Any):
+        data = json.dumps({"created": time.time(), "text": text, **meta}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._bytes -= self._index.get(key, (0.0, 0))[1]
+            self._index[key] = (time.time(), len(data))
+            self._bytes += len(data)
+            self.stores += 1
+            if self._bytes > self.max_bytes:
+                for old in sorted(self._index, key=lambda k: self._index[k][0]):
+                    if self._bytes <= self.max_bytes or old == key:
+                        break
+                    self._drop(old)
+                    self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "stores": self.stores, "evictions": self.evictions, "expired": self.expired,
+                "entries": len(self._index), "bytes": self._bytes,
+            }
+
+    def log_stats(self):
+        LOGGER.info("llm.cache", **self.stats())
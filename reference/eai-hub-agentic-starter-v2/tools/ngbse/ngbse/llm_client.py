@@ -1,83 +1,384 @@
-import os, json, requests
-from typing import Optional, Dict, Any
+import os, re, json, time, random, threading, requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
+from requests.adapters import HTTPAdapter
+from .llm_cache import LLMCache, cache_key
+from .logger import LOGGER
+from .synth.prompt_builder import estimate_tokens
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    def __init__(self, provider: str, message: str, retryable: bool = False):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.retryable = retryable
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failures; after `cooldown` seconds one trial call is let through."""
+    def __init__(self, failures: int = 3, cooldown: float = 30.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._count = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            st = self.state
+            if st == "closed":
+                return True
+            if st == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self._count = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._count += 1
+            self._trial = False
+            if self._opened_at is not None or self._count >= self.failures:
+                self._opened_at = time.monotonic()
+
+
+def _stream_lines(r: requests.Response) -> Iterator[bytes]:
+    """
+    Lines of a streamed response as they arrive: each read returns whatever the socket delivered
+    (at most 64 KiB), so a line is available as soon as its newline is in. iter_lines(chunk_size=None)
+    would wait for the whole body unless the response is chunked. Falls back to byte-wise iter_lines
+    on urllib3 < 2, which has no read1.
+    """
+    read1 = getattr(r.raw, "read1", None)
+    if read1 is None:
+        yield from r.iter_lines(chunk_size=1, decode_unicode=False)
+        return
+    buf = b""
+    while True:
+        chunk = read1(65536, decode_content=True)
+        if not chunk:
+            break
+        *lines, buf = (buf + chunk).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buf:
+        yield buf.rstrip(b"\r")
 
 class LLMClient:
     """
     Eenvoudige HTTP-clients voor drie providers.
     Als geen geldige API-keys aanwezig zijn, retourneert call() None.
+    Met een LLMCache worden antwoorden per (provider, model, prompts, temperature,
+    max_tokens) bewaard en bij een identieke aanvraag direct teruggegeven.
+    Per provider: een gepoolde requests.Session, begrensde retries met jitter bij
+    429/5xx/netwerkfouten, een circuit breaker en latency/fouttellers (log_metrics).
+    Met hedge_after (seconden) start de volgende provider als de vorige dan nog
+    niet heeft geantwoord; het eerste bruikbare antwoord wint.
+    Met stream=True lopen aanroepen via SSE (stream()), met vroege afkap via stop_when.
     """
-    def __init__(self, provider_priority):
+    def __init__(self, provider_priority, cache: Optional[LLMCache] = None, timeout: float = 60.0,
+                 max_retries: int = 2, backoff: float = 0.5, hedge_after: Optional[float] = None,
+                 breaker_failures: int = 3, breaker_cooldown: float = 30.0, pool_size: int = 8, stream: bool = False):
         self.providers = provider_priority
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.pool_size = pool_size
+        self.stream_mode = stream
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self.breakers: Dict[str, CircuitBreaker] = {p: CircuitBreaker(breaker_failures, breaker_cooldown) for p in provider_priority}
+        self.metrics: Dict[str, Dict[str, Any]] = {}
 
-    def call(self, system_prompt: str, user_prompt: str, max_tokens=800, temperature=0.2) -> Optional[str]:
-        for p in self.providers:
-            fn = getattr(self, f"_call_{p}", None)
-            if fn:
-                out = fn(system_prompt, user_prompt, max_tokens, temperature)
-                if out:
-                    return out
+    def _session(self, provider: str) -> requests.Session:
+        with self._lock:
+            s = self._sessions.get(provider)
+            if s is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                self._sessions[provider] = s
+            return s
+
+    def _record(self, provider: str, **inc):
+        with self._lock:
+            m = self.metrics.setdefault(provider, {"calls": 0, "ok": 0, "errors": 0, "retries": 0, "short_circuited": 0,
+                                                   "latency_total": 0.0, "latency_max": 0.0,
+                                                   "streams": 0, "ttft_total": 0.0, "tokens": 0, "gen_seconds": 0.0})
+            latency = inc.pop("latency", None)
+            if latency is not None:
+                m["latency_total"] += latency
+                m["latency_max"] = max(m["latency_max"], latency)
+            for k, v in inc.items():
+                m[k] += v
+
+    def _send(self, provider: str, breaker: CircuitBreaker, url: str, headers: Dict[str, str], body: str,
+              stream: bool = False) -> Tuple[requests.Response, float]:
+        """
+        POST with the pooled session; retries 429/5xx and connection errors with jittered backoff
+        (at least Retry-After), at most max_retries times and only while the breaker allows it.
+        Returns the first non-error response and when that attempt started; recording the breaker
+        outcome is up to the caller.
+        """
+        session = self._session(provider)
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            retry_after = None
+            try:
+                r = session.post(url, headers=headers, data=body, stream=stream,
+                                 timeout=(min(10.0, self.timeout), self.timeout))
+                if r.status_code >= 400:
+                    r.close()
+                    if r.status_code in RETRY_STATUS:
+                        retry_after = r.headers.get("Retry-After")
+                        raise ProviderError(provider, f"HTTP {r.status_code}", retryable=True)
+                    raise ProviderError(provider, f"HTTP {r.status_code}")
+                return r, t0
+            except (requests.RequestException, ProviderError) as e:
+                retryable = not isinstance(e, ProviderError) or e.retryable
+                self._record(provider, calls=1, errors=1, latency=time.perf_counter() - t0)
+                if not retryable or attempt >= self.max_retries or not breaker.allow():
+                    raise
+                try:
+                    delay = min(30.0, float(retry_after)) if retry_after else 0.0
+                except ValueError:
+                    delay = 0.0
+                delay = max(delay, self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+                attempt += 1
+                self._record(provider, retries=1)
+                time.sleep(delay)
+
+    def _post(self, provider: str, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST with retries and circuit breaking (_send); returns JSON. Every call ends in exactly one
+        breaker.success() or breaker.failure(), so a half-open trial is always released (also on
+        4xx or an unparseable body).
+        """
+        breaker = self.breakers.setdefault(provider, CircuitBreaker())
+        if not breaker.allow():
+            self._record(provider, short_circuited=1)
+            raise ProviderError(provider, "circuit open")
+        ok = False
+        try:
+            r, t0 = self._send(provider, breaker, url, headers, json.dumps(payload))
+            try:
+                data = r.json()
+            except ValueError:
+                self._record(provider, calls=1, errors=1, latency=time.perf_counter() - t0)
+                raise ProviderError(provider, "invalid JSON response")
+            self._record(provider, calls=1, ok=1, latency=time.perf_counter() - t0)
+            ok = True
+            return data
+        finally:
+            if ok:
+                breaker.success()
+            else:
+                breaker.failure()
+
+    def log_metrics(self):
+        with self._lock:
+            snapshot = {p: dict(m) for p, m in self.metrics.items()}
+        for p, m in snapshot.items():
+            LOGGER.info("llm.provider", provider=p, calls=m["calls"], ok=m["ok"], errors=m["errors"], retries=m["retries"],
+                        short_circuited=m["short_circuited"], latency_avg=round(m["latency_total"] / max(1, m["calls"]), 4),
+                        latency_max=round(m["latency_max"], 4), breaker=self.breakers[p].state if p in self.breakers else "closed",
+                        streams=m["streams"], ttft_avg=round(m["ttft_total"] / max(1, m["streams"]), 4),
+                        tokens_per_sec=round(m["tokens"] / m["gen_seconds"], 1) if m["gen_seconds"] else 0.0)
+
+    def _model_name(self, provider: str) -> Optional[str]:
+        """Model/deployment a provider would use, or None when it has no credentials."""
+        if provider == "openai":
+            return os.getenv("OPENAI_MODEL","gpt-4o-mini") if os.getenv("OPENAI_API_KEY") else None
+        if provider == "azure_openai":
+            ok = os.getenv("AZURE_OPENAI_API_KEY") and os.getenv("AZURE_OPENAI_ENDPOINT")
+            return os.getenv("AZURE_OPENAI_DEPLOYMENT","gpt-4o-mini") if ok else None
+        if provider == "anthropic":
+            return os.getenv("ANTHROPIC_MODEL","claude-3-5-sonnet-20240620") if os.getenv("ANTHROPIC_API_KEY") else None
+        if provider == "google":
+            ok = os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY")
+            return os.getenv("GOOGLE_MODEL", "gemini-1.5-pro") if ok else None
+        if provider == "gateway":
+            return "gateway" if os.getenv("NGBSE_GATEWAY_URL") else None
         return None
 
-    def _call_openai(self, system_prompt, user_prompt, max_tokens, temperature):
+    def call(self, system_prompt: str, user_prompt: str, max_tokens=800, temperature=0.2,
+             stop_when: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        return self.call_meta(system_prompt, user_prompt, max_tokens, temperature, stop_when)["text"]
+
+    def call_meta(self, system_prompt: str, user_prompt: str, max_tokens=800, temperature=0.2,
+                  stop_when: Optional[Callable[[str], bool]] = None, providers: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Like call(), but returns {text, provider, model, cached}; providers overrides the priority order."""
+        candidates = []
+        for p in providers or self.providers:
+            fn = getattr(self, f"_call_{p}", None)
+            if not fn:
+                continue
+            if self.stream_mode and hasattr(self, f"_request_{p}"):
+                fn = partial(self._stream_text, p, stop_when=stop_when)
+            key = None
+            if self.cache is not None:
+                model = self._model_name(p)
+                if model is None:
+                    continue
+                key = cache_key(p, model, system_prompt, user_prompt, temperature, max_tokens)
+                cached = self.cache.get(key)
+                if cached:
+                    return {"text": cached, "provider": p, "model": model, "cached": True}
+            candidates.append((p, fn, key))
+        args = (system_prompt, user_prompt, max_tokens, temperature)
+        if self.hedge_after is not None and len(candidates) > 1:
+            p, out = self._call_hedged(candidates, args)
+            return {"text": out, "provider": p, "model": self._model_name(p) if p else None, "cached": False}
+        for cand in candidates:
+            p, out = self._attempt(cand, args)
+            if out:
+                return {"text": out, "provider": p, "model": self._model_name(p), "cached": False}
+        return {"text": None, "provider": None, "model": None, "cached": False}
+
+    def _attempt(self, cand, args):
+        p, fn, key = cand
+        out = fn(*args)
+        if out and key is not None:
+            self.cache.put(key, out, provider=p)
+        return p, out
+
+    def _call_hedged(self, candidates: List, args):
+        """Starts the next provider when the running ones are slower than hedge_after or fail; first answer wins."""
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        try:
+            pending = set()
+            queue = list(candidates)
+            pending.add(pool.submit(self._attempt, queue.pop(0), args))
+            while pending:
+                done, pending = wait(pending, timeout=self.hedge_after if queue else None, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    p, out = fut.result()
+                    if out:
+                        return p, out
+                if queue and (not done or not pending):
+                    pending.add(pool.submit(self._attempt, queue.pop(0), args))
+            return None, None
+        finally:
+            # losers keep running until their own timeout; nothing waits for them
+            pool.shutdown(wait=False)
+
+    # --- provider requests: (url, headers, payload) or None without credentials ---
+
+    def _request_openai(self, system_prompt, user_prompt, max_tokens, temperature):
         api_key = os.getenv("OPENAI_API_KEY")
         model = os.getenv("OPENAI_MODEL","gpt-4o-mini")
         if not api_key:
             return None
-        try:
-            url = "https://api.openai.com/v1/chat/completions"
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            payload = {
-                "model": model,
-                "messages": [{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}],
-                "max_tokens": max_tokens,
-                "temperature": temperature
+        url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/") + "/chat/completions"
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        payload = {
+            "model": model,
+            "messages": [{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        return url, headers, payload
+
+    def _request_azure_openai(self, system_prompt, user_prompt, max_tokens, temperature):
+        api_key = os.getenv("AZURE_OPENAI_API_KEY")
+        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+        deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT","gpt-4o-mini")
+        if not api_key or not endpoint:
+            return None
+        url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2024-02-15-preview"
+        headers = {"api-key": api_key, "Content-Type": "application/json"}
+        payload = {
+            "messages":[{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        return url, headers, payload
+
+    def _request_anthropic(self, system_prompt, user_prompt, max_tokens, temperature):
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        model = os.getenv("ANTHROPIC_MODEL","claude-3-5-sonnet-20240620")
+        if not api_key:
+            return None
+        url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1").rstrip("/") + "/messages"
+        headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01", "Content-Type":"application/json"}
+        payload = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "system": system_prompt,
+            "messages": [{"role":"user","content":user_prompt}]
+        }
+        return url, headers, payload
+
+    def _request_google(self, system_prompt, user_prompt, max_tokens, temperature, method="generateContent"):
+        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY")
+        model = os.getenv("GOOGLE_MODEL", "gemini-1.5-pro")
+        if not api_key:
+            return None
+        # Google Generative Language API (AI Studio)
+        base = os.getenv("GOOGLE_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+        sep = "&" if "?" in method else "?"
+        url = f"{base}/models/{model}:{method}{sep}key={api_key}"
+        headers = {"Content-Type": "application/json"}
+        content_text = f"System:\n{system_prompt}\n\nUser:\n{user_prompt}"
+        payload = {
+            "contents": [
+                {"role": "user", "parts": [{"text": content_text}]}
+            ],
+            "generationConfig": {
+                "temperature": float(temperature),
+                "maxOutputTokens": int(max_tokens)
             }
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-            r.raise_for_status()
-            data = r.json()
+        }
+        return url, headers, payload
+
+    # --- blocking calls ---
+
+    def _call_openai(self, system_prompt, user_prompt, max_tokens, temperature):
+        req = self._request_openai(system_prompt, user_prompt, max_tokens, temperature)
+        if not req:
+            return None
+        try:
+            data = self._post("openai", *req)
             return data["choices"][0]["message"]["content"]
         except Exception:
             return None
 
     def _call_azure_openai(self, system_prompt, user_prompt, max_tokens, temperature):
-        api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT","gpt-4o-mini")
-        if not api_key or not endpoint:
+        req = self._request_azure_openai(system_prompt, user_prompt, max_tokens, temperature)
+        if not req:
             return None
         try:
-            url = f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2024-02-15-preview"
-            headers = {"api-key": api_key, "Content-Type": "application/json"}
-            payload = {
-                "messages":[{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}],
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-            r.raise_for_status()
-            data = r.json()
+            data = self._post("azure_openai", *req)
             return data["choices"][0]["message"]["content"]
         except Exception:
             return None
 
     def _call_anthropic(self, system_prompt, user_prompt, max_tokens, temperature):
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        model = os.getenv("ANTHROPIC_MODEL","claude-3-5-sonnet-20240620")
-        if not api_key:
+        req = self._request_anthropic(system_prompt, user_prompt, max_tokens, temperature)
+        if not req:
             return None
         try:
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01", "Content-Type":"application/json"}
-            payload = {
-                "model": model,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "system": system_prompt,
-                "messages": [{"role":"user","content":user_prompt}]
-            }
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-            r.raise_for_status()
-            data = r.json()
+            data = self._post("anthropic", *req)
             # Anthropics returns content list
             parts = data.get("content",[])
             if parts and isinstance(parts, list):
@@ -89,27 +390,11 @@ class LLMClient:
             return None
 
     def _call_google(self, system_prompt, user_prompt, max_tokens, temperature):
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY")
-        model = os.getenv("GOOGLE_MODEL", "gemini-1.5-pro")
-        if not api_key:
+        req = self._request_google(system_prompt, user_prompt, max_tokens, temperature)
+        if not req:
             return None
         try:
-            # Google Generative Language API (AI Studio)
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-            headers = {"Content-Type": "application/json"}
-            content_text = f"System:\n{system_prompt}\n\nUser:\n{user_prompt}"
-            payload = {
-                "contents": [
-                    {"role": "user", "parts": [{"text": content_text}]}
-                ],
-                "generationConfig": {
-                    "temperature": float(temperature),
-                    "maxOutputTokens": int(max_tokens)
-                }
-            }
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
-            r.raise_for_status()
-            data = r.json()
+            data = self._post("google", *req)
             candidates = data.get("candidates", [])
             if not candidates:
                 return None
@@ -118,3 +403,176 @@ class LLMClient:
             return "\n".join([t for t in texts if t]).strip() or None
         except Exception:
             return None
+
+    def _call_gateway(self, system_prompt, user_prompt, max_tokens, temperature):
+        """Shared local gateway (ngbse gateway, docs/LLM_GATEWAY_SPEC.md) at NGBSE_GATEWAY_URL."""
+        base = os.getenv("NGBSE_GATEWAY_URL")
+        if not base:
+            return None
+        try:
+            payload = {
+                "messages": [{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            }
+            data = self._post("gateway", base.rstrip("/") + "/v1/gateway", {"Content-Type": "application/json"}, payload)
+            return ((data.get("message") or {}).get("content")) or None
+        except Exception:
+            return None
+
+    # --- streaming (SSE) ---
+
+    @staticmethod
+    def _delta_openai(event: Dict[str, Any]) -> str:
+        choices = event.get("choices") or []
+        return ((choices[0].get("delta") or {}).get("content") or "") if choices else ""
+
+    @staticmethod
+    def _delta_anthropic(event: Dict[str, Any]) -> str:
+        if event.get("type") == "content_block_delta":
+            return (event.get("delta") or {}).get("text") or ""
+        return ""
+
+    @staticmethod
+    def _delta_google(event: Dict[str, Any]) -> str:
+        candidates = event.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts if isinstance(p, dict))
+
+    def _stream_request(self, provider: str, system_prompt, user_prompt, max_tokens, temperature):
+        if provider == "google":
+            return self._request_google(system_prompt, user_prompt, max_tokens, temperature, method="streamGenerateContent?alt=sse")
+        fn = getattr(self, f"_request_{provider}", None)
+        req = fn(system_prompt, user_prompt, max_tokens, temperature) if fn else None
+        if req:
+            url, headers, payload = req
+            req = (url, headers, {**payload, "stream": True})
+        return req
+
+    def _sse_events(self, provider: str, url: str, headers: Dict[str, str], payload: Dict[str, Any]):
+        """
+        Opens a streamed POST (retried by _send until the first byte) and yields decoded SSE data
+        events. The breaker is released as soon as the first event arrives (or the stream ends
+        cleanly), so a stream that is cut off early still counts as a success.
+        """
+        breaker = self.breakers.setdefault(provider, CircuitBreaker())
+        if not breaker.allow():
+            self._record(provider, short_circuited=1)
+            raise ProviderError(provider, "circuit open")
+        try:
+            r, _ = self._send(provider, breaker, url, {**headers, "Accept": "text/event-stream"}, json.dumps(payload), stream=True)
+        except Exception:
+            breaker.failure()
+            raise
+        healthy = False
+        try:
+            for raw in _stream_lines(r):
+                if not raw or not raw.startswith(b"data:"):
+                    continue
+                data = raw[5:].strip()
+                if data == b"[DONE]":
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                if not healthy:
+                    healthy = True
+                    breaker.success()
+                yield event
+            if not healthy:
+                healthy = True
+                breaker.success()
+        finally:
+            r.close()
+            if not healthy:
+                breaker.failure()
+
+    def stream(self, system_prompt: str, user_prompt: str, max_tokens=800, temperature=0.2,
+               stop_when: Optional[Callable[[str], bool]] = None, providers: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Yields text chunks as they arrive from the first provider that streams. stop_when(text_so_far)
+        returning True closes the connection early (generation stops server-side). Records
+        time-to-first-token and tokens/sec per provider; falls through to the next provider
+        only when nothing was received yet. A failure after the first chunk raises ProviderError,
+        so a truncated answer is never passed off as a complete one.
+        """
+        for p in providers or self.providers:
+            req = self._stream_request(p, system_prompt, user_prompt, max_tokens, temperature)
+            delta = getattr(self, f"_delta_{'openai' if p == 'azure_openai' else p}", None)
+            if not req or delta is None:
+                continue
+            t0 = time.perf_counter()
+            ttft = None
+            text = ""
+            cutoff = False
+            events = self._sse_events(p, *req)
+            try:
+                for event in events:
+                    chunk = delta(event)
+                    if not chunk:
+                        continue
+                    if ttft is None:
+                        ttft = time.perf_counter() - t0
+                    text += chunk
+                    yield chunk
+                    if stop_when is not None and stop_when(text):
+                        cutoff = True
+                        break
+            except Exception as e:
+                if ttft is None:
+                    LOGGER.warn("llm.stream.failed", provider=p, error=str(e))
+                    continue
+                self._record(p, calls=1, errors=1, latency=time.perf_counter() - t0)
+                LOGGER.warn("llm.stream.interrupted", provider=p, error=str(e), received_tokens=estimate_tokens(text))
+                raise ProviderError(p, f"stream interrupted: {e}") from e
+            finally:
+                events.close()
+            if ttft is None:
+                continue
+            elapsed = time.perf_counter() - t0
+            tokens = estimate_tokens(text)
+            gen = max(1e-6, elapsed - ttft)
+            self._record(p, calls=1, ok=1, streams=1, latency=elapsed, ttft_total=ttft, tokens=tokens, gen_seconds=gen)
+            LOGGER.info("llm.stream", provider=p, ttft=round(ttft, 4), seconds=round(elapsed, 4), tokens=tokens,
+                        tokens_per_sec=round(tokens / gen, 1), cutoff=cutoff)
+            return
+
+    def _stream_text(self, provider: str, system_prompt, user_prompt, max_tokens, temperature, stop_when=None) -> Optional[str]:
+        try:
+            text = "".join(self.stream(system_prompt, user_prompt, max_tokens, temperature, stop_when=stop_when, providers=[provider]))
+        except ProviderError:
+            return None  # interrupted mid-stream: not an answer, and not cached
+        return text.strip() or None
+
+
+def stop_after_actions(n: int = 3) -> Callable[[str], bool]:
+    """stop_when for a brief: BLUF followed by n completed list items (1. / - / *)."""
+    item = re.compile(r"^\s*(?:\d+[.)]|[-*\u2022])\s+\S", re.M)
+    def check(text: str) -> bool:
+        items = list(item.finditer(text))
+        return len(items) >= n and "\n" in text[items[n - 1].end():]
+    return check
+
+
+def stop_after_chars(limit: int) -> Callable[[str], bool]:
+    return lambda text: len(text) >= limit
+
+
+def client_from_config(llm_cfg) -> LLMClient:
+    """LLMClient for an LLMConfig, with the disk cache when llm.cache_dir is set."""
+    cache = None
+    cache_dir = getattr(llm_cfg, "cache_dir", None)
+    if cache_dir:
+        cache = LLMCache(cache_dir, ttl_seconds=float(llm_cfg.cache_ttl_hours) * 3600,
+                         max_bytes=int(float(llm_cfg.cache_max_mb) * 1024 * 1024))
+    return LLMClient(llm_cfg.provider_priority, cache=cache,
+                     timeout=float(getattr(llm_cfg, "timeout_seconds", 60.0)),
+                     max_retries=int(getattr(llm_cfg, "max_retries", 2)),
+                     hedge_after=getattr(llm_cfg, "hedge_after_seconds", None),
+                     breaker_failures=int(getattr(llm_cfg, "breaker_failures", 3)),
+                     breaker_cooldown=float(getattr(llm_cfg, "breaker_cooldown_seconds", 30.0)),
+                     pool_size=max(1, int(getattr(llm_cfg, "max_in_flight", 4))),
+                     stream=bool(getattr(llm_cfg, "stream", False)))
@@ -1,4 +1,5 @@
-import json, sys, time, threading
+import sys, time, threading
+from .jsonl_io import dumps
 
 class JsonLogger:
     def __init__(self, stream=sys.stdout):
@@ -26,7 +27,7 @@ class JsonLogger:
             "event": event,
             **kwargs
         }
-        line = json.dumps(payload, ensure_ascii=False) + "\n"
+        line = dumps(payload).decode("utf-8") + "\n"
         with self._lock:
             try:
                 self.stream.write(line)
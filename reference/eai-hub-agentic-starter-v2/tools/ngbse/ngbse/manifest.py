@@ -1,16 +1,37 @@
-import json, time
+import json, os, time
+from typing import Dict, Optional
 from .utils import sha256_file
+from .timing import StageTimer
 
-def write_manifest(out_dir: str, version: str, seeds_path: str, config_path: str, findings_path: str):
+def _utc(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+def write_manifest(out_dir: str, version: str, seeds_path: Optional[str], config_path: Optional[str],
+                   findings_path: Optional[str] = None, scoring_model: Optional[Dict[str, str]] = None,
+                   hashes: Optional[Dict[str, str]] = None, timer: Optional[StageTimer] = None):
+    """
+    hashes: digests the artifact writers computed while writing (file name -> sha256); an artifact
+    is only read back when it is missing there. timer supplies the run's start time and per-stage
+    start/end times. Input files (seeds, config) are hashed here.
+    """
+    hashes = dict(hashes or {})
+    if "findings.jsonl" not in hashes:
+        hashes["findings.jsonl"] = sha256_file(findings_path) if findings_path else ""
     manifest = {
         "ngbse_version": version,
-        "start_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "end_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "start_time": _utc(timer.started if timer else time.time()),
+        "end_time": _utc(time.time()),
         "hashes": {
-            "seeds.jsonl": sha256_file(seeds_path),
-            "ngbse.config.yml": sha256_file(config_path),
-            "findings.jsonl": sha256_file(findings_path) if findings_path else ""
+            "seeds.jsonl": sha256_file(seeds_path) if seeds_path else "",
+            "ngbse.config.yml": sha256_file(config_path) if config_path else "",
+            **hashes,
         }
     }
+    if timer is not None:
+        manifest["stages"] = list(timer.stages)
+    if scoring_model:
+        manifest["scoring_model"] = scoring_model
+        if scoring_model.get("path"):
+            manifest["hashes"][os.path.basename(scoring_model["path"])] = scoring_model.get("sha256", "")
     with open(f"{out_dir}/MANIFEST.json", "w", encoding="utf-8") as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
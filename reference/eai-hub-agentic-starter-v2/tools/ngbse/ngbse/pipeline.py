@@ -1,30 +1,116 @@
 import os, json, datetime
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from typing import List, Dict, Any, Optional
 from .logger import LOGGER
-from .utils import load_jsonl, write_jsonl
-from .dedupe import dedupe
+from .llm_client import client_from_config
+from .llm_batch import submit_batch, collect_batch
+from .jsonl_io import load_jsonl, write_jsonl, write_json
+from .dedupe import dedupe, soft_hash
 from .validation import validate_findings
 from .collectors.http_web import HttpWebCollector
 from .enrich.metadata_enricher import enrich_findings
-from .scoring.scoring import score_findings, aggregate_asset_scores
-from .synth.reverse_llm import coverage_gap, recency_gap, confidence_gap, synthesize_brief, synthesize_brief_llm
-from .synth.scenario_engine import build_scenarios
+from .enrich.ip_asn import IpAsnDatabase, enrich_ip_asn
+from .scoring.scoring import score_findings_batch
+from .scoring.model import load_scoring_model
+from .scoring.aggregate import AssetAggregator
+from .synth.reverse_llm import synthesize_brief_llm
+from .synth.blindspots import BlindspotAnalyzer
+from .synth.scenario_engine import build_scenarios, THEMES
+from .synth.theme_matcher import load_theme_matcher
+from .synth.prompt_builder import PromptBuilder
 from .forecast.forecast_engine import build_forecast
+from .forecast.history_store import open_history_store
+from .forecast.retention import compact_history
 from .manifest import write_manifest
 from .seedgen import propose_next_seeds
+from .timing import StageTimer
 
-def run_pipeline(config, seeds_path: str, out_dir: str):
+def _prepare_out_dir(out_dir: str):
     os.makedirs(out_dir, exist_ok=True)
     os.makedirs(os.path.join(out_dir, "stix"), exist_ok=True)
     os.makedirs(os.path.join(out_dir, "reports"), exist_ok=True)
     os.makedirs(os.path.join(out_dir, "history"), exist_ok=True)
 
+def _open_ip_db(config):
+    ip_db_path = getattr(getattr(config, "enrich", None), "ip_asn_db", None)
+    if not ip_db_path:
+        return None
+    try:
+        return IpAsnDatabase(ip_db_path)
+    except Exception as e:
+        LOGGER.warn("enrich.ip_asn.unavailable", path=ip_db_path, error=str(e))
+        return None
+
+def _enrich(config, findings: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+    """Metadata enrichment plus the offline IP→ASN lookup; the memory-mapped database is closed on every path."""
+    findings = enrich_findings(findings)
+    ip_db = _open_ip_db(config)
+    if ip_db:
+        with ip_db:
+            findings = enrich_ip_asn(findings, ip_db)
+    return findings
+
+def _load_theme_matcher(config):
+    tc = getattr(config, "themes", None)
+    if tc is None:
+        return load_theme_matcher(None, default_themes=THEMES)
+    return load_theme_matcher(tc.path, multi_label=tc.multi_label, count_hits=tc.count_hits, default_themes=THEMES)
+
+def _write_next_seeds(out_dir: str, findings, asset_scores, blindspots,
+                      hashes: Optional[Dict[str,str]] = None) -> List[Dict[str,Any]]:
+    try:
+        next_seeds = propose_next_seeds(findings, asset_scores, blindspots)
+        digest = write_jsonl(os.path.join(out_dir, "seeds.next.jsonl"), next_seeds)
+        if hashes is not None:
+            hashes["seeds.next.jsonl"] = digest
+        return next_seeds
+    except Exception as e:
+        LOGGER.warn("seedgen.failed", error=str(e))
+        return []
+
+def _save_report_state(out_dir: str, state: Dict[str,Any]):
+    with open(os.path.join(out_dir, "report_state.json"), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+def _render_report(state: Dict[str,Any]) -> str:
+    from .report.docx_reporter import write_report, REPORT_TOP_N, TEMPLATE_CACHE
+    return write_report(state["report_path"], state["brief"], state["blindspots"], state["forecast"], state["scenarios"],
+                        top_n=state.get("top_n") or REPORT_TOP_N, md_template=state.get("md_template"),
+                        template_cache=state.get("template_cache", TEMPLATE_CACHE))
+
+def _start_report(state: Dict[str,Any], use_process: bool = True) -> Future:
+    """
+    Renders the report in a child process so manifest and seed proposals overlap with it;
+    renders inline when use_process is False or no process can be started.
+    """
+    if use_process:
+        try:
+            pool = ProcessPoolExecutor(max_workers=1)
+            fut = pool.submit(_render_report, state)
+            pool.shutdown(wait=False)
+            return fut
+        except Exception as e:
+            LOGGER.warn("report.process_unavailable", error=str(e))
+    fut: Future = Future()
+    try:
+        fut.set_result(_render_report(state))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+def run_pipeline(config, seeds_path: str, out_dir: str, config_path: str = "ngbse.config.yml"):
+    timer = StageTimer()
+    _prepare_out_dir(out_dir)
+
     seeds = load_jsonl(seeds_path)
     seeds = sorted(seeds, key=lambda s: float(s.get("priority",0.5)), reverse=True)
     allow_domains = config.allowlist.domains
     allow_orgs = config.allowlist.organizations
     now_iso = datetime.datetime.utcnow().isoformat()+"Z"
 
+    scorer = load_scoring_model(getattr(getattr(config, "scoring", None), "model_path", None))
+    themes = _load_theme_matcher(config)
+
     # Build two waves of collectors
     enabled = getattr(getattr(config, "collectors", None), "enabled", None) or getattr(config, "collectors", {}).get("enabled", [])
     baseline_collectors = []
@@ -57,125 +143,270 @@ def run_pipeline(config, seeds_path: str, out_dir: str):
 
     # Wave 1: run baseline collectors on all seeds
     baseline_findings: List[Dict[str,Any]] = []
-    for seed in seeds:
-        for c in baseline_collectors:
-            try:
-                c_findings = c.collect(seed, now_iso=now_iso)
-                baseline_findings.extend(c_findings)
-            except PermissionError as pe:
-                LOGGER.warn("allowlist.blocked", seed=seed.get("id"), error=str(pe))
-            except Exception as e:
-                LOGGER.error("collector.failure", seed=seed.get("id"), error=str(e))
+    with timer.stage("collect.wave1"):
+        for seed in seeds:
+            for c in baseline_collectors:
+                try:
+                    c_findings = c.collect(seed, now_iso=now_iso)
+                    baseline_findings.extend(c_findings)
+                except PermissionError as pe:
+                    LOGGER.warn("allowlist.blocked", seed=seed.get("id"), error=str(pe))
+                except Exception as e:
+                    LOGGER.error("collector.failure", seed=seed.get("id"), error=str(e))
 
     # validation and deduplication
-    findings = dedupe(baseline_findings)
+    with timer.stage("dedupe"):
+        findings = dedupe(baseline_findings)
     if getattr(config, "validation_enabled", False):
-        findings = validate_findings(findings, allow_domains)
-
-    findings = enrich_findings(findings)
-    findings = score_findings(findings, now_iso=now_iso)
+        with timer.stage("validate"):
+            findings = validate_findings(findings, allow_domains)
 
-    asset_scores = aggregate_asset_scores(findings)
+    with timer.stage("enrich"):
+        findings = _enrich(config, findings)
+    with timer.stage("score"):
+        findings = score_findings_batch(findings, now_iso=now_iso, scorer=scorer)
+    with timer.stage("aggregate"):
+        aggregator = AssetAggregator().add_many(findings)
+        asset_scores = aggregator.summary()
     write_jsonl(os.path.join(out_dir, "findings.jsonl"), findings)
 
     # blindspots
-    cov = coverage_gap(findings)
-    rec = recency_gap(findings)
-    conf = confidence_gap(findings)
-    blindspots = {"coverage": cov, "recency": rec, "confidence": conf}
+    with timer.stage("blindspots"):
+        analyzer = BlindspotAnalyzer(theme_matcher=themes).add_many(findings)
+        blindspots = analyzer.result()
 
     # Optional Wave 2: targeted leak/infra follow-ups
     run_second_wave = os.getenv("NGBSE_SECOND_WAVE", "1") == "1"
     second_findings: List[Dict[str,Any]] = []
-    next_seeds = []
-    try:
-        next_seeds = propose_next_seeds(findings, asset_scores, blindspots)
-        with open(os.path.join(out_dir, "seeds.next.jsonl"), "w", encoding="utf-8") as h:
-            for s in next_seeds:
-                h.write(json.dumps(s, ensure_ascii=False) + "\n")
-    except Exception as e:
-        LOGGER.warn("seedgen.failed", error=str(e))
+    next_seeds = _write_next_seeds(out_dir, analyzer.examples, asset_scores, blindspots)
 
     if run_second_wave and second_collectors:
-        # select only infra/leak seeds from both original and proposed
-        second_seed_pool = [s for s in seeds if (s.get("type") or "").lower() in ("infra","leak")]
-        second_seed_pool.extend([s for s in next_seeds if (s.get("type") or "").lower() in ("infra","leak")])
-        for seed in second_seed_pool:
-            for c in second_collectors:
-                try:
-                    c_findings = c.collect(seed, now_iso=now_iso)
-                    second_findings.extend(c_findings)
-                except PermissionError as pe:
-                    LOGGER.warn("allowlist.blocked", seed=seed.get("id"), error=str(pe))
-                except Exception as e:
-                    LOGGER.error("collector.failure", seed=seed.get("id"), error=str(e))
+        with timer.stage("collect.wave2"):
+            # select only infra/leak seeds from both original and proposed
+            second_seed_pool = [s for s in seeds if (s.get("type") or "").lower() in ("infra","leak")]
+            second_seed_pool.extend([s for s in next_seeds if (s.get("type") or "").lower() in ("infra","leak")])
+            for seed in second_seed_pool:
+                for c in second_collectors:
+                    try:
+                        c_findings = c.collect(seed, now_iso=now_iso)
+                        second_findings.extend(c_findings)
+                    except PermissionError as pe:
+                        LOGGER.warn("allowlist.blocked", seed=seed.get("id"), error=str(pe))
+                    except Exception as e:
+                        LOGGER.error("collector.failure", seed=seed.get("id"), error=str(e))
 
-    # Final merge and outputs
-    merged = findings + second_findings
-    findings = dedupe(merged)
-    if getattr(config, "validation_enabled", False):
-        findings = validate_findings(findings, allow_domains)
-    findings = enrich_findings(findings)
-    findings = score_findings(findings, now_iso=now_iso)
-    asset_scores = aggregate_asset_scores(findings)
-    write_jsonl(os.path.join(out_dir, "findings.jsonl"), findings)
+    # Final merge: only wave-2 findings that are new get scored and
+    # folded into the wave-1 aggregator
+    seen = {soft_hash(f) for f in findings}
+    new_findings = [f for f in dedupe(second_findings) if soft_hash(f) not in seen]
+    if new_findings:
+        if getattr(config, "validation_enabled", False):
+            with timer.stage("validate"):
+                new_findings = validate_findings(new_findings, allow_domains)
+        with timer.stage("enrich"):
+            new_findings = _enrich(config, new_findings)
+        with timer.stage("score"):
+            new_findings = score_findings_batch(new_findings, now_iso=now_iso, scorer=scorer)
+        with timer.stage("aggregate"):
+            aggregator.merge(AssetAggregator().add_many(new_findings))
+        findings = findings + new_findings
+        with timer.stage("blindspots"):
+            analyzer.add_many(new_findings)
+
+    summary = finalize_run(config, findings, aggregator, analyzer, out_dir, timer, scorer,
+                           seeds_path=seeds_path, config_path=config_path)
+    return {"n_seeds": len(seeds), **summary}
+
+
+def finalize_run(config, findings: List[Dict[str,Any]], aggregator: AssetAggregator, analyzer: BlindspotAnalyzer, out_dir: str,
+                 timer: StageTimer, scorer, seeds_path: Optional[str] = None, config_path: Optional[str] = None,
+                 history_dirs: Optional[List[str]] = None) -> Dict[str,Any]:
+    """
+    Shared tail of a run (collection run or rescore): findings, exports, history,
+    forecast, brief, scenarios, report, manifest and next-run seeds.
+    """
+    asset_scores = aggregator.summary()
+    blindspots = analyzer.result()
+    hashes: Dict[str,str] = {}  # artifact digests, computed while writing, for the manifest
+    with timer.stage("write.findings"):
+        hashes["findings.jsonl"] = write_jsonl(os.path.join(out_dir, "findings.jsonl"), findings)
 
     # STIX export
     if config.output.stix:
-        from .export.stix_exporter import export_stix
-        export_stix(findings, os.path.join(out_dir, "stix", "bundle.json"))
+        with timer.stage("export.stix"):
+            from .export.stix_exporter import export_stix, open_stix_state
+            with open_stix_state(out_dir, history_dirs) as stix_state:
+                export_stix(findings, os.path.join(out_dir, "stix", "bundle.json"), state=stix_state,
+                            mode=config.output.stix_mode, hashes=hashes)
 
     # CSV export
     if getattr(config.output, "csv", False):
-        try:
-            from .export.csv_export import write_csv as write_csv_export
-            write_csv_export(findings, os.path.join(out_dir, "findings.csv"))
-        except Exception as e:
-            LOGGER.warn("export.csv_failed", error=str(e))
+        with timer.stage("export.csv"):
+            try:
+                from .export.csv_export import write_csv as write_csv_export
+                csv_name = "findings.csv.gz" if config.output.csv_gzip else "findings.csv"
+                write_csv_export(findings, os.path.join(out_dir, csv_name), hashes=hashes)
+            except Exception as e:
+                LOGGER.warn("export.csv_failed", error=str(e))
+
+    # Columnar export (Parquet / Arrow IPC)
+    if getattr(config.output, "columnar", None):
+        with timer.stage("export.columnar"):
+            try:
+                from .export.columnar_export import export_columnar
+                export_columnar(findings, asset_scores, out_dir, fmt=config.output.columnar)
+            except Exception as e:
+                LOGGER.warn("export.columnar_failed", error=str(e))
 
     # Forecast
     # save asset scores into history with timestamp filename
-    ts = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    with open(os.path.join(out_dir, "history", f"{ts}.asset_scores.json"), "w", encoding="utf-8") as f:
-        json.dump(asset_scores, f, ensure_ascii=False, indent=2)
-    forecast = build_forecast(out_dir)
-
-    # Brief synthesis (baseline + optional LLM overlay)
-    brief = synthesize_brief_llm(
-        findings,
-        asset_scores,
-        mode=(os.getenv("NGBSE_REVERSE_LLM_MODE", "none").lower() or "none"),
-        provider_priority=config.llm.provider_priority,
-        out_dir=out_dir,
-    )
-
-    # Scenario synthesis (prompt/api modes controlled by env via provider priority)
-    scenarios = build_scenarios(findings, mode=(os.getenv("NGBSE_SCENARIO_MODE", "none").lower() or "none"), provider_priority=config.llm.provider_priority)
-
-    # Report
-    if config.output.docx_report:
-        from .report.docx_reporter import write_report
-        write_report(os.path.join(out_dir, "reports", f"ngbse_brief_{ts}.docx"), brief, blindspots, forecast, scenarios)
-
-    # Manifest
-    write_manifest(out_dir, config.version, seeds_path, "ngbse.config.yml", os.path.join(out_dir, "findings.jsonl"))
+    with timer.stage("forecast"):
+        ts = datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        hashes[f"{ts}.asset_scores.json"] = write_json(os.path.join(out_dir, "history", f"{ts}.asset_scores.json"),
+                                                       asset_scores, indent=2)
+        aggregator.save(os.path.join(out_dir, "history", f"{ts}.asset_agg.json"))
+        with open_history_store(out_dir, history_dirs) as store:
+            store.append_run(ts, {a: v["avg_e_ai_star"] for a, v in asset_scores.items()})
+            hist = config.history
+            if hist.auto_compact:
+                compact_history(os.path.join(out_dir, "history"), raw_days=hist.raw_days, daily_days=hist.daily_days, store=store)
+            forecast = build_forecast(out_dir, store=store)
+
+    # Analyst database (SQLite); appended across runs
+    if getattr(config.output, "sqlite_db", None):
+        with timer.stage("export.sqlite"):
+            try:
+                from .export.sqlite_export import export_sqlite
+                seeds = load_jsonl(seeds_path) if seeds_path and os.path.exists(seeds_path) else []
+                export_sqlite(config.output.sqlite_db, ts, out_dir, findings, asset_scores, seeds)
+            except Exception as e:
+                LOGGER.warn("export.sqlite_failed", error=str(e))
+
+    # Brief + scenario synthesis; LLM calls share one bounded pool so wall time ~ slowest call
+    with timer.stage("synthesis"):
+        llm_cfg = config.llm
+        brief_mode = os.getenv("NGBSE_REVERSE_LLM_MODE", "none").lower() or "none"
+        scenario_mode = os.getenv("NGBSE_SCENARIO_MODE", "none").lower() or "none"
+        client = client_from_config(llm_cfg) if "api" in (brief_mode, scenario_mode) else None
+        batch: List[Dict[str,Any]] = []
+        with ThreadPoolExecutor(max_workers=max(1, getattr(llm_cfg, "max_in_flight", 4))) as pool:
+            builder = PromptBuilder.from_config(llm_cfg)
+            brief_future = pool.submit(
+                synthesize_brief_llm,
+                analyzer.top_findings(),
+                asset_scores,
+                mode=brief_mode,
+                provider_priority=llm_cfg.provider_priority,
+                out_dir=out_dir,
+                client=client,
+                builder=builder,
+                batch=batch,
+            )
+            scenarios = build_scenarios(findings, mode=scenario_mode,
+                                        provider_priority=llm_cfg.provider_priority, theme_stats=analyzer.theme_stats(),
+                                        out_dir=out_dir, executor=pool, client=client, builder=builder, batch=batch)
+            brief = brief_future.result()
+        if batch:
+            # brief first, then scenarios in theme order
+            batch.sort(key=lambda r: r["custom_id"] != "brief")
+            submit_batch(out_dir, batch, adapter_name=getattr(llm_cfg, "batch_adapter", "local"),
+                         directory=getattr(llm_cfg, "batch_dir", None))
+        if client is not None:
+            client.log_metrics()
+            if client.cache is not None:
+                client.cache.log_stats()
+
+    # Report (state is kept so `ngbse llm-collect` can re-render it with batch results)
+    out_cfg = config.output
+    report_state = {"brief": brief, "blindspots": blindspots, "forecast": forecast, "scenarios": scenarios,
+                    "report_path": os.path.join(out_dir, "reports", f"ngbse_brief_{ts}.docx") if out_cfg.docx_report else None,
+                    "top_n": out_cfg.report_top_n, "md_template": out_cfg.report_md_template,
+                    "template_cache": out_cfg.report_template_cache}
+    _save_report_state(out_dir, report_state)
+    report_job = _start_report(report_state, use_process=out_cfg.report_process) if out_cfg.docx_report else None
 
     # Proposed next-run seeds
-    try:
-        next_seeds = propose_next_seeds(findings, asset_scores, blindspots)
-        with open(os.path.join(out_dir, "seeds.next.jsonl"), "w", encoding="utf-8") as h:
-            for s in next_seeds:
-                h.write(json.dumps(s, ensure_ascii=False) + "\n")
-    except Exception as e:
-        LOGGER.warn("seedgen.failed", error=str(e))
+    next_seeds = _write_next_seeds(out_dir, analyzer.examples, asset_scores, blindspots, hashes=hashes)
+
+    if report_job is not None:
+        with timer.stage("report"):
+            report_job.result()
+
+    # Manifest: digests from the writers above plus per-stage start/end times; nothing is read back
+    with timer.stage("manifest"):
+        write_manifest(out_dir, config.version, seeds_path, config_path, os.path.join(out_dir, "findings.jsonl"),
+                       scoring_model=scorer.describe(), hashes=hashes, timer=timer)
 
+    timings = timer.summary()
+    LOGGER.info("run.timings", **timings)
     # return summary
     return {
-        "n_seeds": len(seeds),
         "n_findings": len(findings),
         "assets": list(asset_scores.keys()),
         "blindspots": blindspots,
         "forecast_keys": list(forecast.keys()),
         "n_scenarios": len(scenarios or {}),
-        "n_next_seeds": len(next_seeds) if 'next_seeds' in locals() else 0,
+        "n_next_seeds": len(next_seeds),
+        "timings": timings,
     }
+
+
+def rescore_run(config, findings_path: str, out_dir: str, seeds_path: Optional[str] = None,
+                config_path: Optional[str] = None, history_dir: Optional[str] = None,
+                now_iso: Optional[str] = None) -> Dict[str,Any]:
+    """
+    Recomputes a stored run without any network access: enrich, score, aggregate,
+    blindspots, forecast and exports over findings.jsonl, written to a new run directory.
+    Recency is measured against the original collection time unless now_iso is given,
+    so only model changes move the scores.
+    """
+    timer = StageTimer()
+    _prepare_out_dir(out_dir)
+    with timer.stage("load"):
+        findings = load_jsonl(findings_path)
+        scorer = load_scoring_model(getattr(getattr(config, "scoring", None), "model_path", None))
+        themes = _load_theme_matcher(config)
+    if not now_iso:
+        collected = [c for c in (f.get("timestamps",{}).get("collected") for f in findings) if isinstance(c, str) and c]
+        now_iso = max(collected) if collected else datetime.datetime.utcnow().isoformat()+"Z"
+    with timer.stage("enrich"):
+        findings = _enrich(config, findings)
+    with timer.stage("score"):
+        findings = score_findings_batch(findings, now_iso=now_iso, scorer=scorer)
+    with timer.stage("aggregate"):
+        aggregator = AssetAggregator().add_many(findings)
+    with timer.stage("blindspots"):
+        analyzer = BlindspotAnalyzer(theme_matcher=themes).add_many(findings)
+    summary = finalize_run(config, findings, aggregator, analyzer, out_dir, timer, scorer,
+                           seeds_path=seeds_path, config_path=config_path,
+                           history_dirs=[history_dir] if history_dir else None)
+    return {"rescored_from": findings_path, "out_dir": out_dir, **summary}
+
+
+def collect_llm_batch(out_dir: str, wait_seconds: float = 0.0, poll_seconds: float = 10.0) -> Dict[str,Any]:
+    """
+    Completes a run whose brief/scenarios were submitted in batch mode: fetches the batch
+    results, fills BLUF and semantic_summary into the saved report state and re-renders the report.
+    """
+    results = collect_batch(out_dir, wait_seconds=wait_seconds, poll_seconds=poll_seconds)
+    if results is None:
+        LOGGER.info("llm.batch.pending", out_dir=out_dir)
+        return {"status": "pending"}
+    with open(os.path.join(out_dir, "report_state.json"), "r", encoding="utf-8") as f:
+        state = json.load(f)
+    filled = 0
+    brief_text = results.get("brief")
+    if isinstance(brief_text, str) and brief_text.strip():
+        state["brief"]["BLUF"] = brief_text.strip()
+        filled += 1
+    for theme, data in (state.get("scenarios") or {}).items():
+        text = results.get(f"scenario:{theme}")
+        if isinstance(text, str) and text.strip():
+            data["semantic_summary"] = text.strip()
+            filled += 1
+    _save_report_state(out_dir, state)
+    if state.get("report_path"):
+        _render_report(state)
+    failed = sum(1 for v in results.values() if not v)
+    LOGGER.info("llm.batch.collected", out_dir=out_dir, filled=filled, failed=failed)
+    return {"status": "completed", "filled": filled, "failed": failed, "report": state.get("report_path")}
@@ -7,90 +7,205 @@ except Exception:
     Document = None
     Pt = None
 
-from typing import List, Dict, Any
+import io, os, threading
+from string import Template
+from typing import List, Dict, Any, Optional
 from datetime import datetime
+from ..forecast.vector_forecast import rising_assets
 
-def add_heading(doc, text, level=1):
-    p = doc.add_heading(text, level=level)
-    return p
+TITLE = "NGBSE 17.1 – Intelligence Brief"
+RISING_TOP_N = 10
+REPORT_TOP_N = 25
+TEMPLATE_VERSION = 1
+TEMPLATE_CACHE = os.path.join(".ngbse_cache", f"report_template.v{TEMPLATE_VERSION}.docx")
+SIGN_OFF = ["Analyst Name: ________________________", "Date of Review: ______________________",
+            "Conclusion: [Agree] [Disagree]", "Signature: ___________________________"]
 
-def add_paragraph(doc, text):
-    p = doc.add_paragraph(text)
-    for run in p.runs:
-        run.font.size = Pt(11) if Pt else None
-    return p
+MARKDOWN_TEMPLATE = """# $title
+Generated: $generated
 
-def write_report(path: str, brief: Dict[str, Any], blindspots: Dict[str, Any], forecast: Dict[str, Any], scenarios: Dict[str, Any] | None = None):
-    if not _DOCX:
-        # Fallback: write markdown next to expected path
-        md_path = path.rsplit('.', 1)[0] + ".md"
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write("# NGBSE 17.1 – Intelligence Brief\n")
-            f.write(f"Generated: {datetime.utcnow().isoformat()}Z\n\n")
-            f.write("## BLUF\n" + brief.get("BLUF", "") + "\n\n")
-            f.write("## Top Risks\n")
-            for r in brief.get("TopRisks", []):
-                f.write(f"- {r['asset']}: risk {r['risk']}\n")
-            f.write("\n## Actions\n")
-            for a in brief.get("Actions", []):
-                f.write(f"- {a}\n")
-            f.write("\n## Blindspot Analysis\n")
-            f.write(f"Coverage Ratios: {blindspots['coverage'].get('ratios', {})}\n")
-            f.write(f"Coverage Imbalance: {blindspots['coverage'].get('imbalance', 0.0)}\n")
-            f.write(f"Recency Spike: {blindspots['recency'].get('spike', False)} / {blindspots['recency'].get('detail', {})}\n")
-            f.write(f"Confidence Gap (risky assets): {blindspots['confidence'].get('risky_assets', [])}\n")
-            f.write("\n## Forecast\n")
-            if forecast:
-                for asset, fvals in forecast.items():
-                    f.write(f"- {asset}: last={round(fvals['last'], 3)} ewma={round(fvals['ewma'], 3)} → projected_next={round(fvals['projected_next'], 3)}\n")
-            else:
-                f.write("No historical series available yet.\n")
-            if scenarios:
-                f.write("\n## Scenarios (90 dagen)\n")
-                for theme, data in scenarios.items():
-                    f.write(f"- {theme}: p≈{round(100*data.get('probability_90_days',0.0),1)}% | {data.get('semantic_summary','').strip()}\n")
-            f.write("\n## Analyst Review & Sign-off\n")
-            f.write("Analyst Name: ________________________\nDate of Review: ______________________\nConclusion: [Agree] [Disagree]\nSignature: ___________________________\n")
-        return
+## BLUF
+$bluf
+
+## Top Risks
+$top_risks
+
+## Actions
+$actions
+
+## Blindspot Analysis
+$blindspots
+
+## Forecast
+$forecast
+
+$scenarios## Analyst Review & Sign-off
+$sign_off
+"""
+
+_template_lock = threading.Lock()
+_template_bytes: Optional[bytes] = None
+
+
+def build_report_model(brief: Dict[str, Any], blindspots: Dict[str, Any], forecast: Dict[str, Any],
+                       scenarios: Optional[Dict[str, Any]] = None, top_n: int = REPORT_TOP_N) -> Dict[str, Any]:
+    """Everything the renderers need, already ranked and cut to top_n, so output size is independent of run size."""
+    risks = sorted(brief.get("TopRisks", []), key=lambda r: r.get("risk", 0.0), reverse=True)
+    rising = rising_assets(forecast or {}, min(top_n, RISING_TOP_N))
+    jumps = sorted(a for a, v in (forecast or {}).items() if v.get("change_point"))
+    themes = sorted((scenarios or {}).items(), key=lambda kv: kv[1].get("probability_90_days", 0.0), reverse=True)
+    coverage, recency, confidence = blindspots.get("coverage", {}), blindspots.get("recency", {}), blindspots.get("confidence", {})
+    return {
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "bluf": brief.get("BLUF", ""),
+        "top_risks": {"header": ["Asset", "Risk"], "rows": [[r["asset"], str(r["risk"])] for r in risks[:top_n]],
+                      "total": len(risks)},
+        "actions": list(brief.get("Actions", [])),
+        "blindspots": [
+            f"Coverage Ratios: {coverage.get('ratios', {})}",
+            f"Coverage Imbalance: {coverage.get('imbalance', 0.0)}",
+            f"Recency Spike: {recency.get('spike', False)} / {recency.get('detail', {})}",
+            f"Confidence Gap (risky assets): {confidence.get('risky_assets', [])}",
+        ],
+        "rising": {"header": ["Asset", "Last", "Projected", "Interval", "Trend", "Change-point"],
+                   "rows": [[r["asset"], f"{r['last']:.3f}", f"{r['projected_next']:.3f}",
+                             f"{r.get('lower', r['projected_next']):.3f}–{r.get('upper', r['projected_next']):.3f}",
+                             f"+{r['trend']:.3f}", "yes" if r.get("change_point") else ""] for r in rising],
+                   "total": len(forecast or {})},
+        "change_points": {"assets": jumps[:top_n], "total": len(jumps)},
+        "scenarios": {"header": ["Theme", "p(90d)", "Summary"],
+                      "rows": [[t, f"{100 * d.get('probability_90_days', 0.0):.1f}%", (d.get("semantic_summary") or "").strip()]
+                               for t, d in themes[:top_n]],
+                      "total": len(themes)},
+    }
+
+
+def _md_table(table: Dict[str, Any]) -> str:
+    esc = lambda v: str(v).replace("|", "\\|").replace("\n", " ")
+    lines = ["| " + " | ".join(table["header"]) + " |", "|" + "---|" * len(table["header"])]
+    lines += ["| " + " | ".join(esc(v) for v in row) + " |" for row in table["rows"]]
+    return "\n".join(lines)
+
+
+def _forecast_md(model: Dict[str, Any]) -> str:
+    rising = model["rising"]
+    if not rising["total"]:
+        return "No historical series available yet."
+    out = [f"Rising assets (top {len(rising['rows'])} of {rising['total']} by trend):", ""]
+    out.append(_md_table(rising) if rising["rows"] else "- none")
+    cp = model["change_points"]
+    if cp["total"]:
+        more = " …" if cp["total"] > len(cp["assets"]) else ""
+        out += ["", f"Change-points ({cp['total']}): {', '.join(cp['assets'])}{more}"]
+    return "\n".join(out)
+
+
+def render_markdown(model: Dict[str, Any], template: Optional[str] = None) -> str:
+    scen = model["scenarios"]
+    scenarios = "## Scenarios (90 dagen)\n" + _md_table(scen) + "\n\n" if scen["rows"] else ""
+    return Template(template or MARKDOWN_TEMPLATE).safe_substitute(
+        title=TITLE, generated=model["generated"], bluf=model["bluf"],
+        top_risks=_md_table(model["top_risks"]) if model["top_risks"]["rows"] else "- none",
+        actions="\n".join(f"- {a}" for a in model["actions"]),
+        blindspots="\n".join(model["blindspots"]),
+        forecast=_forecast_md(model), scenarios=scenarios, sign_off="\n".join(SIGN_OFF))
 
+
+def _build_template() -> bytes:
     doc = Document()
-    add_heading(doc, "NGBSE 17.1 – Intelligence Brief", 0)
-    add_paragraph(doc, f"Generated: {datetime.utcnow().isoformat()}Z")
-
-    add_heading(doc, "BLUF", 1)
-    add_paragraph(doc, brief.get("BLUF", ""))
-
-    add_heading(doc, "Top Risks", 1)
-    for r in brief.get("TopRisks", []):
-        add_paragraph(doc, f"- {r['asset']}: risk {r['risk']}")
-
-    add_heading(doc, "Actions", 1)
-    for a in brief.get("Actions", []):
-        add_paragraph(doc, f"- {a}")
-
-    add_heading(doc, "Blindspot Analysis", 1)
-    add_paragraph(doc, f"Coverage Ratios: {blindspots['coverage'].get('ratios', {})}")
-    add_paragraph(doc, f"Coverage Imbalance: {blindspots['coverage'].get('imbalance', 0.0)}")
-    add_paragraph(doc, f"Recency Spike: {blindspots['recency'].get('spike', False)} / {blindspots['recency'].get('detail', {})}")
-    add_paragraph(doc, f"Confidence Gap (risky assets): {blindspots['confidence'].get('risky_assets', [])}")
-
-    add_heading(doc, "Forecast & Scenarios", 1)
-    if forecast:
-        for asset, fvals in forecast.items():
-            add_paragraph(doc, f"- {asset}: last={round(fvals['last'], 3)} ewma={round(fvals['ewma'], 3)} → projected_next={round(fvals['projected_next'], 3)}")
+    normal = doc.styles["Normal"]
+    normal.font.size = Pt(11)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def template_bytes(cache_path: Optional[str] = TEMPLATE_CACHE) -> bytes:
+    """Styled base document: built once, kept on disk and in memory for subsequent reports."""
+    global _template_bytes
+    with _template_lock:
+        if _template_bytes is None:
+            if cache_path and os.path.exists(cache_path):
+                with open(cache_path, "rb") as f:
+                    _template_bytes = f.read()
+            else:
+                _template_bytes = _build_template()
+                if cache_path:
+                    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+                    tmp = f"{cache_path}.{os.getpid()}.tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(_template_bytes)
+                    os.replace(tmp, cache_path)
+        return _template_bytes
+
+
+def _add_table(doc, table: Dict[str, Any]):
+    """One table object for the whole top-N list; rows are created in one go and filled cell by cell."""
+    t = doc.add_table(rows=len(table["rows"]) + 1, cols=len(table["header"]))
+    t.style = "Table Grid"
+    for row, values in zip(t.rows, [table["header"]] + table["rows"]):
+        for cell, v in zip(row.cells, values):
+            cell.text = str(v)
+    return t
+
+
+def render_docx(model: Dict[str, Any], path: str, cache_path: Optional[str] = TEMPLATE_CACHE):
+    doc = Document(io.BytesIO(template_bytes(cache_path)))
+    doc.add_heading(TITLE, 0)
+    doc.add_paragraph(f"Generated: {model['generated']}")
+
+    doc.add_heading("BLUF", 1)
+    doc.add_paragraph(model["bluf"])
+
+    doc.add_heading("Top Risks", 1)
+    if model["top_risks"]["rows"]:
+        _add_table(doc, model["top_risks"])
+
+    doc.add_heading("Actions", 1)
+    for a in model["actions"]:
+        doc.add_paragraph(f"- {a}")
+
+    doc.add_heading("Blindspot Analysis", 1)
+    doc.add_paragraph("\n".join(model["blindspots"]))
+
+    doc.add_heading("Forecast & Scenarios", 1)
+    rising = model["rising"]
+    if rising["total"]:
+        doc.add_paragraph(f"Rising assets (top {len(rising['rows'])} of {rising['total']} by trend):")
+        if rising["rows"]:
+            _add_table(doc, rising)
+        cp = model["change_points"]
+        if cp["total"]:
+            more = " …" if cp["total"] > len(cp["assets"]) else ""
+            doc.add_paragraph(f"Change-points ({cp['total']}): {', '.join(cp['assets'])}{more}")
     else:
-        add_paragraph(doc, "No historical series available yet.")
-    if scenarios:
-        add_heading(doc, "Scenarios (90 dagen)", 2)
-        for theme, data in scenarios.items():
-            prob = round(100*data.get("probability_90_days", 0.0), 1)
-            summary = (data.get("semantic_summary") or "").strip()
-            add_paragraph(doc, f"- {theme}: p≈{prob}% {('— ' + summary) if summary else ''}")
-
-    add_heading(doc, "Analyst Review & Sign-off", 1)
-    add_paragraph(doc, "Analyst Name: ________________________")
-    add_paragraph(doc, "Date of Review: ______________________")
-    add_paragraph(doc, "Conclusion: [Agree] [Disagree]")
-    add_paragraph(doc, "Signature: ___________________________")
+        doc.add_paragraph("No historical series available yet.")
+    if model["scenarios"]["rows"]:
+        doc.add_heading("Scenarios (90 dagen)", 2)
+        _add_table(doc, model["scenarios"])
 
+    doc.add_heading("Analyst Review & Sign-off", 1)
+    doc.add_paragraph("\n".join(SIGN_OFF))
     doc.save(path)
+
+
+def write_report(path: str, brief: Dict[str, Any], blindspots: Dict[str, Any], forecast: Dict[str, Any],
+                 scenarios: Dict[str, Any] | None = None, top_n: int = REPORT_TOP_N,
+                 md_template: Optional[str] = None, template_cache: Optional[str] = TEMPLATE_CACHE) -> str:
+    """
+    Renders the brief to path (.docx), or to the .md next to it when python-docx is missing or
+    path ends in .md. md_template is a file with string.Template placeholders (see MARKDOWN_TEMPLATE).
+    Returns the written path.
+    """
+    model = build_report_model(brief, blindspots, forecast, scenarios, top_n)
+    if not _DOCX or path.endswith(".md"):
+        md_path = path.rsplit('.', 1)[0] + ".md"
+        template = None
+        if md_template:
+            with open(md_template, "r", encoding="utf-8") as f:
+                template = f.read()
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(render_markdown(model, template))
+        return md_path
+    render_docx(model, path, template_cache)
+    return path
@@ -0,0 +1,229 @@
+import math
+from typing import List, Dict, Any, Iterable, Tuple
+from ..jsonl_io import write_json, load_json
+
+
+class TDigest:
+    """
+    Minimal merging t-digest for approximate percentiles. Points are buffered and
+    periodically compressed into weighted centroids; two digests merge by pooling
+    their centroids. Small inputs (< compression) stay exact.
+    """
+    def __init__(self, compression: float = 100.0):
+        self.compression = float(compression)
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[float] = []
+
+    @property
+    def count(self) -> float:
+        return sum(w for _, w in self._centroids) + len(self._buffer)
+
+    def add(self, x: float):
+        self._buffer.append(float(x))
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._compress()
+        self._centroids = self._centroids + other._centroids
+        self._compress(force=True)
+        return self
+
+    def _compress(self, force: bool = False):
+        if not self._buffer and not force:
+            return
+        cs = sorted(self._centroids + [(x, 1.0) for x in self._buffer])
+        self._buffer = []
+        if not cs:
+            self._centroids = []
+            return
+        total = sum(w for _, w in cs)
+        out: List[Tuple[float, float]] = []
+        cum = 0.0
+        cur_m, cur_w = cs[0]
+        for m, w in cs[1:]:
+            q = (cum + cur_w + w / 2.0) / total
+            limit = 4.0 * total * q * (1.0 - q) / self.compression
+            if cur_w + w <= max(1.0, limit):
+                cur_m = cur_m + (m - cur_m) * w / (cur_w + w)
+                cur_w += w
+            else:
+                out.append((cur_m, cur_w))
+                cum += cur_w
+                cur_m, cur_w = m, w
+        out.append((cur_m, cur_w))
+        self._centroids = out
+
+    def quantile(self, q: float) -> float:
+        self._compress()
+        cs = self._centroids
+        if not cs:
+            return 0.0
+        if len(cs) == 1:
+            return cs[0][0]
+        total = sum(w for _, w in cs)
+        target = q * total
+        cum = 0.0
+        prev_center, prev_m = None, None
+        for m, w in cs:
+            center = cum + w / 2.0
+            if target <= center:
+                if prev_center is None:
+                    return m
+                t = (target - prev_center) / (center - prev_center)
+                return prev_m + t * (m - prev_m)
+            prev_center, prev_m = center, m
+            cum += w
+        return cs[-1][0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {"compression": self.compression, "centroids": [[m, w] for m, w in self._centroids]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        d = cls(data.get("compression", 100.0))
+        d._centroids = [(float(m), float(w)) for m, w in data.get("centroids", [])]
+        return d
+
+
+class AssetStats:
+    """Running statistics for one asset: sum/mean, Welford variance, max/min, per-source breakdown, digest."""
+    __slots__ = ("n", "sum", "mean", "m2", "max", "min", "by_source", "digest")
+
+    def __init__(self):
+        self.n = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = -math.inf
+        self.min = math.inf
+        self.by_source: Dict[str, List[float]] = {}
+        self.digest = TDigest()
+
+    def add(self, x: float, source_type: str = ""):
+        self.n += 1
+        self.sum += x
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x > self.max:
+            self.max = x
+        if x < self.min:
+            self.min = x
+        st = self.by_source.setdefault(source_type, [0, 0.0])
+        st[0] += 1
+        st[1] += x
+        self.digest.add(x)
+
+    def merge(self, other: "AssetStats") -> "AssetStats":
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        self.min = min(self.min, other.min)
+        for k, (c, s) in other.by_source.items():
+            st = self.by_source.setdefault(k, [0, 0.0])
+            st[0] += c
+            st[1] += s
+        self.digest.merge(other.digest)
+        return self
+
+    def summary(self) -> Dict[str, Any]:
+        var = self.m2 / self.n if self.n > 1 else 0.0
+        return {
+            "avg_e_ai_star": self.sum / max(1, self.n),
+            "max_e_ai_star": self.max if self.n else 0.0,
+            "min_e_ai_star": self.min if self.n else 0.0,
+            "var_e_ai_star": var,
+            "std_e_ai_star": math.sqrt(var),
+            "p50_e_ai_star": self.digest.quantile(0.5),
+            "p90_e_ai_star": self.digest.quantile(0.9),
+            "p99_e_ai_star": self.digest.quantile(0.99),
+            "n": self.n,
+            "by_source_type": {k: {"n": c, "avg_e_ai_star": s / max(1, c)} for k, (c, s) in self.by_source.items()},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n": self.n, "sum": self.sum, "mean": self.mean, "m2": self.m2,
+            "max": self.max if self.n else None, "min": self.min if self.n else None,
+            "by_source": self.by_source, "digest": self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AssetStats":
+        s = cls()
+        s.n = int(data.get("n", 0))
+        s.sum = float(data.get("sum", 0.0))
+        s.mean = float(data.get("mean", 0.0))
+        s.m2 = float(data.get("m2", 0.0))
+        s.max = data["max"] if data.get("max") is not None else -math.inf
+        s.min = data["min"] if data.get("min") is not None else math.inf
+        s.by_source = {k: [int(v[0]), float(v[1])] for k, v in (data.get("by_source") or {}).items()}
+        s.digest = TDigest.from_dict(data.get("digest") or {})
+        return s
+
+
+class AssetAggregator:
+    """
+    Incremental, mergeable per-asset aggregation of e_ai_star. Feed findings one by one
+    (add) or per batch (add_many); merge aggregators from shards or waves; persist with
+    save/load. summary() is a superset of the legacy aggregate_asset_scores output.
+    """
+    def __init__(self):
+        self.assets: Dict[str, AssetStats] = {}
+
+    def add(self, finding: Dict[str, Any]):
+        asset = finding.get("asset","")
+        s = finding.get("score",{}).get("e_ai_star",0.0)
+        stats = self.assets.get(asset)
+        if stats is None:
+            stats = self.assets[asset] = AssetStats()
+        stats.add(s, finding.get("source",{}).get("type","") or "")
+
+    def add_many(self, findings: Iterable[Dict[str, Any]]) -> "AssetAggregator":
+        for f in findings:
+            self.add(f)
+        return self
+
+    def merge(self, other: "AssetAggregator") -> "AssetAggregator":
+        for asset, stats in other.assets.items():
+            mine = self.assets.get(asset)
+            if mine is None:
+                self.assets[asset] = AssetStats().merge(stats)
+            else:
+                mine.merge(stats)
+        return self
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {a: s.summary() for a, s in self.assets.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": 1, "assets": {a: s.to_dict() for a, s in self.assets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AssetAggregator":
+        agg = cls()
+        agg.assets = {a: AssetStats.from_dict(d) for a, d in (data.get("assets") or {}).items()}
+        return agg
+
+    def save(self, path: str):
+        write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path: str) -> "AssetAggregator":
+        return cls.from_dict(load_json(path))
+
+
+def rollup(paths: Iterable[str]) -> AssetAggregator:
+    """Combines saved aggregators (e.g. history/*.asset_agg.json[.gz]) into one cross-run rollup."""
+    agg = AssetAggregator()
+    for p in paths:
+        agg.merge(AssetAggregator.load(p))
+    return agg
@@ -0,0 +1,209 @@
+import hashlib, json, os, re, threading, time
+from bisect import bisect_right
+from itertools import accumulate
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple
+import yaml
+from pydantic import BaseModel, Field
+from .dynamic_parameters import DYNAMIC
+from ..logger import LOGGER
+
+try:
+    import numpy as np
+    _NUMPY = True
+    _NP_STRINGS = hasattr(np, "strings")  # vectorised str ufuncs, NumPy >= 2.0
+except Exception:
+    np = None
+    _NUMPY = False
+    _NP_STRINGS = False
+
+# score_array tests keywords one at a time over the whole column; beyond this many the
+# single regex scan of score_many is cheaper
+VECTOR_KEYWORDS = 32
+
+
+def _trie_pattern(words) -> str:
+    """Prefix-factored alternation; Python's re scans a trie-shaped pattern far faster than a flat one."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    def build(node) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    return build(trie)
+
+class KeywordMatcher:
+    """
+    Compiles all keywords into one prefix-factored regex. A batch of texts is scanned in a
+    single pass; only texts with a hit resolve their exact keyword set, so the result is
+    identical to a separate `kw in text` check per keyword.
+    """
+    def __init__(self, keyword_weights: Dict[str, float]):
+        self.keywords = list(keyword_weights)
+        self.weights = dict(keyword_weights)
+        self._re = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+        # a joined scan needs a separator no keyword can match across
+        self._joinable = all(k and "\n" not in k for k in self.keywords)
+        self._scores: Dict[frozenset, float] = {}
+
+    def matches(self, text: str) -> frozenset:
+        if self._re is None or self._re.search(text) is None:
+            return frozenset()
+        return frozenset(kw for kw in self.keywords if kw in text)
+
+    def _score_key(self, key: frozenset) -> float:
+        s = self._scores.get(key)
+        if s is None:
+            s = 0.0
+            for kw in self.keywords:
+                if kw in key:
+                    s += self.weights[kw]
+            s = self._scores[key] = min(1.0, s)
+        return s
+
+    def score(self, text: str) -> float:
+        return self._score_key(self.matches((text or "").lower()))
+
+    def score_many(self, texts: List[str]) -> List[float]:
+        texts = [(t or "").lower() for t in texts]
+        if self._re is None or not self._joinable:
+            return [self._score_key(self.matches(t)) for t in texts]
+        out = [self._score_key(frozenset())] * len(texts)
+        starts = [0, *accumulate(len(t) + 1 for t in texts)]
+        hits = {bisect_right(starts, m.start()) - 1 for m in self._re.finditer("\n".join(texts))}
+        for i in hits:
+            out[i] = self._score_key(frozenset(kw for kw in self.keywords if kw in texts[i]))
+        return out
+
+    def score_array(self, texts: List[str]):
+        """
+        score_many for a column of strings, as a float64 array. With NumPy >= 2 and few keywords each keyword is one
+        vectorised substring search over the whole column; weights are added in keyword order,
+        so the sums equal _score_key's.
+        """
+        if not _NP_STRINGS or len(self.keywords) > VECTOR_KEYWORDS:
+            return np.asarray(self.score_many(texts), dtype=np.float64)
+        col = np.array(list(map(str.lower, texts)), dtype=np.str_)
+        s = np.zeros(len(col), dtype=np.float64)
+        for kw in self.keywords:
+            s = s + np.where(np.strings.find(col, kw) >= 0, self.weights[kw], 0.0)
+        return np.minimum(s, 1.0)
+
+
+class ScoringModel(BaseModel):
+    """Schema of a scoring-model file (YAML or JSON); defaults mirror DYNAMIC."""
+    version: str = "builtin"
+    weights: Dict[str, float] = Field(default_factory=lambda: dict(DYNAMIC["weights"]))
+    keyword_weights: Dict[str, float] = Field(default_factory=lambda: dict(DYNAMIC["keyword_weights"]))
+    domain_quality: Dict[str, float] = Field(default_factory=lambda: dict(DYNAMIC["domain_quality"]))
+    recency_half_life_days: float = DYNAMIC["recency_half_life_days"]
+
+
+# recency days are whole numbers; one table covers ten years, the rest is computed
+_DECAY_TABLE_DAYS = 3650
+
+class CompiledScorer:
+    """
+    Immutable, ready-to-run form of a scoring model: weight tuple, compiled keyword
+    matcher, domain-quality lookup table and a precomputed recency-decay table.
+    """
+    __slots__ = ("version", "sha256", "source", "weights", "matcher", "domain_quality", "half_life", "_decay_table", "_frozen")
+
+    def __init__(self, model: ScoringModel, sha256: str = "", source: str = ""):
+        w = model.weights
+        hl = float(model.recency_half_life_days)
+        self.version = model.version
+        self.sha256 = sha256
+        self.source = source
+        self.weights: Tuple[float, float, float, float] = (w["M"], w["C"], w["Q"], w["V"])
+        self.matcher = KeywordMatcher(model.keyword_weights)
+        self.domain_quality = MappingProxyType(dict(model.domain_quality))
+        self.half_life = hl
+        self._decay_table = tuple((0.5 ** (d/hl) if hl>0 else 0.0) for d in range(_DECAY_TABLE_DAYS + 1))
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("CompiledScorer is immutable; compile a new model instead")
+        object.__setattr__(self, name, value)
+
+    def decay(self, days) -> float:
+        if days.__class__ is int and 0 <= days <= _DECAY_TABLE_DAYS:
+            return self._decay_table[days]
+        hl = self.half_life
+        return 0.5 ** (days/hl) if hl>0 else 0.0
+
+    def decay_many(self, days):
+        """decay() over an int64 array of day counts: table lookup, other values computed once each."""
+        out = np.take(np.asarray(self._decay_table), np.clip(days, 0, _DECAY_TABLE_DAYS))
+        outside = (days < 0) | (days > _DECAY_TABLE_DAYS)
+        if outside.any():
+            for d in np.unique(days[outside]).tolist():
+                out[days == d] = self.decay(d)
+        return out
+
+    def describe(self) -> Dict[str, str]:
+        return {"version": self.version, "sha256": self.sha256, "path": self.source}
+
+
+def compile_model(params: Dict[str, Any], sha256: str = "", source: str = "") -> CompiledScorer:
+    model = params if isinstance(params, ScoringModel) else ScoringModel(**params)
+    return CompiledScorer(model, sha256=sha256, source=source)
+
+
+def load_scoring_model(path: Optional[str]) -> CompiledScorer:
+    """Loads and compiles a scoring-model file; without a path the built-in DYNAMIC model is used."""
+    if not path:
+        return compile_model(DYNAMIC)
+    with open(path, "rb") as f:
+        blob = f.read()
+    text = blob.decode("utf-8")
+    data = json.loads(text) if path.endswith(".json") else yaml.safe_load(text)
+    scorer = compile_model(data or {}, sha256=hashlib.sha256(blob).hexdigest(), source=path)
+    LOGGER.info("scoring.model_loaded", path=path, version=scorer.version, sha256=scorer.sha256)
+    return scorer
+
+
+class HotScorer:
+    """
+    Holds the active CompiledScorer for long-running services. get() re-checks the model
+    file at most every check_interval seconds and swaps in a recompiled scorer when it
+    changed; a broken file keeps the previous scorer active.
+    """
+    def __init__(self, path: Optional[str], check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self._checked = time.monotonic()
+        self._scorer = load_scoring_model(path)
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime if self.path else None
+        except OSError:
+            return None
+
+    def reload(self) -> CompiledScorer:
+        with self._lock:
+            mtime = self._stat()
+            try:
+                self._scorer = load_scoring_model(self.path)
+                self._mtime = mtime
+            except Exception as e:
+                LOGGER.warn("scoring.model_reload_failed", path=self.path, error=str(e))
+            self._checked = time.monotonic()
+            return self._scorer
+
+    def get(self) -> CompiledScorer:
+        if self.path and time.monotonic() - self._checked >= self.check_interval:
+            if self._stat() != self._mtime:
+                return self.reload()
+            self._checked = time.monotonic()
+        return self._scorer
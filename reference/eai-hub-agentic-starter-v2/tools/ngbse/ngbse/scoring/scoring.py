@@ -1,6 +1,16 @@
 import math, re, datetime
-from typing import List, Dict, Any
+from itertools import repeat
+from typing import List, Dict, Any, Optional
 from .dynamic_parameters import DYNAMIC
+from .aggregate import AssetAggregator
+from .model import KeywordMatcher, CompiledScorer, compile_model
+
+try:
+    import numpy as np
+    _NUMPY = True
+except Exception:
+    np = None
+    _NUMPY = False
 
 def _keyword_score(text: str) -> float:
     score = 0.0
@@ -37,16 +47,182 @@ def score_findings(findings: List[Dict[str,Any]], now_iso: str) -> List[Dict[str
         f["score"] = {"M":M,"C":C,"Q":Q,"V":V,"e_ai_star":e_ai_star}
     return findings
 
-def aggregate_asset_scores(findings: List[Dict[str,Any]]) -> Dict[str,Dict[str,float]]:
-    by_asset = {}
+def _parse_now(now_iso: str) -> Optional[datetime.datetime]:
+    try:
+        return datetime.datetime.fromisoformat(now_iso.replace("Z",""))
+    except Exception:
+        return None
+
+def _recency_days(observed_iso, now: Optional[datetime.datetime]):
+    try:
+        obs = datetime.datetime.fromisoformat(observed_iso.replace("Z",""))
+        return max(0.0, (now - obs).days)
+    except Exception:
+        return 9999
+
+# findings are scored in chunks so the temporary columns stay small
+SCORE_CHUNK_ROWS = 65536
+_M_TYPES = ("ti_post", "pdf")
+_TS_WIDTH = 27  # "YYYY-MM-DDTHH:MM:SS.ffffffZ"
+_EPOCH = datetime.datetime(1970, 1, 1)
+_US_PER_DAY = 86_400_000_000
+
+def _civil_days(y, m, d):
+    """Days since 1970-01-01 for proleptic Gregorian dates (int64 arrays)."""
+    y = y - (m <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * ((m + 9) % 12) + 2) // 5 + d - 1
+    return era * 146097 + yoe * 365 + yoe // 4 - yoe // 100 + doy - 719468
+
+# per position of "YYYY-MM-DDTHH:MM:SS.ffffff": a digit ('0' with limit 9) or one exact character
+_TS_BASE = np.array([48, 48, 48, 48, 45, 48, 48, 45, 48, 48, 84, 48, 48, 58, 48, 48, 58, 48, 48, 46,
+                     48, 48, 48, 48, 48, 48], dtype=np.uint32) if _NUMPY else None
+_TS_LIMIT = np.where(_TS_BASE == 48, 9, 0).astype(np.uint32) if _NUMPY else None
+_TS_LAYOUTS = (10, 19, 23, 26)  # date, date + time, + milliseconds, + microseconds
+_MONTH_DAYS = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) if _NUMPY else None
+
+def _digits(v, a: int, b: int):
+    return v[:, a:b] @ (10 ** np.arange(b - a - 1, -1, -1))
+
+def _observed_days(observed: List[Any], now: Optional[datetime.datetime]):
+    """
+    _recency_days for a whole column. Naive ISO timestamps (YYYY-MM-DD, optionally with a T or
+    space and HH:MM:SS[.fff|.ffffff], optionally ending in Z) are validated and converted in one
+    pass over their code points; everything else (offsets, other layouts, impossible dates,
+    non-strings) goes through _recency_days once per distinct value, so the result is identical.
+    """
+    n = len(observed)
+    days = np.zeros(n, dtype=np.int64)
+    fast = np.zeros(n, dtype=bool)
+    if now is not None and now.tzinfo is None and n:
+        strs = [o if o.__class__ is str else "" for o in observed]
+        lens = np.fromiter(map(len, strs), dtype=np.int64, count=n)
+        c = np.array(strs, dtype=f"U{_TS_WIDTH}").view(np.uint32).reshape(n, _TS_WIDTH)
+        z = c[np.arange(n), np.clip(lens - 1, 0, _TS_WIDTH - 1)] == ord("Z")
+        core = lens - (z & (lens > 0))
+        # a space may stand in for the T; positions past the layout's length are not checked
+        c[:, 10] = np.where(c[:, 10] == 32, 84, c[:, 10])
+        ok = (c[:, :26] - _TS_BASE) <= _TS_LIMIT
+        ok |= np.arange(26) >= core[:, None]
+        fast = np.isin(core, _TS_LAYOUTS) & ok.all(axis=1)
+        v = c[:, :26].astype(np.int64) - 48
+        y, mo, d = _digits(v, 0, 4), _digits(v, 5, 7), _digits(v, 8, 10)
+        timed = core >= 19
+        hh, mi, ss = (np.where(timed, _digits(v, a, a + 2), 0) for a in (11, 14, 17))
+        us = np.where(core == 26, _digits(v, 20, 26), np.where(core == 23, _digits(v, 20, 23) * 1000, 0))
+        leap = (y % 4 == 0) & ((y % 100 != 0) | (y % 400 == 0))
+        mdays = _MONTH_DAYS[np.clip(mo, 0, 12)] + ((mo == 2) & leap)
+        fast &= (y >= 1) & (mo >= 1) & (mo <= 12) & (d >= 1) & (d <= mdays) & (hh <= 23) & (mi <= 59) & (ss <= 59)
+        obs_us = (_civil_days(y, mo, d) * 86400 + hh * 3600 + mi * 60 + ss) * 1_000_000 + us
+        now_us = (now - _EPOCH) // datetime.timedelta(microseconds=1)
+        days = np.where(fast, np.maximum((now_us - obs_us) // _US_PER_DAY, 0), 0)
+    slow = np.flatnonzero(~fast).tolist()
+    if slow:
+        memo: Dict[Any, Any] = {}
+        for i in slow:
+            o = observed[i]
+            try:
+                r = memo[o]
+            except (KeyError, TypeError):
+                r = _recency_days(o, now)
+                try:
+                    memo[o] = r
+                except TypeError:
+                    pass
+            days[i] = int(r)
+    return days
+
+def _factorize(values: List[Any]):
+    """(distinct values in first-seen order, int index per row), without a Python loop per row."""
+    codes = {v: i for i, v in enumerate(dict.fromkeys(values))}
+    return list(codes) or [None], np.fromiter(map(codes.__getitem__, values), dtype=np.intp, count=len(values))
+
+def score_columns(types: List[Any], domains: List[Any], quality: List[Any], observed: List[Any], texts: List[str],
+                  now_iso: str, scorer: Optional[CompiledScorer] = None) -> Dict[str, Any]:
+    """
+    Columnar scoring core (requires NumPy): one list per input field, float64 arrays M, C, Q, V
+    and e_ai_star out. Source types and domains are factorised once and their weights looked
+    up with np.take, timestamps are converted in one vectorised pass (_observed_days),
+    keywords are matched per column (KeywordMatcher.score_array) and the weighted sum runs
+    over whole arrays. Per finding the values equal score_findings'.
+    """
+    if scorer is None:
+        scorer = compile_model(DYNAMIC)
+    wM, wC, wQ, wV = scorer.weights
+    type_values, t = _factorize(types)
+    M = np.take(np.array([1.0 if x in _M_TYPES else 0.6 for x in type_values]), t)
+    dq = scorer.domain_quality
+    domain_values, d = _factorize(domains)
+    Q = (np.fromiter(map(float, quality), dtype=np.float64, count=len(quality))
+         * np.take(np.array([dq.get((x or "").lower(), 0.5) for x in domain_values]), d))
+    V = scorer.decay_many(_observed_days(observed, _parse_now(now_iso)))
+    C = scorer.matcher.score_array(texts)
+    return {"M": M, "C": C, "Q": Q, "V": V, "e_ai_star": M*wM + C*wC + Q*wQ + V*wV}
+
+def _score_rows(findings: List[Dict[str,Any]], now_iso: str, scorer: CompiledScorer) -> List[Dict[str,Any]]:
+    """score_findings_batch without NumPy: one pass per finding with memoised recency."""
+    domain_quality = scorer.domain_quality
+    decay = scorer.decay
+    wM, wC, wQ, wV = scorer.weights
+    now = _parse_now(now_iso)
+    days_cache: Dict[Any, Any] = {}
+    texts = []
+    parts = []
     for f in findings:
-        asset = f.get("asset","")
-        s = f.get("score",{}).get("e_ai_star",0.0)
-        if asset not in by_asset:
-            by_asset[asset] = {"sum":0.0,"n":0}
-        by_asset[asset]["sum"] += s
-        by_asset[asset]["n"] += 1
-    for a in list(by_asset.keys()):
-        agg = by_asset[a]
-        by_asset[a] = {"avg_e_ai_star": (agg["sum"]/max(1,agg["n"]))}
-    return by_asset
+        raw = f.get("raw",{})
+        source = f.get("source",{})
+        domain = (source.get("domain") or "").lower()
+        texts.append(f"{raw.get('title') or ''} {source.get('url','')}")
+        observed = f.get("timestamps",{}).get("observed","")
+        try:
+            days = days_cache[observed]
+        except (KeyError, TypeError):
+            days = _recency_days(observed, now)
+            try:
+                days_cache[observed] = days
+            except TypeError:
+                pass
+        parts.append((1.0 if source.get("type") in _M_TYPES else 0.6,
+                      float(f.get("quality",{}).get("q",0.5)) * domain_quality.get(domain,0.5),
+                      decay(days)))
+    for f, (m, q, v), c in zip(findings, parts, scorer.matcher.score_many(texts)):
+        f["score"] = {"M":m,"C":c,"Q":q,"V":v,"e_ai_star":m*wM + c*wC + q*wQ + v*wV}
+    return findings
+
+_EMPTY: Dict[str, Any] = {}
+
+def _field(rows: List[Dict[str, Any]], key: str, default: Any = None) -> List[Any]:
+    """[row.get(key, default) for row in rows], with the loop in C."""
+    return list(map(dict.get, rows, repeat(key), repeat(default)))
+
+def score_findings_batch(findings: List[Dict[str,Any]], now_iso: str, params: Optional[Dict[str,Any]] = None, scorer: Optional[CompiledScorer] = None) -> List[Dict[str,Any]]:
+    """
+    Batch variant of score_findings with identical output. Per chunk of SCORE_CHUNK_ROWS the
+    inputs are gathered into columns and scored by score_columns; without NumPy a
+    row-wise pass with one compiled keyword scan is used. Pass a compiled scorer to avoid
+    recompiling per call.
+    """
+    if not findings:
+        return findings
+    if scorer is None:
+        scorer = compile_model(params or DYNAMIC)
+    if not _NUMPY:
+        return _score_rows(findings, now_iso, scorer)
+    for lo in range(0, len(findings), SCORE_CHUNK_ROWS):
+        chunk = findings[lo:lo + SCORE_CHUNK_ROWS]
+        sources = _field(chunk, "source", _EMPTY)
+        cols = score_columns(
+            _field(sources, "type"),
+            _field(sources, "domain"),
+            _field(_field(chunk, "quality", _EMPTY), "q", 0.5),
+            _field(_field(chunk, "timestamps", _EMPTY), "observed", ""),
+            [f"{t or ''} {u}" for t, u in zip(_field(_field(chunk, "raw", _EMPTY), "title"), _field(sources, "url", ""))],
+            now_iso, scorer)
+        for f, m, c, q, v, e in zip(chunk, *(cols[k].tolist() for k in ("M", "C", "Q", "V", "e_ai_star"))):
+            f["score"] = {"M":m,"C":c,"Q":q,"V":v,"e_ai_star":e}
+    return findings
+
+def aggregate_asset_scores(findings: List[Dict[str,Any]]) -> Dict[str,Dict[str,Any]]:
+    """One-shot wrapper around AssetAggregator; keeps avg_e_ai_star and adds richer statistics."""
+    return AssetAggregator().add_many(findings).summary()
@@ -0,0 +1,121 @@
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional
+from .scenario_engine import DEFAULT_MATCHER, offer_example
+from .theme_matcher import ThemeMatcher
+
+# brief uses the first 10 findings as examples, seedgen the first 20
+N_EXAMPLES = 20
+
+
+def coverage_category(source_type: str) -> str:
+    if source_type == "pdf": return "Archive/PDF"
+    if source_type == "ti_post": return "TI/Blog"
+    if source_type == "news": return "News"
+    return "Web"
+
+
+class BlindspotAnalyzer:
+    """
+    Single-pass blindspot analysis. One add() per finding updates the coverage
+    counters, the observed-day histogram, the high-score/low-quality asset sets,
+    the theme buckets (with their top-scoring examples, one per asset) and the
+    example window together. Results match coverage_gap, recency_gap,
+    confidence_gap and group_by_themes; analyzers from shards merge.
+    """
+    def __init__(self, theme_matcher: Optional[ThemeMatcher] = None):
+        self.matcher = theme_matcher or DEFAULT_MATCHER
+        self.categories: Counter = Counter()
+        self.days: Counter = Counter()
+        self.high_score_assets = set()
+        self.low_quality_assets = set()
+        self.themes: Dict[str, Dict[str, Any]] = {}
+        self.examples: List[Dict[str, Any]] = []
+        self.best: Dict[str, Dict[str, Any]] = {}  # asset -> highest-scoring finding
+
+    def add(self, f: Dict[str, Any]):
+        self.categories[coverage_category(f.get("source",{}).get("type",""))] += 1
+        self.days[(f.get("timestamps",{}).get("observed","") or "")[:10]] += 1
+        if f.get("score",{}).get("e_ai_star",0.0) >= 0.7:
+            self.high_score_assets.add(f.get("asset",""))
+        if f.get("quality",{}).get("q",0.0) < 0.5:
+            self.low_quality_assets.add(f.get("asset",""))
+        for theme, hits in self.matcher.assign(f):
+            bucket = self.themes.get(theme)
+            if bucket is None:
+                bucket = self.themes[theme] = self._bucket()
+            bucket["n"] += 1
+            bucket["sum"] += f.get("score", {}).get("e_ai_star", 0.0)
+            if "hits" in bucket:
+                bucket["hits"] += hits
+            offer_example(bucket["examples"], f)
+        if len(self.examples) < N_EXAMPLES:
+            self.examples.append(f)
+        asset = f.get("asset","")
+        cur = self.best.get(asset)
+        if cur is None or f.get("score",{}).get("e_ai_star",0.0) > cur.get("score",{}).get("e_ai_star",0.0):
+            self.best[asset] = f
+
+    def _bucket(self) -> Dict[str, Any]:
+        b = {"n": 0, "sum": 0.0, "examples": []}
+        if self.matcher.count_hits:
+            b["hits"] = 0
+        return b
+
+    def add_many(self, findings: Iterable[Dict[str, Any]]) -> "BlindspotAnalyzer":
+        for f in findings:
+            self.add(f)
+        return self
+
+    def merge(self, other: "BlindspotAnalyzer") -> "BlindspotAnalyzer":
+        self.categories.update(other.categories)
+        self.days.update(other.days)
+        self.high_score_assets |= other.high_score_assets
+        self.low_quality_assets |= other.low_quality_assets
+        for theme, b in other.themes.items():
+            mine = self.themes.get(theme)
+            if mine is None:
+                mine = self.themes[theme] = self._bucket()
+            mine["n"] += b["n"]
+            mine["sum"] += b["sum"]
+            if "hits" in mine:
+                mine["hits"] += b.get("hits", 0)
+            for f in b["examples"]:
+                offer_example(mine["examples"], f)
+        self.examples = (self.examples + other.examples)[:N_EXAMPLES]
+        for asset, f in other.best.items():
+            cur = self.best.get(asset)
+            if cur is None or f.get("score",{}).get("e_ai_star",0.0) > cur.get("score",{}).get("e_ai_star",0.0):
+                self.best[asset] = f
+        return self
+
+    def coverage(self) -> Dict[str, Any]:
+        total = sum(self.categories.values())
+        if total == 0:
+            return {"ratios": {}, "max_category": "", "imbalance": 0.0}
+        ratios = {k: v/total for k,v in self.categories.items()}
+        max_cat = max(ratios, key=ratios.get) if ratios else ""
+        imbalance = (max(ratios.values()) - min(ratios.values())) if len(ratios)>1 else 0.0
+        return {"ratios": ratios, "max_category": max_cat, "imbalance": imbalance}
+
+    def recency(self) -> Dict[str, Any]:
+        if not self.days: return {"spike": False, "detail": {}}
+        peak_day, peak_count = max(self.days.items(), key=lambda kv: kv[1])
+        spike = peak_count >= max(3, int(0.7*sum(self.days.values())))
+        return {"spike": spike, "detail": dict(self.days)}
+
+    def confidence(self) -> Dict[str, Any]:
+        risky = sorted(self.high_score_assets & self.low_quality_assets)
+        return {"risky_assets": risky, "n": len(risky)}
+
+    def result(self) -> Dict[str, Any]:
+        return {"coverage": self.coverage(), "recency": self.recency(), "confidence": self.confidence()}
+
+    def top_findings(self) -> List[Dict[str, Any]]:
+        """Highest-scoring finding per asset, best first (LLM prompt candidates)."""
+        return sorted(self.best.values(), key=lambda f: f.get("score",{}).get("e_ai_star",0.0), reverse=True)
+
+    def theme_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Theme buckets in group_by_themes order, ready for build_scenarios(theme_stats=...)."""
+        known = self.matcher.order()
+        order = known + [t for t in self.themes if t not in known]
+        return {t: self.themes[t] for t in order if t in self.themes}
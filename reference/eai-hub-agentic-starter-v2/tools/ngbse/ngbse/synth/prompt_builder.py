@@ -0,0 +1,92 @@
+import json
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# Static instruction prefixes: identical across calls so provider-side prompt caching can reuse them.
+BRIEF_SYSTEM = ("You are a Dutch security analyst. Produce concise BLUF and 3 concrete actions. "
+                "Schrijf een beknopte NL BLUF (2-3 zinnen) + 3 acties. Wees feitelijk, geen geheimen. "
+                "Input: JSON met top_assets en examples (hoogste score eerst).")
+SCENARIO_SYSTEM = ("You are a Dutch security analyst. Write concise, factual risk summaries. "
+                   "Maak een beknopte NL-samenvatting (2-3 zinnen), zonder geheimen. "
+                   "Input: JSON met theme, avg_eai_score, evidence_count en examples.")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, deterministic token estimate (~4 UTF-8 bytes per token for JSON/English/Dutch)."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def short_url(url: Optional[str]) -> Optional[str]:
+    """Drops query and fragment: they rarely help a summary and may carry signatures or tokens."""
+    if not url:
+        return url
+    try:
+        p = urlsplit(url)
+    except ValueError:
+        return url
+    return urlunsplit((p.scheme, p.netloc, p.path, "", "")) if p.netloc else url
+
+
+def compact(obj: Any) -> Any:
+    """Removes empty values recursively and rounds floats, so examples carry only information."""
+    if isinstance(obj, dict):
+        out = {k: compact(v) for k, v in obj.items()}
+        return {k: v for k, v in out.items() if v not in (None, "", [], {})}
+    if isinstance(obj, list):
+        return [compact(v) for v in obj]
+    if isinstance(obj, float):
+        return round(obj, 3)
+    return obj
+
+
+class PromptBuilder:
+    """
+    Packs the most informative findings into LLMConfig.max_input_tokens: candidates are
+    ranked by e_ai_star, deduplicated by asset and added until the budget (after the static
+    system prefix and the header) is used up. Output tokens are capped at max_output_tokens.
+    """
+    def __init__(self, max_input_tokens: int = 12000, max_output_tokens: int = 1500):
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+
+    @classmethod
+    def from_config(cls, llm_cfg) -> "PromptBuilder":
+        return cls(int(getattr(llm_cfg, "max_input_tokens", 12000)), int(getattr(llm_cfg, "max_output_tokens", 1500)))
+
+    def output_tokens(self, requested: int) -> int:
+        return max(1, min(int(requested), self.max_output_tokens))
+
+    @staticmethod
+    def rank(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        seen = set()
+        out = []
+        for f in sorted(findings, key=lambda f: f.get("score", {}).get("e_ai_star", 0.0), reverse=True):
+            asset = f.get("asset")
+            if asset in seen:
+                continue
+            seen.add(asset)
+            out.append(f)
+        return out
+
+    def pack(self, system_prompt: str, header: Dict[str, Any], findings: List[Dict[str, Any]],
+             example: Callable[[Dict[str, Any]], Dict[str, Any]], limit: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Returns (user_prompt, payload) with header plus as many ranked examples as fit."""
+        header = compact(header)
+        budget = self.max_input_tokens - estimate_tokens(system_prompt) - estimate_tokens(_dumps(header)) - 8
+        examples: List[Dict[str, Any]] = []
+        used = 0
+        for f in self.rank(findings):
+            if limit is not None and len(examples) >= limit:
+                break
+            ex = compact(example(f))
+            cost = estimate_tokens(_dumps(ex)) + 1
+            if used + cost > budget:
+                break
+            examples.append(ex)
+            used += cost
+        payload = {**header, "examples": examples}
+        return _dumps(payload), payload
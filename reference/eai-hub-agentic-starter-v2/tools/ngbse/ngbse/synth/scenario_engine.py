@@ -1,6 +1,11 @@
-import json
-from typing import Dict, List, Any, Literal
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Any, Literal, Optional
 from ..llm_client import LLMClient
+from ..llm_batch import batch_request
+from ..jsonl_io import write_jsonl
+from .theme_matcher import ThemeMatcher
+from .prompt_builder import PromptBuilder, SCENARIO_SYSTEM, short_url
 
 
 def _estimate_probability(avg_score: float, evidence_count: int, prior: float = 0.10) -> float:
@@ -9,69 +14,137 @@ def _estimate_probability(avg_score: float, evidence_count: int, prior: float =
     return odds / (1 + odds)
 
 
-def group_by_themes(findings: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    # lightweight heuristics; can be made configurable later
-    themes = {
-        "Public_Code_Exposure": ["github", "oidc", "token", "secret"],
-        "Exposed_Cloud_Signed_URLs": ["sv=", "signature=", "blob.core.windows.net", "x-amz-signature", "x-goog-signature"],
-        "Exposed_IoT_Infrastructure": ["mqtt", "port:1883", "anonymous"],
-        "Archive_Only_Findings": ["web.archive.org", "wayback"],
-    }
-    grouped: Dict[str, List[Dict[str, Any]]] = {k: [] for k in themes}
+# built-in defaults; override with a themes.yml (config: themes.path)
+THEMES = {
+    "Public_Code_Exposure": ["github", "oidc", "token", "secret"],
+    "Exposed_Cloud_Signed_URLs": ["sv=", "signature=", "blob.core.windows.net", "x-amz-signature", "x-goog-signature"],
+    "Exposed_IoT_Infrastructure": ["mqtt", "port:1883", "anonymous"],
+    "Archive_Only_Findings": ["web.archive.org", "wayback"],
+}
+N_THEME_EXAMPLES = 8
+
+
+DEFAULT_MATCHER = ThemeMatcher(THEMES)
+
+
+def _e(f: Dict[str, Any]) -> float:
+    return f.get("score", {}).get("e_ai_star", 0.0)
+
+
+def offer_example(examples: List[Dict[str, Any]], f: Dict[str, Any], k: int = N_THEME_EXAMPLES):
+    """
+    Keeps examples as the k highest-scoring findings of distinct assets, best first: the
+    prompt candidates PromptBuilder.pack ranks and deduplicates by asset. Ties keep the earlier finding.
+    """
+    asset, e = f.get("asset"), _e(f)
+    for i, cur in enumerate(examples):
+        if cur.get("asset") == asset:
+            if e <= _e(cur):
+                return
+            del examples[i]
+            break
+    else:
+        if len(examples) >= k:
+            if e <= _e(examples[-1]):
+                return
+            examples.pop()
+    i = len(examples)
+    while i and _e(examples[i - 1]) < e:
+        i -= 1
+    examples.insert(i, f)
+
+
+def classify_theme(f: Dict[str, Any], matcher: Optional[ThemeMatcher] = None) -> Optional[str]:
+    """First matching theme, High_Risk_Generic for unthemed high scores, else None."""
+    return (matcher or DEFAULT_MATCHER).classify(f)
+
+
+def group_by_themes(findings: List[Dict[str, Any]], matcher: Optional[ThemeMatcher] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Theme -> findings; with a multi_label matcher a finding can appear under several themes."""
+    matcher = matcher or DEFAULT_MATCHER
+    grouped: Dict[str, List[Dict[str, Any]]] = {k: [] for k in matcher.order()}
     for f in findings:
-        text = (f.get("source", {}).get("url", "") + " " + f.get("asset", "")).lower()
-        assigned = False
-        for theme, kws in themes.items():
-            if any(k in text for k in kws):
-                grouped[theme].append(f)
-                assigned = True
-                break
-        if not assigned and f.get("score", {}).get("e_ai_star", 0.0) >= 0.75:
-            grouped.setdefault("High_Risk_Generic", []).append(f)
+        for theme, _ in matcher.assign(f):
+            grouped[theme].append(f)
     return {k: v for k, v in grouped.items() if v}
 
 
-def build_scenarios(findings: List[Dict[str, Any]], mode: Literal["none", "prompt", "api"] = "none", provider_priority: List[str] | None = None) -> Dict[str, Dict[str, Any]]:
-    groups = group_by_themes(findings)
-    out: Dict[str, Dict[str, Any]] = {}
-    client = LLMClient(provider_priority or ["openai", "azure_openai", "anthropic"]) if mode == "api" else None
+def summarize_groups(groups: Dict[str, List[Dict[str, Any]]], matcher: Optional[ThemeMatcher] = None) -> Dict[str, Dict[str, Any]]:
+    """Reduces theme groups to what build_scenarios needs: count, score sum and top examples (offer_example)."""
+    out = {}
     for theme, items in groups.items():
-        avg = sum(i.get("score", {}).get("e_ai_star", 0.0) for i in items) / max(1, len(items))
-        prob = _estimate_probability(avg, len(items))
-        summary = ""
-        if mode in ("prompt", "api"):
-            payload = {
-                "theme": theme,
-                "avg_eai_score": round(avg, 3),
-                "evidence_count": len(items),
-                "examples": [
-                    {
-                        "asset": it.get("asset"),
-                        "url": it.get("source", {}).get("url"),
-                        "type": it.get("source", {}).get("type"),
-                    }
-                    for it in items[:8]
-                ],
-                "instructions": "Maak een beknopte NL-samenvatting (2-3 zinnen), zonder geheimen."
-            }
-            if mode == "api" and client:
-                system_prompt = "You are a Dutch security analyst. Write concise, factual risk summaries."
-                user_prompt = json.dumps(payload, ensure_ascii=False)
-                summary = client.call(system_prompt, user_prompt, max_tokens=300, temperature=0.2) or ""
-            else:
-                # save prompt for manual web LLM use
-                try:
-                    with open("out/prompt.scenarios.json", "w", encoding="utf-8") as h:
-                        json.dump(payload, h, ensure_ascii=False, indent=2)
-                except Exception:
-                    pass
+        examples: List[Dict[str, Any]] = []
+        for f in items:
+            offer_example(examples, f)
+        out[theme] = {"n": len(items), "sum": sum(_e(f) for f in items), "examples": examples}
+    if matcher is not None and matcher.count_hits:
+        idx = {t: i for i, t in enumerate(matcher.theme_names)}
+        for theme, items in groups.items():
+            out[theme]["hits"] = sum(matcher.hits(f).get(idx[theme], 0) for f in items) if theme in idx else 0
+    return out
+
+
+def build_scenarios(findings: List[Dict[str, Any]], mode: Literal["none", "prompt", "api", "batch"] = "none", provider_priority: List[str] | None = None, theme_stats: Optional[Dict[str, Dict[str, Any]]] = None, matcher: Optional[ThemeMatcher] = None,
+                    out_dir: Optional[str] = None, executor: Optional[Executor] = None, max_in_flight: int = 4, client: Optional[LLMClient] = None,
+                    builder: Optional[PromptBuilder] = None, batch: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    theme_stats (e.g. from BlindspotAnalyzer) skips regrouping the findings; matcher overrides the built-in THEMES.
+    In api mode the per-theme LLM calls run concurrently, on the given executor (shared with the brief)
+    or on a private pool of max_in_flight threads; output order always follows theme_stats.
+    Prompt mode writes one JSONL line per theme to <out_dir>/prompt.scenarios.jsonl.
+    Prompts are packed by builder (token budget, ranked and deduplicated examples).
+    Batch mode appends one OpenAI batch request per theme (custom_id scenario:<theme>) to `batch`;
+    summaries are filled in later by `ngbse llm-collect`.
+    """
+    if theme_stats is None:
+        theme_stats = summarize_groups(group_by_themes(findings, matcher), matcher)
+    builder = builder or PromptBuilder()
+    out: Dict[str, Dict[str, Any]] = {}
+    payloads: Dict[str, Any] = {}  # theme -> (user_prompt, payload)
+    for theme, stats in theme_stats.items():
+        n, items = stats["n"], stats["examples"]
+        avg = stats["sum"] / max(1, n)
+        if mode in ("prompt", "api", "batch"):
+            header = {"theme": theme, "avg_eai_score": round(avg, 3), "evidence_count": n}
+            payloads[theme] = builder.pack(SCENARIO_SYSTEM, header, items, lambda it: {
+                "asset": it.get("asset"),
+                "url": short_url(it.get("source", {}).get("url")),
+                "type": it.get("source", {}).get("type"),
+            }, limit=N_THEME_EXAMPLES)
         out[theme] = {
             "future_scenario": theme.replace("_", " "),
-            "probability_90_days": prob,
-            "semantic_summary": summary,
+            "probability_90_days": _estimate_probability(avg, n),
+            "semantic_summary": "",
             "avg_eai_score": round(avg, 3),
-            "evidence_count": len(items),
+            "evidence_count": n,
         }
-    return out
-
+        if "hits" in stats:
+            out[theme]["keyword_hits"] = stats["hits"]
 
+    if mode == "api" and payloads:
+        client = client or LLMClient(provider_priority or ["openai", "azure_openai", "anthropic"])
+        pool = executor or ThreadPoolExecutor(max_workers=max(1, max_in_flight))
+        try:
+            futures = {
+                theme: pool.submit(client.call, SCENARIO_SYSTEM, user_prompt, max_tokens=builder.output_tokens(300), temperature=0.2)
+                for theme, (user_prompt, _) in payloads.items()
+            }
+            for theme, fut in futures.items():
+                try:
+                    out[theme]["semantic_summary"] = fut.result() or ""
+                except Exception:
+                    pass
+        finally:
+            if executor is None:
+                pool.shutdown(wait=True)
+    elif mode == "batch" and payloads and batch is not None:
+        for theme, (user_prompt, _) in payloads.items():
+            batch.append(batch_request(f"scenario:{theme}", SCENARIO_SYSTEM, user_prompt, builder.output_tokens(300), 0.2))
+    elif mode == "prompt" and payloads:
+        # save prompts for manual web LLM use, one line per theme
+        try:
+            write_jsonl(os.path.join(out_dir or "out", "prompt.scenarios.jsonl"),
+                        ({"system": SCENARIO_SYSTEM, **payload} for _, payload in payloads.values()))
+        except Exception:
+            pass
+    return out
@@ -0,0 +1,137 @@
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+import yaml
+
+try:
+    import ahocorasick  # pyahocorasick, optional C implementation
+    _PYAHO = True
+except Exception:
+    ahocorasick = None
+    _PYAHO = False
+
+HIGH_RISK_THEME = "High_Risk_Generic"
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton: one left-to-right scan reports every
+    occurrence of every pattern, independent of the number of patterns.
+    Each pattern carries a payload (here: the ids of the themes that use it).
+    """
+    def __init__(self, patterns: Dict[str, Tuple[int, ...]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, ...], ...]] = [()]
+        for pattern, payload in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] = self._out[node] + (payload,)
+        # breadth-first failure links; depth-1 nodes fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_payloads(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+
+class ThemeMatcher:
+    """
+    Classifies findings into themes with one automaton scan over url + asset.
+    Default (single-label) semantics equal the original first-match-wins loop:
+    the earliest configured theme with any keyword hit wins; unthemed findings
+    with e_ai_star >= high_risk_threshold go to High_Risk_Generic. multi_label
+    assigns every matching theme; count_hits reports keyword occurrences per theme.
+    """
+    def __init__(self, themes: Dict[str, List[str]], high_risk_threshold: float = 0.75,
+                 multi_label: bool = False, count_hits: bool = False):
+        self.theme_names = list(themes)
+        self.high_risk_threshold = high_risk_threshold
+        self.multi_label = multi_label
+        self.count_hits = count_hits
+        by_keyword: Dict[str, List[int]] = {}
+        for idx, (theme, kws) in enumerate(themes.items()):
+            for kw in kws or []:
+                kw = str(kw).lower()
+                if kw and idx not in by_keyword.setdefault(kw, []):
+                    by_keyword[kw].append(idx)
+        patterns = {kw: tuple(ids) for kw, ids in by_keyword.items()}
+        if _PYAHO and patterns:
+            self._aho = ahocorasick.Automaton()
+            for kw, ids in patterns.items():
+                self._aho.add_word(kw, ids)
+            self._aho.make_automaton()
+            self._ac = None
+        else:
+            self._aho = None
+            self._ac = AhoCorasick(patterns) if patterns else None
+
+    def _payloads(self, text: str):
+        if self._aho is not None:
+            for _, ids in self._aho.iter(text):
+                yield ids
+        elif self._ac is not None:
+            yield from self._ac.iter_payloads(text)
+
+    def hits(self, f: Dict[str, Any]) -> Dict[int, int]:
+        text = (f.get("source", {}).get("url", "") + " " + f.get("asset", "")).lower()
+        counts: Dict[int, int] = {}
+        for ids in self._payloads(text):
+            for i in ids:
+                counts[i] = counts.get(i, 0) + 1
+        return counts
+
+    def assign(self, f: Dict[str, Any]) -> List[Tuple[str, int]]:
+        """[(theme, keyword_hits)] for a finding; at most one entry unless multi_label."""
+        counts = self.hits(f)
+        if counts:
+            ids = sorted(counts) if self.multi_label else [min(counts)]
+            return [(self.theme_names[i], counts[i]) for i in ids]
+        if f.get("score", {}).get("e_ai_star", 0.0) >= self.high_risk_threshold:
+            return [(HIGH_RISK_THEME, 0)]
+        return []
+
+    def classify(self, f: Dict[str, Any]) -> Optional[str]:
+        counts = self.hits(f)
+        if counts:
+            return self.theme_names[min(counts)]
+        if f.get("score", {}).get("e_ai_star", 0.0) >= self.high_risk_threshold:
+            return HIGH_RISK_THEME
+        return None
+
+    def order(self) -> List[str]:
+        return self.theme_names + [HIGH_RISK_THEME]
+
+
+def load_theme_matcher(path: Optional[str], multi_label: bool = False, count_hits: bool = False,
+                       default_themes: Optional[Dict[str, List[str]]] = None) -> ThemeMatcher:
+    """Loads themes from YAML ({themes: {name: [keywords]}, high_risk_threshold: ...}); without a path uses default_themes."""
+    data: Dict[str, Any] = {}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    themes = data.get("themes") or default_themes or {}
+    return ThemeMatcher(themes, high_risk_threshold=float(data.get("high_risk_threshold", 0.75)),
+                        multi_label=multi_label, count_hits=count_hits)
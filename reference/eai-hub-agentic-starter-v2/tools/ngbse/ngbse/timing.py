@@ -0,0 +1,31 @@
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any
+from .logger import LOGGER
+
+def _iso(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + f".{int((ts % 1) * 1000):03d}Z"
+
+class StageTimer:
+    """Records wall-clock start/end per pipeline stage and logs a stage.done event for each."""
+    def __init__(self):
+        self.started = time.time()
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            self.stages.append({"stage": name, "start": _iso(start), "end": _iso(time.time()), "seconds": round(seconds, 4)})
+            LOGGER.info("stage.done", stage=name, seconds=round(seconds, 4))
+
+    def summary(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for s in self.stages:
+            out[s["stage"]] = round(out.get(s["stage"], 0.0) + s["seconds"], 4)
+        out["total"] = round(time.time() - self.started, 4)
+        return out
@@ -1,29 +1,47 @@
-import hashlib, json, re
-from typing import List, Dict
+import hashlib, io, re
+
+IO_BUFFER = 1 << 20
 
 def sha256_file(path: str) -> str:
     h = hashlib.sha256()
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        for chunk in iter(lambda: f.read(IO_BUFFER), b""):
             h.update(chunk)
     return h.hexdigest()
 
+class _HashingRaw(io.RawIOBase):
+    def __init__(self, path: str):
+        self._f = open(path, "wb", buffering=0)
+        self.sha = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        n = self._f.write(b)
+        self.sha.update(memoryview(b)[:n])
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+class HashingFile(io.BufferedWriter):
+    """
+    Buffered binary writer that computes the SHA-256 of exactly the bytes that reach the file,
+    so an artifact's digest is known when it is closed without reading it back. Wrap it in
+    io.TextIOWrapper or gzip.GzipFile for text or compressed output.
+    """
+    def __init__(self, path: str, buffer_size: int = IO_BUFFER):
+        super().__init__(_HashingRaw(path), buffer_size)
+
+    def hexdigest(self) -> str:
+        if not self.closed:
+            self.flush()
+        return self.raw.sha.hexdigest()
+
 def normalize_asset(s: str) -> str:
     s = (s or "").strip().lower()
     s = re.sub(r"\s+", " ", s)
     return s
-
-def load_jsonl(path: str) -> List[Dict]:
-    data = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            data.append(json.loads(line))
-    return data
-
-def write_jsonl(path: str, rows: List[Dict]):
-    with open(path, "w", encoding="utf-8") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
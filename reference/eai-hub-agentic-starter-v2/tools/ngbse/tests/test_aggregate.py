@@ -0,0 +1,115 @@
+import random
+import statistics
+import pytest
+from ngbse.scoring.aggregate import TDigest, AssetStats, AssetAggregator, rollup
+from ngbse.scoring.scoring import aggregate_asset_scores
+
+
+def _findings(n=3000, seed=7):
+    rng = random.Random(seed)
+    return [{"asset": f"a{i % 5}.example.com", "source": {"type": ["web", "pdf", "ti_post"][i % 3]},
+             "score": {"e_ai_star": rng.betavariate(2, 5)}} for i in range(n)]
+
+
+def _legacy_avg(findings):
+    by_asset = {}
+    for f in findings:
+        agg = by_asset.setdefault(f.get("asset", ""), [0.0, 0])
+        agg[0] += f.get("score", {}).get("e_ai_star", 0.0)
+        agg[1] += 1
+    return {a: s / max(1, n) for a, (s, n) in by_asset.items()}
+
+
+def _approx(a, b):
+    """Exact counts and extremes, floating-point sums and moments, t-digest percentiles within 0.02."""
+    assert a.keys() == b.keys()
+    for asset, sa in a.items():
+        sb = b[asset]
+        assert sa.keys() == sb.keys()
+        assert (sa["n"], sa["min_e_ai_star"], sa["max_e_ai_star"]) == (sb["n"], sb["min_e_ai_star"], sb["max_e_ai_star"])
+        for k in ("avg_e_ai_star", "var_e_ai_star", "std_e_ai_star"):
+            assert sa[k] == pytest.approx(sb[k], rel=1e-9), (asset, k)
+        for k in ("p50_e_ai_star", "p90_e_ai_star", "p99_e_ai_star"):
+            assert sa[k] == pytest.approx(sb[k], abs=0.02), (asset, k)
+        assert sa["by_source_type"].keys() == sb["by_source_type"].keys()
+        for st, v in sa["by_source_type"].items():
+            assert v["n"] == sb["by_source_type"][st]["n"]
+            assert v["avg_e_ai_star"] == pytest.approx(sb["by_source_type"][st]["avg_e_ai_star"], rel=1e-9)
+
+
+def test_tdigest_quantiles():
+    rng = random.Random(1)
+    xs = [rng.random() for _ in range(20000)]
+    d = TDigest()
+    for x in xs:
+        d.add(x)
+    ordered = sorted(xs)
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert d.quantile(q) == pytest.approx(ordered[int(q * len(xs))], abs=0.01)
+    assert d.count == len(xs)
+    small = TDigest()
+    for x in (3.0, 1.0, 2.0):
+        small.add(x)
+    assert small.quantile(0.5) == 2.0 and TDigest().quantile(0.5) == 0.0
+
+
+def test_tdigest_merge_and_round_trip():
+    rng = random.Random(2)
+    xs = [rng.gauss(0, 1) for _ in range(10000)]
+    whole, a, b = TDigest(), TDigest(), TDigest()
+    for i, x in enumerate(xs):
+        whole.add(x)
+        (a if i % 2 else b).add(x)
+    merged = a.merge(b)
+    assert merged.count == whole.count
+    restored = TDigest.from_dict(merged.to_dict())
+    for q in (0.1, 0.5, 0.9):
+        assert merged.quantile(q) == pytest.approx(whole.quantile(q), abs=0.05)
+        assert restored.quantile(q) == merged.quantile(q)
+
+
+def test_welford_merge_matches_population_variance():
+    rng = random.Random(3)
+    xs = [rng.uniform(-5, 5) for _ in range(1001)]
+    parts = [AssetStats() for _ in range(3)]
+    for i, x in enumerate(xs):
+        parts[i % 3].add(x, "web")
+    merged = AssetStats().merge(parts[0]).merge(parts[1]).merge(parts[2]).merge(AssetStats())
+    s = merged.summary()
+    assert s["n"] == len(xs)
+    assert s["avg_e_ai_star"] == pytest.approx(statistics.fmean(xs))
+    assert s["var_e_ai_star"] == pytest.approx(statistics.pvariance(xs))
+    assert (s["min_e_ai_star"], s["max_e_ai_star"]) == (min(xs), max(xs))
+    assert s["by_source_type"]["web"]["n"] == len(xs)
+
+
+def test_summary_matches_aggregate_asset_scores():
+    findings = _findings()
+    summary = AssetAggregator().add_many(findings).summary()
+    assert summary == aggregate_asset_scores(findings)
+    legacy = _legacy_avg(findings)
+    assert {a: s["avg_e_ai_star"] for a, s in summary.items()} == pytest.approx(legacy)
+    assert sum(s["n"] for s in summary.values()) == len(findings)
+
+
+def test_merged_halves_equal_one_pass():
+    findings = _findings()
+    one = AssetAggregator().add_many(findings).summary()
+    half = len(findings) // 2
+    merged = AssetAggregator().add_many(findings[:half]).merge(AssetAggregator().add_many(findings[half:]))
+    _approx(merged.summary(), one)
+    # an asset only present in one shard
+    extra = AssetAggregator().add_many([{"asset": "new.org", "score": {"e_ai_star": 0.5}}])
+    assert merged.merge(extra).summary()["new.org"]["n"] == 1
+
+
+@pytest.mark.parametrize("name", ["agg.json", "agg.json.gz"])
+def test_save_load_and_rollup(tmp_path, name):
+    findings = _findings(600)
+    a = AssetAggregator().add_many(findings[:300])
+    b = AssetAggregator().add_many(findings[300:])
+    pa, pb = str(tmp_path / f"a.{name}"), str(tmp_path / f"b.{name}")
+    a.save(pa)
+    b.save(pb)
+    assert AssetAggregator.load(pa).summary() == a.summary()
+    _approx(rollup([pa, pb]).summary(), AssetAggregator().add_many(findings).summary())
@@ -0,0 +1,105 @@
+import json
+import random
+from collections import Counter
+import pytest
+from ngbse.synth.blindspots import BlindspotAnalyzer
+from ngbse.synth.scenario_engine import group_by_themes, summarize_groups, build_scenarios, THEMES, N_THEME_EXAMPLES
+from ngbse.synth.theme_matcher import ThemeMatcher
+
+
+# reference copies of the pre-analyzer coverage_gap / recency_gap / confidence_gap
+def _coverage_gap(findings):
+    cats = []
+    for f in findings:
+        t = f.get("source", {}).get("type", "")
+        if t == "pdf": cats.append("Archive/PDF")
+        elif t == "ti_post": cats.append("TI/Blog")
+        elif t == "news": cats.append("News")
+        else: cats.append("Web")
+    c = Counter(cats)
+    total = sum(c.values())
+    if total == 0:
+        return {"ratios": {}, "max_category": "", "imbalance": 0.0}
+    ratios = {k: v / total for k, v in c.items()}
+    max_cat = max(ratios, key=ratios.get) if ratios else ""
+    imbalance = (max(ratios.values()) - min(ratios.values())) if len(ratios) > 1 else 0.0
+    return {"ratios": ratios, "max_category": max_cat, "imbalance": imbalance}
+
+
+def _recency_gap(findings):
+    days = Counter([(f.get("timestamps", {}).get("observed", "") or "")[:10] for f in findings])
+    if not days: return {"spike": False, "detail": {}}
+    peak_day, peak_count = max(days.items(), key=lambda kv: kv[1])
+    spike = peak_count >= max(3, int(0.7 * sum(days.values())))
+    return {"spike": spike, "detail": dict(days)}
+
+
+def _confidence_gap(findings):
+    high_score_assets = []
+    low_quality_assets = set()
+    for f in findings:
+        if f.get("score", {}).get("e_ai_star", 0.0) >= 0.7:
+            high_score_assets.append(f.get("asset", ""))
+        if f.get("quality", {}).get("q", 0.0) < 0.5:
+            low_quality_assets.add(f.get("asset", ""))
+    risky = sorted(set(a for a in high_score_assets if a in low_quality_assets))
+    return {"risky_assets": risky, "n": len(risky)}
+
+
+def _findings(n=500, seed=11):
+    rng = random.Random(seed)
+    titles = ["github token leak", "mqtt anonymous port:1883", "web.archive.org snapshot", "home", "", None]
+    urls = ["https://x.blob.core.windows.net/c?sv=1&signature=2", "https://example.org/", "https://web.archive.org/x", ""]
+    rows = []
+    for i in range(n):
+        rows.append({
+            "asset": f"a{i % 37}.example.org",
+            "raw": {"title": titles[i % len(titles)]},
+            "source": {"type": ["pdf", "ti_post", "news", "web", ""][i % 5], "url": urls[i % len(urls)]},
+            "quality": {"q": rng.random()},
+            "score": {"e_ai_star": rng.random()},
+            "timestamps": {"observed": ["2025-08-01T00:00:00Z", "2025-08-02T10:00:00Z", "", None][i % 4]},
+        })
+    return rows
+
+
+@pytest.mark.parametrize("n", [0, 1, 500])
+def test_matches_legacy_gap_functions(n):
+    findings = _findings(n)
+    result = BlindspotAnalyzer().add_many(findings).result()
+    assert result == {"coverage": _coverage_gap(findings), "recency": _recency_gap(findings),
+                      "confidence": _confidence_gap(findings)}
+
+
+@pytest.mark.parametrize("matcher", [None, ThemeMatcher(THEMES, multi_label=True, count_hits=True)])
+def test_theme_stats_match_group_by_themes(matcher):
+    findings = _findings()
+    analyzer = BlindspotAnalyzer(matcher).add_many(findings)
+    assert analyzer.theme_stats() == summarize_groups(group_by_themes(findings, matcher), matcher)
+
+
+@pytest.mark.parametrize("matcher", [None, ThemeMatcher(THEMES, multi_label=True, count_hits=True)])
+def test_merged_shards_equal_one_pass(matcher):
+    findings = _findings()
+    one = BlindspotAnalyzer(matcher).add_many(findings)
+    merged = BlindspotAnalyzer(matcher).add_many(findings[:200]).merge(BlindspotAnalyzer(matcher).add_many(findings[200:]))
+    assert merged.result() == one.result()
+    a, b = merged.theme_stats(), one.theme_stats()
+    assert list(a) == list(b)
+    for theme in a:
+        assert a[theme]["sum"] == pytest.approx(b[theme]["sum"])
+        assert {**a[theme], "sum": 0} == {**b[theme], "sum": 0}
+    assert merged.examples == one.examples
+    assert merged.top_findings() == one.top_findings()
+
+
+def test_theme_examples_are_top_scoring_assets(tmp_path):
+    # low scores first: a first-N window would only ever show these
+    findings = [{"asset": f"a{i % 12}.github.com", "source": {"url": "https://github.com/x/token"},
+                 "score": {"e_ai_star": i / 100}} for i in range(60)]
+    bucket = BlindspotAnalyzer().add_many(findings).theme_stats()["Public_Code_Exposure"]
+    assert [f["score"]["e_ai_star"] for f in bucket["examples"]] == [i / 100 for i in range(59, 51, -1)]
+    assert len({f["asset"] for f in bucket["examples"]}) == N_THEME_EXAMPLES
+    build_scenarios(findings, mode="prompt", theme_stats={"Public_Code_Exposure": bucket}, out_dir=str(tmp_path))
+    payload = json.loads((tmp_path / "prompt.scenarios.jsonl").read_text(encoding="utf-8"))
+    assert [e["asset"] for e in payload["examples"]] == [f"a{i % 12}.github.com" for i in range(59, 51, -1)]
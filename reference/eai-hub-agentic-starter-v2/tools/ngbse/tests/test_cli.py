@@ -0,0 +1,44 @@
+import json, os, runpy, shutil
+import pytest
+import yaml
+from ngbse import cli
+from ngbse.cli import main
+from ngbse.utils import sha256_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_rescore_with_absolute_config_from_another_cwd(tmp_path, monkeypatch):
+    conf_dir = tmp_path / "conf"
+    conf_dir.mkdir()
+    shutil.copy(os.path.join(ROOT, "scoring_model.yml"), conf_dir / "scoring_model.yml")
+    (conf_dir / "themes.yml").write_text("version: 1\nthemes:\n  Custom_Token_Theme: [token]\n", encoding="utf-8")
+    with open(os.path.join(ROOT, "ngbse.config.yml"), encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    data["output"].update({"stix": False, "docx_report": False, "save_history": False})
+    config = conf_dir / "ngbse.config.yml"
+    config.write_text(yaml.safe_dump(data), encoding="utf-8")
+
+    findings = [{"asset": f"repo{i}.github.com", "source": {"type": "code", "url": f"https://github.com/x/token{i}"},
+                 "raw": {"title": "leaked token"}, "quality": {"q": 0.8},
+                 "timestamps": {"observed": "2025-08-01T00:00:00Z", "collected": "2025-08-02T00:00:00Z"}} for i in range(3)]
+    src = tmp_path / "findings.jsonl"
+    src.write_text("".join(json.dumps(f) + "\n" for f in findings), encoding="utf-8")
+    work = tmp_path / "elsewhere"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    out = tmp_path / "run"
+    main(["rescore", "--from", str(src), "--config", str(config), "--out", str(out)])
+
+    manifest = json.loads((out / "MANIFEST.json").read_text(encoding="utf-8"))
+    assert manifest["scoring_model"]["path"] == str(conf_dir / "scoring_model.yml")
+    assert manifest["hashes"]["ngbse.config.yml"] == sha256_file(str(config))
+    state = json.loads((out / "report_state.json").read_text(encoding="utf-8"))
+    assert list(state["scenarios"]) == ["Custom_Token_Theme"]
+
+
+def test_python_m_ngbse_exits_with_the_command_status(monkeypatch):
+    monkeypatch.setattr(cli, "main", lambda argv=None: 1)
+    with pytest.raises(SystemExit) as exc:
+        runpy.run_module("ngbse", run_name="__main__")
+    assert exc.value.code == 1
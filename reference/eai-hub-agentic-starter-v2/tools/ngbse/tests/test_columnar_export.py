@@ -0,0 +1,50 @@
+import pytest
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+from ngbse.export import columnar_export
+from ngbse.export.columnar_export import export_columnar
+
+
+def _findings(n):
+    for i in range(n):
+        yield {"seed_id": f"S{i % 3}", "asset": f"a{i % 5}.org", "source": {"type": "web" if i % 2 else "github", "url": f"https://x/{i}"},
+               "raw": {"status": 200}, "timestamps": {"observed": "2025-08-17T21:19:32.189519Z"},
+               "score": {"M": 1.0, "e_ai_star": i / 10}}
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_typed_dictionary_encoded_columns(tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(columnar_export, "BATCH_ROWS", 4)
+    scores = {"a0.org": {"avg_e_ai_star": 0.5, "n": 2, "by_source_type": {}}}
+    paths = export_columnar(_findings(10), scores, str(tmp_path), fmt=fmt)
+    if fmt == "parquet":
+        table = pq.read_table(paths["findings"])
+    else:
+        table = pa.ipc.open_file(paths["findings"]).read_all()
+    assert table.num_rows == 10
+    assert pa.types.is_dictionary(table.schema.field("asset").type)
+    assert pa.types.is_timestamp(table.schema.field("timestamps_observed").type)
+    assert table.column("raw_status").type == pa.int64()
+    assert table.column("asset").to_pylist()[:6] == ["a0.org", "a1.org", "a2.org", "a3.org", "a4.org", "a0.org"]
+    assert table.column("score_e_ai_star").to_pylist()[9] == 0.9
+    assert table.column("score_C").null_count == 10
+    assets = pq.read_table(paths["asset_scores"]) if fmt == "parquet" else pa.ipc.open_file(paths["asset_scores"]).read_all()
+    assert assets.to_pylist()[0]["avg_e_ai_star"] == 0.5 and assets.to_pylist()[0]["n"] == 2
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_dictionaries_do_not_rebuild_per_batch(tmp_path, fmt):
+    path = str(tmp_path / ("f" + columnar_export.FORMATS[fmt]))
+    fields = [("key", "dict"), ("n", "int")]
+    with columnar_export.ColumnarWriter(path, fields, fmt, batch_rows=3) as w:
+        for i in range(10):
+            w.write({"key": f"k{i // 2}" if i != 4 else None, "n": i})
+    if fmt == "parquet":
+        assert w._dicts == {}
+        table = pq.read_table(path)
+        assert pq.ParquetFile(path).num_row_groups == 4
+    else:
+        assert list(w._dicts[0]) == ["k0", "k1", "k2", "k3", "k4"] and len(w._dict_values[0]) == 5
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column("key").to_pylist() == [f"k{i // 2}" if i != 4 else None for i in range(10)]
+    assert table.column("n").to_pylist() == list(range(10))
@@ -0,0 +1,26 @@
+import csv, gzip
+from ngbse.export.csv_export import write_csv, FINDING_COLUMNS
+
+
+def _findings(n):
+    for i in range(n):
+        yield {"seed_id": f"S{i}", "asset": f"a{i}.org", "source": {"type": "web", "url": f"https://a{i}.org", "domain": f"a{i}.org"},
+               "raw": {"title": "t, \"q\"", "tags": ["x", "y"]}, "timestamps": {"observed": "2025-08-17T00:00:00Z"},
+               "quality": {"q": 0.5, "notes": "n"}, "score": {"M": 1.0, "e_ai_star": 0.42}, "extra": {"ignored": 1}}
+
+
+def test_streams_fixed_schema_with_flattened_columns(tmp_path):
+    path = tmp_path / "f.csv"
+    assert write_csv(_findings(3), str(path)) == 3
+    rows = list(csv.DictReader(open(path, newline="", encoding="utf-8")))
+    assert list(rows[0].keys()) == FINDING_COLUMNS
+    assert rows[2]["asset"] == "a2.org" and rows[2]["raw_title"] == 't, "q"'
+    assert rows[0]["timestamps_observed"] == "2025-08-17T00:00:00Z" and rows[0]["quality_q"] == "0.5"
+    assert rows[0]["score_e_ai_star"] == "0.42" and rows[0]["score_C"] == ""
+
+
+def test_gzip_by_extension(tmp_path):
+    path = tmp_path / "f.csv.gz"
+    write_csv(_findings(2), str(path), columns=["asset", "raw_tags"])
+    with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["asset", "raw_tags"], ["a0.org", '["x", "y"]'], ["a1.org", '["x", "y"]']]
@@ -0,0 +1,76 @@
+import json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from ngbse.gateway import GatewayService, make_server
+from ngbse.llm_cache import LLMCache
+from ngbse.llm_client import LLMClient
+
+
+def _backend(delay=0.2):
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            calls.append(req)
+            time.sleep(delay)
+            body = json.dumps({"choices": [{"message": {"content": "echo " + req["messages"][-1]["content"]}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, calls
+
+
+def test_gateway_coalesces_caches_and_serves_clients(tmp_path, monkeypatch):
+    backend, calls = _backend()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{backend.server_address[1]}/v1")
+    service = GatewayService(LLMClient(["openai"], cache=LLMCache(str(tmp_path))), max_concurrency=2)
+    gw = make_server(service, port=0)
+    threading.Thread(target=gw.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{gw.server_address[1]}"
+    try:
+        req = {"messages": [{"role": "system", "content": "s"}, {"role": "user", "content": "hi"}], "model_hint": "gpt-4o-mini"}
+        with ThreadPoolExecutor(4) as pool:
+            outs = list(pool.map(lambda _: requests.post(url + "/v1/gateway", json=req, timeout=5).json(), range(4)))
+        assert all(o["message"] == {"role": "assistant", "content": "echo hi"} for o in outs)
+        assert len(calls) == 1 and sum(o["provider_meta"]["coalesced"] for o in outs) == 3
+        again = requests.post(url + "/v1/gateway", json=req, timeout=5).json()
+        assert again["provider_meta"]["cached"] and len(calls) == 1
+        assert requests.post(url + "/v1/gateway", json={"messages": []}, timeout=5).status_code == 400
+
+        monkeypatch.setenv("NGBSE_GATEWAY_URL", url)
+        assert LLMClient(["gateway"]).call("s", "via client") == "echo via client"
+        health = requests.get(url + "/health", timeout=5).json()
+        assert health["dispatched"] == 3 and len(calls) == 2 and health["cache"]["hits"] >= 1
+    finally:
+        gw.shutdown()
+        backend.shutdown()
+
+
+def test_gateway_rejects_invalid_sampling_fields(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    service = GatewayService(LLMClient(["openai"]))
+    gw = make_server(service, port=0)
+    threading.Thread(target=gw.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{gw.server_address[1]}/v1/gateway"
+    messages = [{"role": "user", "content": "hi"}]
+    try:
+        for field, value in [("max_tokens", "lots"), ("max_tokens", 0), ("max_tokens", 12.5), ("max_tokens", True),
+                             ("max_tokens", 10 ** 6), ("temperature", "warm"), ("temperature", -0.1), ("temperature", 2.5)]:
+            r = requests.post(url, json={"messages": messages, field: value}, timeout=5)
+            assert r.status_code == 400 and r.json()["error"].startswith(f"{field} must be "), (field, value)
+        assert requests.post(url, data=b"{not json", timeout=5).json() == {"error": "invalid JSON"}
+        assert requests.post(url, json=[messages], timeout=5).status_code == 400
+        assert service.stats["dispatched"] == 0
+    finally:
+        gw.shutdown()
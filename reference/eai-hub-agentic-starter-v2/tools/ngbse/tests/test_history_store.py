@@ -0,0 +1,100 @@
+import json
+from ngbse.forecast.forecast_engine import build_forecast
+from ngbse.forecast.history_store import HistoryStore, open_history_store
+
+
+def _write_snapshots(d, n=6):
+    d.mkdir(parents=True, exist_ok=True)
+    for r in range(n):
+        data = {f"a{i}": {"avg_e_ai_star": ((r + 1) * (i + 2)) % 7 / 7} for i in range(5) if (i + r) % 4}
+        (d / f"2025080{r + 1}120000.asset_scores.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_store_matches_json_forecast(tmp_path):
+    _write_snapshots(tmp_path / "history")
+    legacy = build_forecast(str(tmp_path))
+    with open_history_store(str(tmp_path)) as store:
+        stored = build_forecast(str(tmp_path), store=store)
+    assert stored.keys() == legacy.keys()
+    for a in legacy:
+        for k in ("last", "ewma", "projected_next"):
+            assert abs(stored[a][k] - legacy[a][k]) < 1e-12
+
+
+def test_append_is_incremental_idempotent_and_order_safe(tmp_path):
+    with HistoryStore(str(tmp_path / "h.db")) as store:
+        assert store.append_run("20250102", {"x": 1.0})
+        assert not store.append_run("20250102", {"x": 5.0})
+        store.append_run("20250103", {"x": 0.0})
+        store.append_run("20250101", {"x": 0.5, "y": 0.2})  # older run arrives late
+        f = store.forecast()
+        # replayed in ts order: 0.5, 1.0, 0.0
+        assert f["x"]["last"] == 0.0 and abs(f["x"]["ewma"] - 0.375) < 1e-12
+        assert f["y"]["ewma"] == 0.2
+
+
+def test_vector_store_and_scalar_agree(tmp_path):
+    from ngbse.forecast import vector_forecast as vf
+    _write_snapshots(tmp_path / "history", n=8)
+    vectorized = build_forecast(str(tmp_path))
+    with open_history_store(str(tmp_path)) as store:
+        stored = build_forecast(str(tmp_path), store=store)
+        store._rebuild_state()
+        rebuilt = store.forecast()
+    numpy_flag, vf_np = vf._NUMPY, vf.np
+    import ngbse.forecast.forecast_engine as fe
+    fe._NUMPY = False
+    try:
+        scalar = build_forecast(str(tmp_path))
+    finally:
+        fe._NUMPY = numpy_flag
+    assert vectorized.keys() == stored.keys() == scalar.keys() == rebuilt.keys()
+    for a in vectorized:
+        for k in ("last", "ewma", "projected_next", "trend", "lower", "upper"):
+            assert abs(vectorized[a][k] - stored[a][k]) < 1e-9
+            assert abs(scalar[a][k] - stored[a][k]) < 1e-9
+            assert abs(rebuilt[a][k] - stored[a][k]) < 1e-9
+        for k in ("change_point", "n_runs", "stale_runs"):
+            assert vectorized[a][k] == stored[a][k] == scalar[a][k] == rebuilt[a][k]
+
+
+def test_trend_interval_and_change_point(tmp_path):
+    from ngbse.forecast.vector_forecast import rising_assets
+    with HistoryStore(str(tmp_path / "h.db")) as store:
+        for r, (up, flat, jump) in enumerate([(0.1, 0.5, 0.2), (0.2, 0.5, 0.2), (0.3, 0.5, 0.2), (0.4, 0.5, 0.2), (0.5, 0.5, 0.9)]):
+            store.append_run(f"2025010{r + 1}", {"up": up, "flat": flat, "jump": jump, **({"gone": 0.3} if r < 2 else {})})
+        f = store.forecast()
+    assert f["up"]["trend"] > 0 and f["up"]["projected_next"] > f["up"]["ewma"]
+    assert f["up"]["lower"] <= f["up"]["projected_next"] <= f["up"]["upper"]
+    assert f["flat"]["trend"] == 0 and not f["flat"]["change_point"]
+    assert f["jump"]["change_point"] and not f["up"]["change_point"]
+    assert f["gone"]["stale_runs"] == 3
+    assert [r["asset"] for r in rising_assets(f)][:2] == ["jump", "up"]
+
+
+def test_sql_upsert_numpy_and_scalar_state_are_identical(tmp_path):
+    import random
+    import numpy as np
+    from ngbse.forecast.vector_forecast import forecast_matrix, holt_step
+    rng = random.Random(5)
+    assets = [f"a{i}" for i in range(40)]
+    runs = [{a: rng.random() ** rng.choice([1, 3]) for a in assets if rng.random() < 0.8} for _ in range(30)]
+    # a few quiet series that jump in the last run, so the change-point flag is exercised too
+    for t, run in enumerate(runs):
+        run.update({a: (0.95 if t == len(runs) - 1 else 0.2 + 0.01 * rng.random()) for a in assets[:4]})
+    with HistoryStore(str(tmp_path / "h.db")) as store:
+        for t, run in enumerate(runs):
+            store.append_run(f"2025{t:04d}", run)
+        stored = {a: list(s) for a, *s in store.conn.execute(
+            "SELECT a.asset, n, last, ewma, level, trend, var, jump FROM state JOIN assets a USING(asset_id)")}
+    Y = np.array([[run.get(a, np.nan) for run in runs] for a in assets])
+    st = forecast_matrix(Y)
+    scalar = {}
+    for run in runs:
+        for a, v in run.items():
+            scalar[a] = holt_step(scalar.get(a), v)
+    assert sorted(stored) == sorted(scalar) == sorted(assets)
+    assert any(s[6] for s in scalar.values())
+    for i, a in enumerate(assets):
+        vector = [int(st["n"][i]), *(float(st[k][i]) for k in ("last", "ewma", "level", "trend", "var")), int(st["jump"][i])]
+        assert stored[a] == vector == scalar[a], a
@@ -2,8 +2,13 @@ def test_imports():
     import ngbse
     import ngbse.collectors.http_web
     import ngbse.enrich.metadata_enricher
+    import ngbse.enrich.ip_asn
     import ngbse.scoring.scoring
+    import ngbse.scoring.aggregate
+    import ngbse.pipeline
+    import ngbse.cli
     import ngbse.synth.reverse_llm
+    import ngbse.synth.blindspots
     import ngbse.export.stix_exporter
     import ngbse.forecast.forecast_engine
     import ngbse.report.docx_reporter
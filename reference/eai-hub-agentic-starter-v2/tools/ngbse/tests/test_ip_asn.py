@@ -0,0 +1,63 @@
+import pytest
+from ngbse.enrich import ip_asn
+from ngbse.enrich.ip_asn import IpAsnDatabase, build_ip_asn_db, enrich_ip_asn
+
+
+def _db(tmp_path, name, text):
+    src = tmp_path / name
+    src.write_text(text, encoding="utf-8")
+    out = str(tmp_path / "ip.db")
+    return build_ip_asn_db([str(src)], out), out
+
+
+def test_headered_csv_round_trip(tmp_path):
+    stats, path = _db(tmp_path, "ranges.csv",
+                      "start_ip,end_ip,asn,org,country\n"
+                      "10.0.0.0,10.0.0.255,AS64500,Example Net,nl\n"
+                      "10.0.2.0,10.0.2.9,64501,Other,ZZ\n"
+                      "2001:db8::,2001:db8::ff,64502,V6,NL\n")
+    assert stats == {"ranges": 2, "orgs": 2, "skipped": 1, "overlaps": 0}
+    with IpAsnDatabase(path) as db:
+        assert db.lookup("10.0.0.0") == {"asn": 64500, "as_org": "Example Net", "country": "NL"}
+        assert db.lookup("10.0.0.255")["asn"] == 64500
+        assert db.lookup("9.255.255.255") is None
+        assert db.lookup("10.0.1.0") is None
+        assert db.lookup("10.0.2.9") == {"asn": 64501, "as_org": "Other", "country": ""}
+        assert db.lookup("10.0.2.10") is None
+        assert db.lookup("not-an-ip") is None
+
+
+def test_headerless_iptoasn_tsv(tmp_path):
+    stats, path = _db(tmp_path, "ip2asn-v4.tsv",
+                      "1.0.0.0\t1.0.0.255\t13335\tUS\tCLOUDFLARENET\n"
+                      "1.0.1.0\t1.0.3.255\t0\tNone\tNot routed\n"
+                      "1.0.4.0\t1.0.7.255\t38803\tAU\tGTELECOM\n")
+    assert stats["ranges"] == 3 and stats["skipped"] == 0
+    with IpAsnDatabase(path) as db:
+        assert db.lookup("1.0.0.0") == {"asn": 13335, "as_org": "CLOUDFLARENET", "country": "US"}
+        assert db.lookup("1.0.2.0") == {"asn": 0, "as_org": "Not routed", "country": ""}
+        assert db.lookup("1.0.7.255")["asn"] == 38803
+        assert db.lookup("1.0.8.0") is None
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_lookup_many_matches_lookup(tmp_path, monkeypatch, numpy):
+    _, path = _db(tmp_path, "ranges.csv",
+                  "network,asn,org,country\n10.0.0.0/24,1,A,NL\n10.0.1.0/24,2,B,DE\n192.168.0.0/16,3,C,-\n")
+    if not numpy:
+        monkeypatch.setattr(ip_asn, "_NUMPY", False)
+    ips = ["0.0.0.0", "9.255.255.255", "10.0.0.0", "10.0.0.255", "10.0.1.0", "10.0.1.255", "10.0.2.0",
+           "192.168.255.255", "255.255.255.255", "bogus", ""]
+    with IpAsnDatabase(path) as db:
+        assert db.lookup_many(ips) == [db.lookup(ip) for ip in ips]
+        assert [r and r["asn"] for r in db.lookup_many(ips)] == [None, None, 1, 1, 2, 2, None, 3, None, None, None]
+        assert db.lookup("192.168.1.1")["country"] == ""
+
+
+def test_enrich_ip_asn(tmp_path):
+    _, path = _db(tmp_path, "ranges.csv", "start_ip,end_ip,asn,org,country\n10.0.0.0,10.0.0.255,64500,Example,NL\n")
+    findings = [{"raw": {"ip": "10.0.0.7"}}, {"raw": {"ip": "10.0.1.7"}}, {"raw": {}}, {}]
+    with IpAsnDatabase(path) as db:
+        out = enrich_ip_asn(findings, db)
+    assert out[0]["enrich"] == {"asn": 64500, "as_org": "Example", "country": "NL"}
+    assert all("enrich" not in f for f in out[1:])
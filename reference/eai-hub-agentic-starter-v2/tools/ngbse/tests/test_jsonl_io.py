@@ -0,0 +1,73 @@
+import gzip, json
+import pytest
+from ngbse import jsonl_io
+from ngbse.jsonl_io import write_jsonl, iter_jsonl, load_jsonl, iter_jsonl_parallel, chunk_ranges, load_json, write_json
+from ngbse.utils import sha256_file
+
+
+def _rows(n):
+    return [{"asset": f"a{i}.org", "title": "é \"q\"", "score": {"e_ai_star": i / 7}} for i in range(n)]
+
+
+@pytest.mark.parametrize("name", ["f.jsonl", "f.jsonl.gz"])
+def test_roundtrip_by_extension(tmp_path, name):
+    path = str(tmp_path / name)
+    rows = _rows(10000)
+    assert write_jsonl(path, iter(rows)) == sha256_file(path)
+    assert load_jsonl(path) == rows
+    if name.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert json.loads(f.readline()) == rows[0]
+
+
+def test_zstd_roundtrip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "f.jsonl.zst")
+    write_jsonl(path, _rows(100))
+    assert list(iter_jsonl(path)) == _rows(100)
+
+
+def test_stdlib_fallback_for_nan_and_blank_lines(tmp_path):
+    path = tmp_path / "f.jsonl"
+    path.write_text('{"v": NaN}\n\n{"v": 1}\n', encoding="utf-8")
+    rows = load_jsonl(str(path))
+    assert rows[0]["v"] != rows[0]["v"] and rows[1] == {"v": 1}
+
+
+def test_parallel_parser_keeps_file_order(tmp_path, monkeypatch):
+    path = str(tmp_path / "f.jsonl")
+    rows = _rows(5000)
+    write_jsonl(path, rows)
+    ranges = chunk_ranges(path, chunk_bytes=4096)
+    assert len(ranges) > 10 and ranges[0][0] == 0 and all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert list(iter_jsonl_parallel(path, workers=2, chunk_bytes=4096)) == rows
+    monkeypatch.setattr(jsonl_io, "PARALLEL_MIN_BYTES", 0)
+    assert load_jsonl(path, workers=2) == rows
+
+
+def test_json_document_compressed(tmp_path):
+    path = str(tmp_path / "scores.json.gz")
+    write_json(path, {"a.org": {"avg_e_ai_star": 0.5}}, indent=2)
+    assert load_json(path) == {"a.org": {"avg_e_ai_star": 0.5}}
+
+
+def test_stdlib_path_writes_the_same_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsonl_io, "_ORJSON", False)
+    monkeypatch.setattr(jsonl_io, "_MSGSPEC", False)
+    path = str(tmp_path / "f.jsonl")
+    write_jsonl(path, _rows(10))
+    assert load_jsonl(path) == _rows(10)
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_non_finite_floats_survive_a_roundtrip(tmp_path, monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(jsonl_io, "_ORJSON", False)
+        monkeypatch.setattr(jsonl_io, "_MSGSPEC", False)
+    path = str(tmp_path / "f.jsonl")
+    rows = [{"v": float("nan"), "w": None}, {"v": [float("inf"), -float("inf")]}, {"v": None}]
+    write_jsonl(path, rows)
+    out = load_jsonl(path)
+    assert out[0]["v"] != out[0]["v"] and out[0]["w"] is None
+    assert out[1:] == rows[1:]
+    assert jsonl_io.dumps({"v": None}) in (b'{"v":null}', b'{"v": null}')
@@ -0,0 +1,34 @@
+import json, os
+from ngbse.config import AppConfig
+from ngbse.llm_batch import LocalFileBatchAdapter
+from ngbse.pipeline import rescore_run, collect_llm_batch
+
+
+def test_batch_mode_submits_and_llm_collect_fills_report(tmp_path, monkeypatch):
+    findings = [{"asset": f"repo{i}.github.com", "source": {"type": "code", "url": f"https://github.com/x/token{i}"},
+                 "raw": {"title": "leaked token"}, "quality": {"q": 0.8},
+                 "timestamps": {"observed": "2025-08-01T00:00:00Z", "collected": "2025-08-02T00:00:00Z"}} for i in range(5)]
+    src = tmp_path / "findings.jsonl"
+    src.write_text("".join(json.dumps(f) + "\n" for f in findings), encoding="utf-8")
+    cfg = AppConfig()
+    cfg.output.stix = False
+    cfg.llm.batch_dir = str(tmp_path / "batch")
+    cfg.output.report_template_cache = str(tmp_path / "report_template.docx")
+    monkeypatch.setenv("NGBSE_SCENARIO_MODE", "batch")
+    monkeypatch.setenv("NGBSE_REVERSE_LLM_MODE", "batch")
+    out = tmp_path / "run"
+    rescore_run(cfg, str(src), str(out))
+
+    lines = [json.loads(l) for l in (out / "llm_batch.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [l["custom_id"] for l in lines] == ["brief", "scenario:Public_Code_Exposure"]
+    assert all(l["url"] == "/v1/chat/completions" and l["body"]["messages"][0]["role"] == "system" for l in lines)
+    assert collect_llm_batch(str(out)) == {"status": "pending"}
+
+    LocalFileBatchAdapter(cfg.llm.batch_dir).process_pending(lambda s, u, m, t: "antwoord")
+    result = collect_llm_batch(str(out))
+    assert result["status"] == "completed" and result["filled"] == 2
+    state = json.loads((out / "report_state.json").read_text(encoding="utf-8"))
+    assert state["brief"]["BLUF"] == "antwoord"
+    assert state["scenarios"]["Public_Code_Exposure"]["semantic_summary"] == "antwoord"
+    report = state["report_path"]
+    assert os.path.exists(report) or os.path.exists(report.rsplit(".", 1)[0] + ".md")
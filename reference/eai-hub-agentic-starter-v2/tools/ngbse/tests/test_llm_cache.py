@@ -0,0 +1,33 @@
+import time
+from ngbse.llm_cache import LLMCache, cache_key
+from ngbse.llm_client import LLMClient
+
+
+def test_cache_hit_ttl_and_eviction(tmp_path):
+    c = LLMCache(str(tmp_path), ttl_seconds=3600, max_bytes=600)
+    k1 = cache_key("openai", "m", "sys", "user", 0.2, 300)
+    assert k1 != cache_key("openai", "m", "sys", "user", 0.2, 400)
+    assert c.get(k1) is None
+    c.put(k1, "answer")
+    assert c.get(k1) == "answer"
+    for i in range(10):
+        c.put(cache_key("openai", "m", "sys", str(i), 0.2, 300), "x" * 100)
+    assert c.stats()["bytes"] <= 600 and c.evictions > 0
+    c.ttl_seconds = 1e-9
+    time.sleep(0.01)
+    assert c.get(cache_key("openai", "m", "sys", "9", 0.2, 300)) is None
+    assert c.expired == 1
+    assert LLMCache(str(tmp_path)).stats()["entries"] == c.stats()["entries"]
+
+
+def test_client_serves_repeat_prompt_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    calls = []
+    def fake_openai(self, system_prompt, user_prompt, max_tokens, temperature):
+        calls.append(user_prompt)
+        return "BLUF"
+    monkeypatch.setattr(LLMClient, "_call_openai", fake_openai)
+    client = LLMClient(["openai"], cache=LLMCache(str(tmp_path)))
+    assert client.call("s", "u", max_tokens=400) == "BLUF"
+    assert client.call("s", "u", max_tokens=400) == "BLUF"
+    assert len(calls) == 1 and client.cache.hits == 1
@@ -0,0 +1,84 @@
+import json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ngbse.llm_client import LLMClient, CircuitBreaker
+
+
+def _stub(statuses):
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status = statuses[min(len(seen), len(statuses) - 1)]
+            seen.append(status)
+            body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+            if status == "garbage":
+                status, body = 200, b"<html>not json</html>"
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, seen
+
+
+def test_retries_on_5xx_then_succeeds(monkeypatch):
+    srv, seen = _stub([503, 429, 200])
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    try:
+        client = LLMClient(["openai"], max_retries=3, backoff=0.01)
+        assert client.call("s", "u") == "ok"
+        assert seen == [503, 429, 200]
+        m = client.metrics["openai"]
+        assert m["retries"] == 2 and m["ok"] == 1 and m["errors"] == 2
+    finally:
+        srv.shutdown()
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    b = CircuitBreaker(failures=2, cooldown=0.05)
+    b.failure()
+    assert b.allow()
+    b.failure()
+    assert b.state == "open" and not b.allow()
+    time.sleep(0.06)
+    assert b.allow() and not b.allow()
+    b.success()
+    assert b.state == "closed"
+
+
+def test_hedged_call_takes_fastest_provider(monkeypatch):
+    def slow(self, *a):
+        time.sleep(0.5)
+        return "slow"
+    monkeypatch.setattr(LLMClient, "_call_openai", slow)
+    monkeypatch.setattr(LLMClient, "_call_anthropic", lambda self, *a: "fast")
+    client = LLMClient(["openai", "anthropic"], hedge_after=0.05)
+    t0 = time.perf_counter()
+    assert client.call("s", "u") == "fast"
+    assert time.perf_counter() - t0 < 0.3
+
+
+def test_failed_half_open_trial_releases_the_breaker(monkeypatch):
+    srv, seen = _stub([500, "garbage", 400, 200])
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    try:
+        client = LLMClient(["openai"], max_retries=0, breaker_failures=1, breaker_cooldown=0.05)
+        breaker = client.breakers["openai"]
+        assert client.call("s", "u") is None and breaker.state == "open"
+        for _ in ("garbage", 400):  # trial ends in a malformed 200, then in a non-retryable 4xx
+            time.sleep(0.06)
+            assert client.call("s", "u") is None and breaker.state == "open"
+        time.sleep(0.06)
+        assert client.call("s", "u") == "ok" and breaker.state == "closed"
+        assert seen == [500, "garbage", 400, 200]
+    finally:
+        srv.shutdown()
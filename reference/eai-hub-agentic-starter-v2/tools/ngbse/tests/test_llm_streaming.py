@@ -0,0 +1,118 @@
+import json, threading, time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ngbse.llm_client import LLMClient, ProviderError, stop_after_actions
+
+BRIEF = ["BLUF: ", "drie assets ", "lekken tokens.\n", "1. Roteer tokens\n", "2. Sluit buckets\n",
+         "3. Herscan\n", "4. extra\n", "5. extra\n", "6. extra\n"]
+
+
+def _sse_stub(fmt, delay=0.05, statuses=(200,), chunked=False):
+    state = {"sent": 0, "requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            status = statuses[min(state["requests"], len(statuses) - 1)]
+            state["requests"] += 1
+            if status != 200:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write(data):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+            try:
+                for chunk in BRIEF:
+                    if fmt == "openai":
+                        event = {"choices": [{"delta": {"content": chunk}}]}
+                    else:
+                        event = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": chunk}}
+                    write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                    state["sent"] += 1
+                    time.sleep(delay)
+                if fmt == "openai":
+                    write(b"data: [DONE]\n\n")
+                if chunked:
+                    self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *a):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, state
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_openai_stream_yields_chunks_and_metrics(monkeypatch, chunked):
+    srv, _ = _sse_stub("openai", delay=0.01, chunked=chunked)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    try:
+        client = LLMClient(["openai"])
+        chunks = list(client.stream("s", "u"))
+        assert chunks == BRIEF
+        m = client.metrics["openai"]
+        assert m["streams"] == 1 and 0 < m["ttft_total"] <= m["latency_total"] and m["tokens"] > 0
+    finally:
+        srv.shutdown()
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_anthropic_stream_cuts_off_after_three_actions(monkeypatch, chunked):
+    srv, state = _sse_stub("anthropic", delay=0.05, chunked=chunked)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    try:
+        client = LLMClient(["anthropic"], stream=True)
+        t0 = time.perf_counter()
+        text = client.call("s", "u", stop_when=stop_after_actions(3))
+        assert text.endswith("3. Herscan") and "4." not in text
+        assert time.perf_counter() - t0 < 0.05 * len(BRIEF)
+    finally:
+        srv.shutdown()
+
+
+def test_cut_off_trial_stream_closes_the_breaker(monkeypatch):
+    srv, state = _sse_stub("anthropic", delay=0.01, statuses=(500, 200))
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{srv.server_address[1]}/v1")
+    try:
+        client = LLMClient(["anthropic"], stream=True, max_retries=0, breaker_failures=1, breaker_cooldown=0.05)
+        assert client.call("s", "u") is None and client.breakers["anthropic"].state == "open"
+        time.sleep(0.06)
+        assert client.call("s", "u", stop_when=stop_after_actions(3)).endswith("3. Herscan")
+        assert client.breakers["anthropic"].state == "closed" and client.breakers["anthropic"]._count == 0
+        assert client.call("s", "u", stop_when=stop_after_actions(1)).endswith("1. Roteer tokens")
+        assert state["requests"] == 3
+    finally:
+        srv.shutdown()
+
+
+def test_interrupted_stream_is_an_error_and_not_cached(monkeypatch, tmp_path):
+    from ngbse.llm_cache import LLMCache
+
+    def broken(self, provider, url, headers, payload):
+        yield {"choices": [{"delta": {"content": "BLUF: half"}}]}
+        raise ConnectionError("reset")
+    monkeypatch.setattr(LLMClient, "_sse_events", broken)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    client = LLMClient(["openai"], cache=LLMCache(str(tmp_path)), stream=True)
+    with pytest.raises(ProviderError):
+        list(client.stream("s", "u"))
+    assert client.call("s", "u") is None
+    assert client.metrics["openai"]["ok"] == 0 and client.metrics["openai"]["errors"] == 2
+    assert client.cache.stats()["stores"] == 0
@@ -0,0 +1,31 @@
+import gzip, json
+from ngbse.utils import sha256_file
+from ngbse.jsonl_io import write_jsonl
+from ngbse.export.csv_export import write_csv
+from ngbse.manifest import write_manifest
+from ngbse.timing import StageTimer
+
+
+def test_writers_hash_what_they_write(tmp_path):
+    rows = [{"asset": f"a{i}.org", "title": "é"} for i in range(10000)]
+    path = tmp_path / "findings.jsonl"
+    assert write_jsonl(str(path), rows) == sha256_file(str(path))
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[-1]) == rows[-1]
+    hashes = {}
+    write_csv(rows, str(tmp_path / "f.csv.gz"), columns=["asset"], hashes=hashes)
+    assert hashes == {"f.csv.gz": sha256_file(str(tmp_path / "f.csv.gz"))}
+    with gzip.open(tmp_path / "f.csv.gz", "rt", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 10001
+
+
+def test_manifest_uses_writer_digests_and_stage_times(tmp_path):
+    timer = StageTimer()
+    with timer.stage("write.findings"):
+        digest = write_jsonl(str(tmp_path / "findings.jsonl"), [{"a": 1}])
+    (tmp_path / "findings.jsonl").write_text("changed\n", encoding="utf-8")  # not read back
+    write_manifest(str(tmp_path), "17.1", None, None, str(tmp_path / "findings.jsonl"),
+                   hashes={"findings.jsonl": digest, "bundle.json": "x"}, timer=timer)
+    m = json.loads((tmp_path / "MANIFEST.json").read_text(encoding="utf-8"))
+    assert m["hashes"]["findings.jsonl"] == digest and m["hashes"]["bundle.json"] == "x"
+    assert [s["stage"] for s in m["stages"]] == ["write.findings"]
+    assert m["start_time"] <= m["end_time"]
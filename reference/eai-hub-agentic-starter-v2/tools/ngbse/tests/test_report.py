@@ -0,0 +1,55 @@
+import os
+import pytest
+from ngbse.report import docx_reporter
+from ngbse.report.docx_reporter import build_report_model, render_markdown, write_report
+from ngbse.pipeline import _start_report
+
+
+def _inputs(n):
+    brief = {"BLUF": "bluf", "TopRisks": [{"asset": f"a{i}.org", "risk": i / n} for i in range(n)], "Actions": ["act"]}
+    blindspots = {"coverage": {"ratios": {"Web": 1.0}, "imbalance": 0.0}, "recency": {}, "confidence": {}}
+    forecast = {f"a{i}.org": {"last": 0.1, "projected_next": 0.1 + i / n, "trend": i / n, "lower": 0.0, "upper": 1.0,
+                              "change_point": i == n - 1} for i in range(n)}
+    scenarios = {"ransomware": {"probability_90_days": 0.3, "semantic_summary": "a | b"}}
+    return brief, blindspots, forecast, scenarios
+
+
+def test_model_is_cut_to_top_n():
+    model = build_report_model(*_inputs(1000), top_n=5)
+    assert model["top_risks"]["total"] == 1000 and len(model["top_risks"]["rows"]) == 5
+    assert model["top_risks"]["rows"][0][0] == "a999.org"
+    assert model["rising"]["rows"][0][0] == "a999.org" and model["rising"]["rows"][0][-1] == "yes"
+    assert model["change_points"] == {"assets": ["a999.org"], "total": 1}
+
+
+def test_markdown_template(tmp_path):
+    tpl = tmp_path / "brief.tpl.md"
+    tpl.write_text("# $title\n$top_risks\n$unknown\n", encoding="utf-8")
+    path = write_report(str(tmp_path / "brief.md"), *_inputs(50), top_n=3, md_template=str(tpl))
+    text = open(path, encoding="utf-8").read()
+    assert text.startswith("# NGBSE") and "$unknown" in text
+    assert text.count("| a4") == 3
+    assert "a \\| b" in render_markdown(build_report_model(*_inputs(2)))
+
+
+def test_docx_uses_cached_template(tmp_path, monkeypatch):
+    pytest.importorskip("docx")
+    import docx
+    cache = str(tmp_path / "cache" / "template.docx")
+    monkeypatch.setattr(docx_reporter, "_template_bytes", None)
+    path = write_report(str(tmp_path / "brief.docx"), *_inputs(200), top_n=10, template_cache=cache)
+    assert os.path.exists(cache)
+    doc = docx.Document(path)
+    assert len(doc.tables) == 3 and len(doc.tables[0].rows) == 11
+    monkeypatch.setattr(docx_reporter, "_build_template", lambda: pytest.fail("template rebuilt"))
+    monkeypatch.setattr(docx_reporter, "_template_bytes", None)
+    write_report(str(tmp_path / "again.docx"), *_inputs(5), template_cache=cache)
+
+
+@pytest.mark.parametrize("use_process", [False, True])
+def test_start_report(tmp_path, use_process):
+    brief, blindspots, forecast, scenarios = _inputs(20)
+    state = {"brief": brief, "blindspots": blindspots, "forecast": forecast, "scenarios": scenarios,
+             "report_path": str(tmp_path / "brief.md"), "top_n": 5, "md_template": None}
+    assert _start_report(state, use_process=use_process).result(timeout=60) == state["report_path"]
+    assert os.path.exists(state["report_path"])
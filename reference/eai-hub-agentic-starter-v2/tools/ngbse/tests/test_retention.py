@@ -0,0 +1,51 @@
+import datetime, json, os
+from ngbse.forecast.forecast_engine import build_forecast
+from ngbse.forecast.history_store import open_history_store
+from ngbse.forecast.retention import compact_history, plan_compaction
+from ngbse.scoring.aggregate import AssetAggregator
+
+NOW = datetime.datetime(2025, 6, 30, 12, 0, 0)
+
+
+def _write_runs(d, days_back):
+    d.mkdir(parents=True, exist_ok=True)
+    for i, back in enumerate(days_back):
+        for h in (1, 3):
+            ts = (NOW - datetime.timedelta(days=back, hours=h)).strftime("%Y%m%d%H%M%S")
+            scores = {"a": {"avg_e_ai_star": (i % 5) / 5 + h / 100}, "b": {"avg_e_ai_star": 0.5}}
+            (d / f"{ts}.asset_scores.json").write_text(json.dumps(scores), encoding="utf-8")
+            AssetAggregator().add_many([{"asset": "a", "score": {"e_ai_star": 0.3}}]).save(str(d / f"{ts}.asset_agg.json"))
+
+
+def test_plan_keeps_recent_and_coarsens_old():
+    fmt = "%Y%m%d%H%M%S"
+    entries = [((NOW - datetime.timedelta(days=d, hours=h)).strftime(fmt), "run") for d in (1, 20, 200) for h in (1, 2)]
+    groups = plan_compaction(entries, NOW)
+    assert [p for p, _ in groups] == ["week", "day"]
+    assert all(len(m) == 2 for _, m in groups)
+    assert plan_compaction([(max(m), p) for p, m in groups] + entries[:2], NOW) == []
+
+
+def test_compaction_rewrites_history_and_forecast_reads_rollups(tmp_path):
+    hist = tmp_path / "history"
+    _write_runs(hist, days_back=[1, 2, 30, 31, 150, 151])
+    with open_history_store(str(tmp_path)) as store:
+        assert len(store.run_timestamps()) == 12
+    stats = compact_history(str(hist), now=NOW)
+    files = sorted(os.listdir(hist))
+    assert len([f for f in files if f.endswith(".asset_scores.json")]) == 4
+    assert len([f for f in files if ".day.asset_scores.json.gz" in f]) == 2
+    assert len([f for f in files if ".week.asset_scores.json.gz" in f]) == 1
+    assert len([f for f in files if ".asset_agg.json" in f]) == 7
+    assert stats["snapshots_removed"] == 5 and stats["store_runs_removed"] == 5
+    assert compact_history(str(hist), now=NOW)["groups"] == 0
+
+    from_json = build_forecast(str(tmp_path))
+    with open_history_store(str(tmp_path)) as store:
+        assert len(store.run_timestamps()) == 7
+        from_store = build_forecast(str(tmp_path), store=store)
+    for a in ("a", "b"):
+        for k in ("last", "ewma", "projected_next", "trend"):
+            assert abs(from_json[a][k] - from_store[a][k]) < 1e-9
+    week = [f for f in files if ".week.asset_agg.json.gz" in f][0]
+    assert AssetAggregator.load(str(hist / week)).assets["a"].n == 4
@@ -0,0 +1,37 @@
+import json, time
+from ngbse.llm_client import LLMClient
+from ngbse.synth.scenario_engine import build_scenarios
+
+STATS = {t: {"n": 3, "sum": 2.4, "examples": [{"asset": t.lower(), "source": {"url": "u", "type": "web"}}]}
+         for t in ["Theme_A", "Theme_B", "Theme_C", "Theme_D"]}
+
+
+def test_api_calls_run_concurrently_in_order(monkeypatch):
+    def fake_call(self, system_prompt, user_prompt, max_tokens=800, temperature=0.2):
+        theme = json.loads(user_prompt)["theme"]
+        time.sleep(0.2 if theme == "Theme_A" else 0.05)
+        return "summary " + theme
+    monkeypatch.setattr(LLMClient, "call", fake_call)
+    t0 = time.perf_counter()
+    out = build_scenarios([], mode="api", theme_stats=STATS, max_in_flight=4)
+    assert time.perf_counter() - t0 < 0.35
+    assert list(out) == list(STATS)
+    assert [v["semantic_summary"] for v in out.values()] == ["summary " + t for t in STATS]
+
+
+def test_prompt_mode_writes_one_jsonl_per_run(tmp_path):
+    build_scenarios([], mode="prompt", theme_stats=STATS, out_dir=str(tmp_path))
+    lines = (tmp_path / "prompt.scenarios.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["theme"] for l in lines] == list(STATS)
+
+
+def test_prompt_builder_ranks_dedupes_and_respects_budget():
+    from ngbse.synth.prompt_builder import PromptBuilder, estimate_tokens
+    findings = [{"asset": f"a{i % 30}", "source": {"url": f"https://a{i}.x/p?sig=secret", "type": "web"},
+                 "score": {"e_ai_star": (i % 50) / 50}} for i in range(200)]
+    b = PromptBuilder(max_input_tokens=300, max_output_tokens=100)
+    user, payload = b.pack("system", {"theme": "T", "empty": None}, findings, lambda f: {"asset": f["asset"], "url": f["source"]["url"].split("?")[0]})
+    assets = [e["asset"] for e in payload["examples"]]
+    assert len(assets) == len(set(assets)) and "empty" not in payload
+    assert estimate_tokens("system") + estimate_tokens(user) <= 300
+    assert b.output_tokens(400) == 100
@@ -0,0 +1,104 @@
+import pytest
+from ngbse.scoring.scoring import score_findings, score_findings_batch, KeywordMatcher
+
+
+def _findings():
+    rows = []
+    titles = ["Critical SCADA breach", "cve-2024-1234 leak", "Home", "", None, "Ransomware leaked vulnerability"]
+    observed = ["2025-08-01T10:00:00Z", "2025-08-29T23:00:00Z", "", None, "garbage", "2025-08-30T00:00:00+00:00"]
+    for i in range(60):
+        rows.append({
+            "asset": f"a{i % 7}.example.com",
+            "raw": {"title": titles[i % len(titles)]},
+            "source": {"type": ["ti_post", "pdf", "web", "news"][i % 4], "url": f"https://a{i}.example.com/x", "domain": ["industrialcyber.co", "example.com", "", None][i % 4]},
+            "quality": {"q": 0.1 * (i % 10)},
+            "timestamps": {"observed": observed[i % len(observed)]},
+        })
+    return rows
+
+
+def test_batch_scoring_matches_reference():
+    now = "2025-08-30T00:00:00Z"
+    a = score_findings(_findings(), now_iso=now)
+    b = score_findings_batch(_findings(), now_iso=now)
+    assert [f["score"] for f in a] == [f["score"] for f in b]
+
+
+def test_keyword_matcher_overlapping_keywords():
+    weights = {"ab": 0.1, "abc": 0.2, "bc": 0.4, "c": 0.05}
+    m = KeywordMatcher(weights)
+    texts = ["xabcx", "bc", "nothing", "ABC", "a\nbc"]
+    expected = []
+    for t in texts:
+        s = 0.0
+        for kw, w in weights.items():
+            if kw in t.lower():
+                s += w
+        expected.append(min(1.0, s))
+    assert m.score_many(texts) == expected
+
+
+def test_model_file_matches_builtin_and_hot_reloads(tmp_path):
+    import os, time
+    from ngbse.scoring.model import load_scoring_model, HotScorer
+    now = "2025-08-30T00:00:00Z"
+    scorer = load_scoring_model(os.path.join(os.path.dirname(__file__), "..", "scoring_model.yml"))
+    a = score_findings(_findings(), now_iso=now)
+    b = score_findings_batch(_findings(), now_iso=now, scorer=scorer)
+    assert [f["score"] for f in a] == [f["score"] for f in b]
+
+    path = tmp_path / "model.yml"
+    path.write_text("version: '1'\nkeyword_weights: {home: 0.5}\n", encoding="utf-8")
+    hot = HotScorer(str(path), check_interval=0)
+    assert hot.get().version == "1"
+    path.write_text("version: '2'\nkeyword_weights: {home: 0.9}\n", encoding="utf-8")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert hot.get().version == "2"
+    assert hot.get().matcher.score("Home") == 0.9
+
+
+def test_model_path_is_relative_to_the_config(tmp_path, monkeypatch):
+    import os
+    from ngbse.config import load_config
+    from ngbse.scoring.model import load_scoring_model
+    config = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ngbse.config.yml"))
+    monkeypatch.chdir(tmp_path)
+    cfg = load_config(config)
+    assert os.path.isabs(cfg.scoring.model_path)
+    assert load_scoring_model(cfg.scoring.model_path).version
+
+
+def _timestamp_findings(n, seed):
+    import random
+    rng = random.Random(seed)
+    edge = ["2024-02-29T12:00:00Z", "2023-02-29T12:00:00Z", "2025-08-01", "2025-08-01Z", "2025-08-01 10:00:00",
+            "2025-08-01T10:00:00.123Z", "2025-08-01T10:00:00.1234", "2025-08-01T24:00:00", "0000-01-01T00:00:00",
+            "2025-08-01T10:00:00-02:00", "2025-08-01T10:00", "2025-13-01", "2025-08-01T10:00:00\x00", "２０２５-08-01",
+            "2025-09-15T00:00:00Z", "1999-12-31T23:59:59.999999Z", "2025-08-29T23:59:59.999999", 20250801, None, ""]
+    rows = []
+    for i in range(n):
+        if i % 3 == 0:
+            observed = edge[i // 3 % len(edge)]
+        else:
+            observed = (f"{rng.randint(1990, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                        f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+                        + rng.choice(["", "Z", f".{rng.randint(0, 999999):06d}", f".{rng.randint(0, 999):03d}Z"]))
+        rows.append({"asset": f"a{i % 11}", "raw": {"title": rng.choice(["SCADA İstanbul breach", "Home", None])},
+                     "source": {"type": rng.choice(["pdf", "web", None]), "url": f"https://h{i}.org/CVE-{i}",
+                                "domain": rng.choice(["Example.COM", "industrialcyber.co", None, ""])},
+                     "quality": {"q": rng.choice([rng.random(), 1, "0.25"])}, "timestamps": {"observed": observed}})
+    return rows
+
+
+@pytest.mark.parametrize("engine", ["columnar", "regex_keywords", "rows"])
+@pytest.mark.parametrize("now", ["2025-08-30T00:00:00Z", "2025-08-29T23:59:59.999999", "2025-08-30T00:00:00+00:00", "bad"])
+def test_columnar_engine_matches_reference(monkeypatch, now, engine):
+    from ngbse.scoring import scoring, model
+    monkeypatch.setattr(scoring, "SCORE_CHUNK_ROWS", 257)
+    if engine == "regex_keywords":
+        monkeypatch.setattr(model, "VECTOR_KEYWORDS", 0)
+    elif engine == "rows":
+        monkeypatch.setattr(scoring, "_NUMPY", False)
+    a = score_findings(_timestamp_findings(3000, 5), now_iso=now)
+    b = score_findings_batch(_timestamp_findings(3000, 5), now_iso=now)
+    assert [f["score"] for f in a] == [f["score"] for f in b]
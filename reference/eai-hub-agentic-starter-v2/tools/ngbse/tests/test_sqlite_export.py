@@ -0,0 +1,29 @@
+import sqlite3
+from ngbse.export.sqlite_export import export_sqlite
+
+
+def _findings():
+    for i in range(6):
+        yield {"seed_id": "S1", "asset": "x.org" if i % 2 else "y.org",
+               "source": {"type": "leak" if i < 3 else "web", "url": f"https://x.org/dump{i}", "domain": "x.org"},
+               "raw": {"title": f"database dump {i}" if i != 4 else "login page"},
+               "timestamps": {"observed": f"2025-08-{10 + i:02d}T00:00:00Z"}, "score": {"e_ai_star": i / 10}}
+
+
+def test_runs_are_normalised_indexed_and_searchable(tmp_path):
+    db = str(tmp_path / "ngbse.db")
+    seeds = [{"id": "S1", "query": "x.org", "type": "web", "priority": 0.9}]
+    export_sqlite(db, "20250817000000", str(tmp_path / "run1"), _findings(), {"x.org": {"n": 3, "avg_e_ai_star": 0.3}}, seeds)
+    export_sqlite(db, "20250818000000", str(tmp_path / "run2"), _findings(), {})
+    export_sqlite(db, "20250818000000", str(tmp_path / "run2"), _findings(), {})  # re-export replaces the run
+    c = sqlite3.connect(db)
+    assert c.execute("SELECT COUNT(*), SUM(n_findings) FROM runs").fetchone() == (2, 12)
+    rows = c.execute("SELECT f.title FROM findings f JOIN assets a USING(asset_id) WHERE a.asset = 'x.org' "
+                     "AND f.source_type = 'leak' AND f.observed >= '2025-08-11' ORDER BY f.finding_id").fetchall()
+    assert rows == [("database dump 1",), ("database dump 1",)]
+    plan = " ".join(r[-1] for r in c.execute("EXPLAIN QUERY PLAN SELECT * FROM findings WHERE asset_id = 1 AND observed >= '2025'"))
+    assert "findings_asset_observed" in plan
+    hits = c.execute("SELECT COUNT(*) FROM findings_fts WHERE findings_fts MATCH 'dump'").fetchone()[0]
+    assert hits == 10
+    assert c.execute("SELECT seed_id, query FROM seeds").fetchall() == [("S1", "x.org")]
+    assert c.execute("SELECT avg_e_ai_star FROM scores").fetchall() == [(0.3,)]
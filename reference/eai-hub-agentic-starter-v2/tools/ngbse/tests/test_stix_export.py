@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+import stix2
+from ngbse.export.stix_exporter import export_stix, StixBundleWriter, to_indicator, indicator_id, stix_timestamp
+
+
+def _finding(i):
+    return {"seed_id": f"s{i}", "source": {"type": "web", "url": f"https://ex{i}.org/p?q='{i}'\\x"},
+            "raw": {"title": "tést" if i % 2 else None}}
+
+
+def test_stream_is_byte_identical_to_stix2_bundle(tmp_path):
+    created = datetime(2025, 8, 17, 12, 0, 0, 123000)
+    findings = [_finding(i) for i in range(5)]
+    path = str(tmp_path / "bundle.json")
+    with StixBundleWriter(path, validate="all", bundle_id="bundle--" + "0" * 8 + "-0000-4000-8000-" + "0" * 12) as w:
+        for f in findings:
+            w.write(to_indicator(f, stix_timestamp(created)))
+    assert w.validated == 5
+    objs = [stix2.Indicator(id=indicator_id(f), name=f["raw"]["title"] or f["source"]["url"],
+                            pattern=to_indicator(f, "")["pattern"], pattern_type="stix",
+                            created=created, modified=created, valid_from=created) for f in findings]
+    expected = str(stix2.Bundle(objects=objs, id=w.bundle_id))
+    assert open(path, encoding="utf-8").read() == expected
+
+
+def test_ids_are_deterministic_and_bundle_parses(tmp_path):
+    path = str(tmp_path / "bundle.json")
+    assert export_stix((_finding(i) for i in range(2500)), path) == 2500
+    bundle = stix2.parse(open(path, encoding="utf-8").read(), allow_custom=False)
+    assert len(bundle.objects) == 2500
+    assert bundle.objects[7].id == indicator_id(_finding(7)) == indicator_id(json.loads(json.dumps(_finding(7))))
+    assert bundle.objects[3].pattern == "[url:value = 'https://ex3.org/p?q=\\'3\\'\\\\x']"
+
+
+def test_delta_mode_emits_new_indicators_and_sightings(tmp_path):
+    from ngbse.export.stix_exporter import open_stix_state
+    first, second = [_finding(i) for i in range(3)], [_finding(i) for i in (1, 2, 2, 3)]
+    with open_stix_state(str(tmp_path)) as state:
+        export_stix(first, str(tmp_path / "b1.json"), state=state, mode="delta")
+    with open_stix_state(str(tmp_path / "rescore"), [str(tmp_path / "history")]) as state:
+        assert export_stix(second, str(tmp_path / "b2.json"), state=state, mode="delta") == 3
+        export_stix(second, str(tmp_path / "b3.json"), state=state, mode="full")
+    b1 = stix2.parse(open(tmp_path / "b1.json", encoding="utf-8").read())
+    b2 = stix2.parse(open(tmp_path / "b2.json", encoding="utf-8").read())
+    b3 = json.loads(open(tmp_path / "b3.json", encoding="utf-8").read())
+    assert [o.type for o in b2.objects] == ["sighting", "sighting", "indicator"]
+    s = b2.objects[0]
+    assert s.sighting_of_ref == indicator_id(_finding(1)) == b1.objects[1].id and s.count == 2
+    assert s.first_seen == b1.objects[1].created
+    # full mode keeps the original created timestamp of known indicators
+    assert [o["id"] for o in b3["objects"]] == [indicator_id(_finding(i)) for i in (1, 2, 3)]
+    assert b3["objects"][0]["created"] == b1.objects[1].created.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
@@ -0,0 +1,47 @@
+import os
+from ngbse.synth.scenario_engine import THEMES, classify_theme, group_by_themes
+from ngbse.synth.theme_matcher import ThemeMatcher, load_theme_matcher
+
+
+def _reference(f):
+    text = (f.get("source", {}).get("url", "") + " " + f.get("asset", "")).lower()
+    for theme, kws in THEMES.items():
+        if any(k in text for k in kws):
+            return theme
+    if f.get("score", {}).get("e_ai_star", 0.0) >= 0.75:
+        return "High_Risk_Generic"
+    return None
+
+
+def _findings():
+    urls = ["https://github.com/x/secret", "https://a.blob.core.windows.net/c?sv=1&signature=2",
+            "mqtt://h:1883", "https://web.archive.org/web/github.com", "https://plain.example.com", ""]
+    return [{"asset": f"h{i}.example.com", "source": {"url": urls[i % len(urls)]},
+             "score": {"e_ai_star": 0.1 * (i % 10)}} for i in range(40)]
+
+
+def test_first_match_equals_reference():
+    for f in _findings():
+        assert classify_theme(f) == _reference(f)
+
+
+def test_multi_label_and_hit_counts():
+    m = ThemeMatcher(THEMES, multi_label=True, count_hits=True)
+    f = {"asset": "x", "source": {"url": "https://web.archive.org/web/github.com/token"}}
+    assert m.assign(f) == [("Public_Code_Exposure", 2), ("Archive_Only_Findings", 1)]
+    groups = group_by_themes([f], m)
+    assert set(groups) == {"Public_Code_Exposure", "Archive_Only_Findings"}
+
+
+def test_themes_file_matches_builtin():
+    m = load_theme_matcher(os.path.join(os.path.dirname(__file__), "..", "themes.yml"))
+    for f in _findings():
+        assert m.classify(f) == _reference(f)
+
+
+def test_themes_path_is_relative_to_the_config(tmp_path, monkeypatch):
+    from ngbse.config import load_config
+    config = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ngbse.config.yml"))
+    monkeypatch.chdir(tmp_path)
+    tc = load_config(config).themes
+    assert os.path.isabs(tc.path) and load_theme_matcher(tc.path).classify(_findings()[0])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Times report rendering (Markdown, DOCX with a cold and a warm template cache) for a synthetic large run."""
+import argparse, os, random, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ngbse.report import docx_reporter
+from ngbse.report.docx_reporter import write_report, REPORT_TOP_N
+
+
+def synthetic_run(n_assets: int, n_themes: int, seed: int = 7):
+    rnd = random.Random(seed)
+    assets = [f"asset{i}.example.com" for i in range(n_assets)]
+    brief = {"BLUF": "Synthetic benchmark run.",
+             "TopRisks": [{"asset": a, "risk": round(rnd.random(), 3)} for a in assets],
+             "Actions": ["Valideer top-assets handmatig (sign-off vereist)"]}
+    blindspots = {"coverage": {"ratios": {"Web": 0.4, "Leak": 0.6}, "imbalance": 0.2},
+                  "recency": {"spike": False, "detail": {}}, "confidence": {"risky_assets": assets[:5]}}
+    forecast = {}
+    for a in assets:
+        last = rnd.random()
+        trend = rnd.uniform(-0.05, 0.05)
+        forecast[a] = {"last": last, "ewma": last, "projected_next": last + trend, "trend": trend,
+                       "lower": last + trend - 0.1, "upper": last + trend + 0.1,
+                       "change_point": rnd.random() < 0.01, "n_runs": 30, "stale_runs": 0}
+    scenarios = {f"theme{i}": {"probability_90_days": rnd.random(), "semantic_summary": "Synthetic theme."}
+                 for i in range(n_themes)}
+    return brief, blindspots, forecast, scenarios
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - t0, 4)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark report rendering for large runs")
+    ap.add_argument("--assets", type=int, default=10000)
+    ap.add_argument("--themes", type=int, default=50)
+    ap.add_argument("--top-n", type=int, default=REPORT_TOP_N)
+    args = ap.parse_args()
+    brief, blindspots, forecast, scenarios = synthetic_run(args.assets, args.themes)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "report_template.docx")
+        render = lambda name: write_report(os.path.join(tmp, name), brief, blindspots, forecast, scenarios,
+                                           top_n=args.top_n, template_cache=cache)
+        result = {"assets": args.assets, "themes": args.themes, "top_n": args.top_n,
+                  "markdown_s": timed(lambda: render("brief.md"))}
+        if docx_reporter._DOCX:
+            docx_reporter._template_bytes = None
+            result["docx_cold_s"] = timed(lambda: render("cold.docx"))
+            result["docx_warm_s"] = timed(lambda: render("warm.docx"))
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Times scoring of synthetic findings: the per-finding reference (score_findings), the batch path
+(score_findings_batch: gather columns, score, write score dicts) and the columnar core alone
+(score_columns on columns gathered beforehand), and checks that all three agree.
+"""
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ngbse.scoring.dynamic_parameters import DYNAMIC
+from ngbse.scoring.model import compile_model
+from ngbse.scoring.scoring import score_findings, score_findings_batch, score_columns
+
+NOW = "2025-08-30T00:00:00Z"
+
+
+def synthetic_findings(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    titles = ["Critical SCADA breach", "cve-2024-1234 leak", "Home", "", None, "Ransomware leaked vulnerability"]
+    out = []
+    for i in range(n):
+        out.append({
+            "asset": f"a{i % 5000}.example.com",
+            "raw": {"title": titles[i % len(titles)]},
+            "source": {"type": rnd.choice(["web", "pdf", "ti_post", "news"]), "url": f"https://a{i % 5000}.example.com/p/{i}",
+                       "domain": rnd.choice(["example.com", "industrialcyber.co", "github.com", None])},
+            "quality": {"q": rnd.random()},
+            "timestamps": {"observed": f"2025-{rnd.randint(1, 8):02d}-{rnd.randint(1, 28):02d}T{rnd.randint(0, 23):02d}:"
+                                       f"{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}.{rnd.randint(0, 999999):06d}Z"},
+        })
+    return out
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return round(time.perf_counter() - t0, 4), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark finding scoring")
+    ap.add_argument("--findings", type=int, default=1_000_000)
+    args = ap.parse_args()
+    scorer = compile_model(DYNAMIC)
+
+    ref = synthetic_findings(args.findings)
+    ref_s, _ = timed(lambda: score_findings(ref, NOW))
+    findings = synthetic_findings(args.findings)
+    batch_s, batch = timed(lambda: score_findings_batch(findings, NOW, scorer=scorer))
+    sources = [f["source"] for f in findings]
+    cols = ([s.get("type") for s in sources], [s.get("domain") for s in sources],
+            [f["quality"]["q"] for f in findings], [f["timestamps"]["observed"] for f in findings],
+            [f"{f['raw'].get('title') or ''} {f['source'].get('url', '')}" for f in findings])
+    core_s, core = timed(lambda: score_columns(*cols, NOW, scorer))
+    assert [f["score"] for f in ref] == [f["score"] for f in batch]
+    assert core["e_ai_star"].tolist() == [f["score"]["e_ai_star"] for f in ref]
+    print({"findings": args.findings, "reference_s": ref_s, "batch_s": batch_s, "columnar_core_s": core_s,
+           "batch_speedup": round(ref_s / batch_s, 1), "core_speedup": round(ref_s / core_s, 1)})
+
+
+if __name__ == "__main__":
+    main()
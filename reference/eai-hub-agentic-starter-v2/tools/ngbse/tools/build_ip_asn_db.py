@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+import sys, os, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ngbse.enrich.ip_asn import build_ip_asn_db
+
+def main():
+    ap = argparse.ArgumentParser(description="Build an offline NGBSE IP→ASN/geo database from CSV/TSV dumps")
+    ap.add_argument("inputs", nargs="+", help="CSV/TSV dumps (columns: start_ip,end_ip|network,asn,org,country)")
+    ap.add_argument("--out", required=True, help="Output database file (e.g. data/ip_asn.ngipdb)")
+    ap.add_argument("--delimiter", default=None, help="Field delimiter (default: auto-detect comma/tab)")
+    args = ap.parse_args()
+    stats = build_ip_asn_db(args.inputs, args.out, delimiter=args.delimiter)
+    print(f"Wrote {stats['ranges']} ranges ({stats['orgs']} orgs, {stats['skipped']} skipped, {stats['overlaps']} overlaps) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
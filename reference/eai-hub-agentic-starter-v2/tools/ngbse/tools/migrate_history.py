@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""Imports history/*.asset_scores.json snapshots into the SQLite history store (history.db)."""
+import argparse, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ngbse.forecast.history_store import HistoryStore, migrate_json_history, DB_NAME
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Migrate JSON asset-score history into history.db")
+    ap.add_argument("history_dirs", nargs="+", help="Directories with <ts>.asset_scores.json files (e.g. out/history)")
+    ap.add_argument("--db", default=None, help=f"Target store (default: <first dir>/{DB_NAME})")
+    args = ap.parse_args()
+    path = args.db or os.path.join(args.history_dirs[0], DB_NAME)
+    with HistoryStore(path) as store:
+        added = migrate_json_history(store, args.history_dirs)
+        print({"db": path, "runs_added": added, "runs_total": len(store.run_timestamps()), "assets": len(store.forecast())})
+
+
+if __name__ == "__main__":
+    main()